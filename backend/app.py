@@ -1,19 +1,50 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, g
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from datetime import datetime
+from datetime import datetime, timedelta
+import atexit
+import hashlib
+import math
 import os
+from collections import namedtuple
+import threading
+import time
+import click
 from dotenv import load_dotenv
 import pandas as pd
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
 
 from services.nlp_engine import NLPEngine
-from services.sentiment_analyzer import SentimentAnalyzer
 from services.suggestion_generator import SuggestionGenerator
 from services.alert_system import AlertSystem
+from services.json_provider import FastJSONProvider
+from services.compression import ResponseCompressor
+from services.suggestion_catalog import SuggestionCatalog
+from services.feedback_analyzer import FeedbackAnalyzer
+from services.analysis_rpc import AnalysisClient, RemoteFeedbackAnalyzer
+from services.dedup import DuplicateDetector
+from services.group_commit import GroupCommitQueue, QueueFull
+from services.db_config import engine_options, install_sqlite_pragmas, sqlite_pragmas
+from services.read_routing import ReadRoutingSession, record_write, use_read_engine, wrote_recently
+from services.text_classifier import HashedTfidfClassifier
+from services.search import (SEARCH_INDEX_DDL, DROP_SEARCH_INDEX, REBUILD_SEARCH_INDEX, build_match_query,
+                             scoped_match, make_snippet, highlight, encode_cursor, decode_cursor)
+from services.term_trends import DOCUMENT_TERM, count_terms, day_date, day_number, score_trends
+from services.cohort_stats import DIMENSIONS, SORT_KEYS, compare_cohorts, count_stats, sort_groups
+from services.ttl_cache import TTLCache
+from services.streaming_stats import StreamingStats, scope_keys
+from services.spike_detector import SpikeDetector
+from services.hot_cache import COLUMNS as HOT_CACHE_COLUMNS, HotFeedbackCache
+from services.rate_limit import ConcurrencyLimiter, LocalRateLimiter, RateLimit, SqliteRateLimiter
+from services.profiler import SamplingProfiler, install_sql_timing
+from services.archive import (ARCHIVE_COLUMNS, SUMMARY_COLUMNS, next_semester, previous_semester, read_archive,
+                              semester_label, semester_start, summarize, write_archive)
 
 load_dotenv()
 
@@ -24,19 +55,173 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['ALLOWED_EXTENSIONS'] = {'csv', 'xlsx', 'xls'}
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+app.config['JSON_BACKEND'] = os.getenv('JSON_BACKEND', 'auto')  # 'auto', 'orjson' or 'stdlib'
+app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # bytes
+app.config['SUGGESTION_RULES_FILE'] = os.getenv('SUGGESTION_RULES_FILE')  # JSON rule table, defaults to services/suggestion_rules.json
+app.config['ANALYSIS_WORKERS'] = int(os.getenv('ANALYSIS_WORKERS', 1))  # >1 analyzes uploads in a process pool
+app.config['REANALYSIS_ROWS_PER_SEC'] = float(os.getenv('REANALYSIS_ROWS_PER_SEC', 200))
+app.config['SEARCH_RANK_WINDOW'] = int(os.getenv('SEARCH_RANK_WINDOW', 0))  # rank only the newest N matches by BM25; 0 ranks them all
+app.config['DEDUP_ENABLED'] = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+app.config['DEDUP_MODE'] = os.getenv('DEDUP_MODE', 'flag')  # 'flag' stores duplicates with duplicate_of, 'collapse' drops them
+app.config['DEDUP_SCOPE'] = os.getenv('DEDUP_SCOPE', 'student_course')  # 'student_course' or 'course'
+app.config['DEDUP_WINDOW_HOURS'] = float(os.getenv('DEDUP_WINDOW_HOURS', 72))
+app.config['DEDUP_THRESHOLD'] = float(os.getenv('DEDUP_THRESHOLD', 0.8))  # estimated Jaccard similarity
+app.config['CATEGORIZER'] = os.getenv('CATEGORIZER', 'keyword')  # 'keyword' or 'model'
+app.config['CATEGORIZER_MODEL_FILE'] = os.getenv('CATEGORIZER_MODEL_FILE', 'models/categorizer.npz')  # from `flask train-categorizer`
+app.config['SENTIMENT_MODE'] = os.getenv('SENTIMENT_MODE', 'full')  # 'full', 'fast' (merged lexicon) or 'auto'
+app.config['SENTIMENT_AUTO_MARGIN'] = float(os.getenv('SENTIMENT_AUTO_MARGIN', 0.05))  # 'auto' re-checks scores this close to ±0.1
+app.config['ANALYSIS_SERVER'] = os.getenv('ANALYSIS_SERVER', '')  # e.g. unix:/tmp/feedback-analysis.sock or 127.0.0.1:5055
+app.config['ANALYSIS_SERVER_TIMEOUT'] = float(os.getenv('ANALYSIS_SERVER_TIMEOUT', 30))  # seconds
+app.config['GROUP_COMMIT'] = os.getenv('GROUP_COMMIT', 'false').lower() == 'true'  # submissions share transactions in a writer thread
+app.config['GROUP_COMMIT_MAX_ROWS'] = int(os.getenv('GROUP_COMMIT_MAX_ROWS', 100))
+app.config['GROUP_COMMIT_MAX_WAIT_MS'] = float(os.getenv('GROUP_COMMIT_MAX_WAIT_MS', 10))
+app.config['GROUP_COMMIT_QUEUE_SIZE'] = int(os.getenv('GROUP_COMMIT_QUEUE_SIZE', 1000))  # more pending submissions get a 503
+app.config['GROUP_COMMIT_TIMEOUT_SECONDS'] = float(os.getenv('GROUP_COMMIT_TIMEOUT_SECONDS', 30))  # longer waits for the writer get a 503
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 0))  # 0 uses the profile for the database URL (sqlite 10, postgresql 5)
+app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW')) if os.getenv('DB_MAX_OVERFLOW') else None
+app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))  # wait this long for the write lock
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.getenv('SQLITE_CACHE_SIZE_KB', 65536))  # page cache per connection
+app.config['SQLITE_MMAP_SIZE_MB'] = int(os.getenv('SQLITE_MMAP_SIZE_MB', 256))
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'],
+    pool_size=app.config['DB_POOL_SIZE'],
+    max_overflow=app.config['DB_MAX_OVERFLOW'],
+    busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS']
+)
+app.config['READ_DATABASE_URL'] = os.getenv('READ_DATABASE_URL', '')  # dashboard reads: '' primary, 'primary' own read-only pool on it, or a replica URL
+app.config['READ_YOUR_WRITES_SECONDS'] = float(os.getenv('READ_YOUR_WRITES_SECONDS', 5))  # a user's reads stay on the primary this long after they write
+app.config['COMPARE_CACHE_SECONDS'] = float(os.getenv('COMPARE_CACHE_SECONDS', 60))  # cohort comparisons are reused this long (0 disables)
+app.config['STREAM_STATS_DIR'] = os.getenv('STREAM_STATS_DIR', 'stream_stats')  # per-worker sketch snapshots; '' turns live stats off
+app.config['STREAM_STATS_SNAPSHOT_SECONDS'] = float(os.getenv('STREAM_STATS_SNAPSHOT_SECONDS', 30))
+app.config['SPIKE_DETECTION'] = os.getenv('SPIKE_DETECTION', 'true').lower() == 'true'
+app.config['SPIKE_WINDOW_MINUTES'] = float(os.getenv('SPIKE_WINDOW_MINUTES', 60))
+app.config['SPIKE_Z_THRESHOLD'] = float(os.getenv('SPIKE_Z_THRESHOLD', 3.0))  # deviations from the baseline that raise an alert
+app.config['SPIKE_EWMA_ALPHA'] = float(os.getenv('SPIKE_EWMA_ALPHA', 0.1))  # weight of the newest window in the baselines
+app.config['SPIKE_MIN_COUNT'] = int(os.getenv('SPIKE_MIN_COUNT', 5))  # scored feedbacks a window needs before its sentiment is judged
+app.config['SPIKE_WARMUP_WINDOWS'] = int(os.getenv('SPIKE_WARMUP_WINDOWS', 6))  # closed windows before a scope can alert
+app.config['SPIKE_ALERT_DAYS'] = int(os.getenv('SPIKE_ALERT_DAYS', 7))  # spike alerts listed with urgent feedback
+app.config['HOT_CACHE_ROWS'] = int(os.getenv('HOT_CACHE_ROWS', 100000))  # newest feedback held in memory for lists and analytics; 0 disables
+app.config['HOT_CACHE_CHECK_SECONDS'] = float(os.getenv('HOT_CACHE_CHECK_SECONDS', 1))  # other workers' changes show up within this long
+app.config['ARCHIVE_DIR'] = os.getenv('ARCHIVE_DIR', 'archives')  # compressed files of feedback moved out by `flask archive-feedback`
+app.config['RETENTION_SEMESTERS'] = int(os.getenv('RETENTION_SEMESTERS', 4))  # semesters kept in the feedback table, the current one included
+app.config['SEMESTER_START_MONTHS'] = [int(m) for m in os.getenv('SEMESTER_START_MONTHS', '1,7').split(',')]  # semesters begin on the 1st of these months
+app.config['ARCHIVE_CACHE_SECONDS'] = float(os.getenv('ARCHIVE_CACHE_SECONDS', 300))  # opened archive files stay in memory this long
+app.config['IDEMPOTENCY_KEY_HOURS'] = float(os.getenv('IDEMPOTENCY_KEY_HOURS', 24))  # stored responses are replayed to retries this long
+app.config['IDEMPOTENCY_LOCK_SECONDS'] = float(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 300))  # a retry may take over an unfinished first request after this long
+app.config['RATE_LIMIT_BACKEND'] = os.getenv('RATE_LIMIT_BACKEND', 'local')  # 'local' per worker, 'sqlite' shared by the host's workers, '' off
+app.config['RATE_LIMIT_SQLITE_PATH'] = os.getenv('RATE_LIMIT_SQLITE_PATH', 'rate_limits.db')
+app.config['RATE_LIMIT_PROXY_HOPS'] = int(os.getenv('RATE_LIMIT_PROXY_HOPS', 0))  # proxies in front that append X-Forwarded-For; must be set behind one
+for limit_class, per_minute, burst in [('SUBMIT', 20, 5), ('UPLOAD', 2, 3), ('AUTH', 10, 10), ('AUTH_IP', 600, 300)]:
+    # Token bucket per user (AUTH: per submitted username; AUTH_IP: per client IP); 0 per minute turns the class off
+    app.config[f'RATE_LIMIT_{limit_class}_PER_MINUTE'] = float(os.getenv(f'RATE_LIMIT_{limit_class}_PER_MINUTE', per_minute))
+    app.config[f'RATE_LIMIT_{limit_class}_BURST'] = float(os.getenv(f'RATE_LIMIT_{limit_class}_BURST', burst))
+app.config['ANALYSIS_MAX_CONCURRENT'] = int(os.getenv('ANALYSIS_MAX_CONCURRENT', 4))  # submissions and uploads analyzed at once per worker; 0 unlimited
+app.config['ANALYSIS_QUEUE_SECONDS'] = float(os.getenv('ANALYSIS_QUEUE_SECONDS', 2))  # wait this long for a slot before answering 503
+app.config['PROFILE_SAMPLE_MS'] = float(os.getenv('PROFILE_SAMPLE_MS', 5))  # stack sampling interval of profiled requests
+app.config['PROFILE_SLOW_MS'] = float(os.getenv('PROFILE_SLOW_MS', 2000))  # requests slower than this are kept in the slow log; 0 turns it off
+app.config['PROFILE_LOG_SIZE'] = int(os.getenv('PROFILE_LOG_SIZE', 50))  # requested and slow profiles kept per worker
+if app.config['READ_DATABASE_URL']:
+    read_url = app.config['READ_DATABASE_URL']
+    if read_url == 'primary':
+        read_url = app.config['SQLALCHEMY_DATABASE_URI']
+    app.config['SQLALCHEMY_BINDS'] = {'read': {'url': read_url, **engine_options(
+        read_url,
+        pool_size=app.config['DB_POOL_SIZE'],
+        max_overflow=app.config['DB_MAX_OVERFLOW'],
+        busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS']
+    )}}
+app.json = FastJSONProvider(app, backend=app.config['JSON_BACKEND'])
 
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-CORS(app, supports_credentials=True, origins=['http://localhost:3000', 'https://your-project.vercel.app'])
-db = SQLAlchemy(app)
+CORS_ORIGINS = ['http://localhost:3000', 'https://your-project.vercel.app']
+CORS(app, supports_credentials=True, origins=CORS_ORIGINS)
+db = SQLAlchemy(app, session_options={'class_': ReadRoutingSession})
+
+def database_pragmas():
+    """PRAGMAs applied to every SQLite connection, from app config"""
+    return sqlite_pragmas(
+        journal_mode=app.config['SQLITE_JOURNAL_MODE'],
+        synchronous=app.config['SQLITE_SYNCHRONOUS'],
+        busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'],
+        cache_size_kb=app.config['SQLITE_CACHE_SIZE_KB'],
+        mmap_size_mb=app.config['SQLITE_MMAP_SIZE_MB']
+    )
+
+profiler = SamplingProfiler(
+    interval=app.config['PROFILE_SAMPLE_MS'] / 1000,
+    slow_seconds=app.config['PROFILE_SLOW_MS'] / 1000,
+    log_size=app.config['PROFILE_LOG_SIZE']
+)
+
+read_engine = None
+with app.app_context():
+    install_sqlite_pragmas(db.engine, database_pragmas())
+    install_sql_timing(db.engine, profiler)
+    if app.config['READ_DATABASE_URL']:
+        read_engine = db.engines['read']
+        # query_only: the read pool can't write, even when it opens the primary's file
+        install_sqlite_pragmas(read_engine, database_pragmas() + [('query_only', 'ON')])
+        install_sql_timing(read_engine, profiler)
 migrate = Migrate(app, db)
+compressor = ResponseCompressor(app)
 
 # Initialize services
 nlp_engine = NLPEngine()
-sentiment_analyzer = SentimentAnalyzer()
-suggestion_generator = SuggestionGenerator()
+suggestion_generator = SuggestionGenerator(rules_file=app.config['SUGGESTION_RULES_FILE'])
 alert_system = AlertSystem()
+suggestion_catalog = SuggestionCatalog()
+duplicate_detector = DuplicateDetector(threshold=app.config['DEDUP_THRESHOLD'])
+if app.config['STREAM_STATS_DIR']:
+    stream_stats = StreamingStats(app.config['STREAM_STATS_DIR'], snapshot_seconds=app.config['STREAM_STATS_SNAPSHOT_SECONDS'])
+    atexit.register(stream_stats.save)
+else:
+    stream_stats = None
+if app.config['SPIKE_DETECTION']:
+    spike_detector = SpikeDetector(
+        window_seconds=app.config['SPIKE_WINDOW_MINUTES'] * 60,
+        z_threshold=app.config['SPIKE_Z_THRESHOLD'],
+        alpha=app.config['SPIKE_EWMA_ALPHA'],
+        min_count=app.config['SPIKE_MIN_COUNT'],
+        warmup_windows=app.config['SPIKE_WARMUP_WINDOWS']
+    )
+else:
+    spike_detector = None
+hot_cache = HotFeedbackCache(app.config['HOT_CACHE_ROWS']) if app.config['HOT_CACHE_ROWS'] > 0 else None
+
+RATE_LIMITS = {
+    limit_class: RateLimit(app.config[f'RATE_LIMIT_{limit_class.upper()}_PER_MINUTE'],
+                           app.config[f'RATE_LIMIT_{limit_class.upper()}_BURST'])
+    for limit_class in ('submit', 'upload', 'auth', 'auth_ip')
+}
+if app.config['RATE_LIMIT_BACKEND'] == 'sqlite':
+    rate_limiter = SqliteRateLimiter(app.config['RATE_LIMIT_SQLITE_PATH'])
+elif app.config['RATE_LIMIT_BACKEND'] == 'local':
+    rate_limiter = LocalRateLimiter()
+else:
+    rate_limiter = None
+analysis_limiter = ConcurrencyLimiter(app.config['ANALYSIS_MAX_CONCURRENT'], app.config['ANALYSIS_QUEUE_SECONDS']) \
+    if app.config['ANALYSIS_MAX_CONCURRENT'] > 0 else None
+
+def create_local_analyzer():
+    """In-process FeedbackAnalyzer (categorizer, sentiment models, suggestion rules) from app config"""
+    return FeedbackAnalyzer.create(
+        rules_file=app.config['SUGGESTION_RULES_FILE'],
+        model_file=app.config['CATEGORIZER_MODEL_FILE'] if app.config['CATEGORIZER'] == 'model' else None,
+        sentiment_mode=app.config['SENTIMENT_MODE'],
+        sentiment_auto_margin=app.config['SENTIMENT_AUTO_MARGIN']
+    )
+
+if app.config['ANALYSIS_SERVER']:
+    # Models live in the analysis server; they are only loaded here if it is down
+    feedback_analyzer = RemoteFeedbackAnalyzer(AnalysisClient(app.config['ANALYSIS_SERVER'],
+                                                              timeout=app.config['ANALYSIS_SERVER_TIMEOUT']),
+                                               create_local_analyzer)
+else:
+    feedback_analyzer = create_local_analyzer()
 
 # Database Models
 class User(db.Model):
@@ -80,29 +265,221 @@ class Feedback(db.Model):
     feedback_type = db.Column(db.String(20), default='campus')  # 'campus' or 'faculty'
     feedback_text = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(100))
+    category_label = db.Column(db.String(100))  # Category set by an admin; kept over analysis and used for training
     sentiment = db.Column(db.String(20))
     sentiment_score = db.Column(db.Float)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     is_urgent = db.Column(db.Boolean, default=False)
-    suggestions = db.Column(db.Text)
+    suggestions_text = db.Column('suggestions', db.Text)  # Legacy free-text suggestions
+    suggestion_ids = db.Column(db.String(64))  # Packed suggestion catalog ids, e.g. "3,7,12"
+    analyzer_version = db.Column(db.String(16), index=True)  # FeedbackAnalyzer.version that produced the results
+    duplicate_of = db.Column(db.Integer, db.ForeignKey('feedback.id'), index=True)  # Earlier near-identical feedback
+    minhash = db.Column(db.LargeBinary)  # MinHash signature, only stored on non-duplicates
+
+    @property
+    def suggestions(self):
+        """Suggestion text, expanded from catalog ids (older rows keep free text)"""
+        return feedback_suggestions(self)
+
+    def to_dict(self, expand=True):
+        return feedback_dict(self, expand)
+
+def feedback_suggestions(f):
+    """Suggestion text of a Feedback or hot cache row, expanded from catalog ids (older rows keep free text)"""
+    if f.suggestion_ids:
+        return '; '.join(expand_suggestions(f.suggestion_ids))
+    return f.suggestions_text
+
+def feedback_dict(f, expand=True):
+    """API representation of a Feedback or hot cache row"""
+    # timestamp is left as a datetime; the JSON provider writes it as ISO 8601
+    data = {
+        'id': f.id,
+        'student_id': f.student_id,
+        'class_name': f.class_name,
+        'course_id': f.course_id,
+        'instructor_id': f.instructor_id,
+        'feedback_type': f.feedback_type,
+        'feedback_text': f.feedback_text,
+        'category': f.category,
+        'sentiment': f.sentiment,
+        'sentiment_score': f.sentiment_score,
+        'timestamp': f.timestamp,
+        'is_urgent': f.is_urgent,
+        'duplicate_of': f.duplicate_of
+    }
+    if expand:
+        data['suggestions'] = feedback_suggestions(f)
+    else:
+        data['suggestion_ids'] = suggestion_catalog.unpack(f.suggestion_ids)
+        data['suggestions'] = f.suggestions_text
+    return data
+
+class FeedbackLSH(db.Model):
+    """LSH band buckets of feedback MinHash signatures, for near-duplicate lookup"""
+    __tablename__ = 'feedback_lsh'
+    
+    bucket = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    feedback_id = db.Column(db.Integer, db.ForeignKey('feedback.id'), primary_key=True)
+
+class SpikeAlert(db.Model):
+    """A course or class whose feedback volume or sentiment in one window broke from its baseline"""
+    __tablename__ = 'spike_alerts'
+    __table_args__ = (db.UniqueConstraint('scope', 'scope_value', 'metric', 'window_start'),)  # one per window across workers
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)  # 'course' or 'class'
+    scope_value = db.Column(db.String(100), nullable=False)
+    metric = db.Column(db.String(20), nullable=False)  # 'volume' or 'sentiment'
+    window_start = db.Column(db.DateTime, nullable=False)
+    window_minutes = db.Column(db.Float, nullable=False)
+    observed = db.Column(db.Float, nullable=False)  # feedback count, or mean sentiment score
+    baseline = db.Column(db.Float, nullable=False)  # EWMA of earlier windows
+    z_score = db.Column(db.Float, nullable=False)
+    feedback_count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def to_dict(self):
         return {
             'id': self.id,
-            'student_id': self.student_id,
-            'class_name': self.class_name,
-            'course_id': self.course_id,
-            'instructor_id': self.instructor_id,
-            'feedback_type': self.feedback_type,
-            'feedback_text': self.feedback_text,
-            'category': self.category,
-            'sentiment': self.sentiment,
-            'sentiment_score': self.sentiment_score,
-            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
-            'is_urgent': self.is_urgent,
-            'suggestions': self.suggestions
+            'scope': self.scope,
+            'scope_value': self.scope_value,
+            'metric': self.metric,
+            'window_start': self.window_start,
+            'window_minutes': self.window_minutes,
+            'observed': self.observed,
+            'baseline': self.baseline,
+            'z_score': self.z_score,
+            'feedback_count': self.feedback_count,
+            'created_at': self.created_at
         }
 
+class TermStat(db.Model):
+    """Per-day, per-course counts of feedbacks containing each unigram/bigram"""
+    __tablename__ = 'term_stats'
+    __table_args__ = {'sqlite_with_rowid': False}  # Clustered on (day, course_id, term) for window scans
+    
+    day = db.Column(db.Integer, primary_key=True, autoincrement=False)  # date.toordinal()
+    course_id = db.Column(db.String(100), primary_key=True)
+    term = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class CohortStat(db.Model):
+    """Per-day sentiment moments, score histogram and urgent counts of feedback grouped by one column"""
+    __tablename__ = 'cohort_stats'
+    __table_args__ = {'sqlite_with_rowid': False}  # Clustered so each group's rows are read in order
+    
+    dimension = db.Column(db.String(20), primary_key=True)  # one of cohort_stats.DIMENSIONS
+    value = db.Column(db.String(100), primary_key=True)  # '' when the feedback has no value
+    score_bin = db.Column(db.Integer, primary_key=True, autoincrement=False)  # cohort_stats.score_bin
+    day = db.Column(db.Integer, primary_key=True, autoincrement=False)  # date.toordinal()
+    count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    urgent = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeCounter(db.Model):
+    """Counters bumped with changes that other workers' in-process caches must notice"""
+    __tablename__ = 'change_counters'
+    
+    name = db.Column(db.String(50), primary_key=True)  # e.g. 'feedback': rows updated or deleted
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class IdempotencyKey(db.Model):
+    """A user's Idempotency-Key and the response of the request first sent with it"""
+    __tablename__ = 'idempotency_keys'
+    
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    key = db.Column(db.String(255), primary_key=True)
+    endpoint = db.Column(db.String(100), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of the request, see request_fingerprint
+    status = db.Column(db.Integer)  # None while the first request is running
+    response = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class FeedbackArchive(db.Model):
+    """A file of feedback rows moved out of the feedback table, all from one semester"""
+    __tablename__ = 'feedback_archives'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    semester = db.Column(db.String(7), nullable=False, index=True)  # start month, e.g. '2025-07'
+    file_name = db.Column(db.String(200), unique=True, nullable=False)  # in ARCHIVE_DIR
+    row_count = db.Column(db.Integer, nullable=False)
+    file_bytes = db.Column(db.BigInteger, nullable=False)
+    oldest = db.Column(db.DateTime, nullable=False)  # timestamps of the rows it holds
+    newest = db.Column(db.DateTime, nullable=False, index=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ArchivedFeedbackStat(db.Model):
+    """Per-day counts of archived feedback in the groups of feedback_rollup, so analytics don't open archives"""
+    __tablename__ = 'archived_feedback_stats'
+    __table_args__ = {'sqlite_with_rowid': False}
+    
+    day = db.Column(db.Integer, primary_key=True, autoincrement=False)  # date.toordinal()
+    instructor_id = db.Column(db.String(100), primary_key=True)  # '' when the feedback has no value, like the rest
+    course_id = db.Column(db.String(100), primary_key=True)
+    class_name = db.Column(db.String(100), primary_key=True)
+    feedback_type = db.Column(db.String(20), primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    sentiment = db.Column(db.String(20), primary_key=True)
+    suggestion_ids = db.Column(db.String(64), primary_key=True)
+    suggestions_text = db.Column(db.Text, primary_key=True)
+    original = db.Column(db.Boolean, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_count = db.Column(db.Integer, nullable=False, default=0)
+    urgent = db.Column(db.Integer, nullable=False, default=0)
+
+class Suggestion(db.Model):
+    __tablename__ = 'suggestions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.String(255), unique=True, nullable=False)
+
+def load_suggestion_catalog():
+    """Refresh the in-process catalog cache from the suggestions table"""
+    # Own connection, so a pending feedback batch in db.session is not autoflushed
+    with db.engine.connect() as conn:
+        suggestion_catalog.load(conn.execute(db.select(Suggestion.id, Suggestion.text)).all())
+
+def intern_suggestions(texts):
+    """Packed catalog ids for texts, adding unseen texts to the catalog"""
+    if suggestion_catalog.missing(texts):
+        load_suggestion_catalog()
+        for text in suggestion_catalog.missing(texts):
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(db.insert(Suggestion).values(text=text))
+            except IntegrityError:
+                pass  # Added by another worker in the meantime
+        load_suggestion_catalog()
+    return suggestion_catalog.pack(texts)
+
+def expand_suggestions(packed):
+    """Suggestion texts for a packed id string"""
+    if suggestion_catalog.unknown_ids(packed):
+        load_suggestion_catalog()
+    return suggestion_catalog.expand(packed)
+
+def migrate_legacy_suggestions(batch_size=1000):
+    """Replace free-text suggestions on older rows with catalog ids"""
+    converted = 0
+    while True:
+        feedbacks = Feedback.query.filter(
+            Feedback.suggestion_ids.is_(None), Feedback.suggestions_text.isnot(None)
+        ).limit(batch_size).all()
+        if not feedbacks:
+            return converted
+        for feedback in feedbacks:
+            texts = [text.strip() for text in feedback.suggestions_text.split('; ')
+                     if text.strip() and not text.strip().startswith(suggestion_generator.placeholder_prefixes)]
+            feedback.suggestion_ids = intern_suggestions(texts)
+            feedback.suggestions_text = None
+        bump_change_counter('feedback')
+        db.session.commit()
+        expire_hot_cache()
+        converted += len(feedbacks)
+
 # Authentication decorators
 def login_required(f):
     @wraps(f)
@@ -123,6 +500,58 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def read_only(f):
+    """
+    Run the route's queries on the read engine (READ_DATABASE_URL), unless
+    the user wrote within READ_YOUR_WRITES_SECONDS and a replica may still lag
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if read_engine is not None and not wrote_recently(session, app.config['READ_YOUR_WRITES_SECONDS']):
+            use_read_engine(read_engine)
+        return f(*args, **kwargs)
+    return decorated_function
+
+@app.after_request
+def remember_writes(response):
+    # Read-your-writes: successful changes pin the user's reads to the primary for a while
+    if read_engine is not None and request.method in ('POST', 'PUT', 'PATCH', 'DELETE') \
+            and response.status_code < 400 and 'user_id' in session:
+        record_write(session)
+    return response
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+@app.before_request
+def start_profile():
+    """
+    Profile the request when an admin asks with the X-Profile header or a
+    profile query parameter, and otherwise for the slow log when
+    PROFILE_SLOW_MS is set
+    """
+    trigger = 'slow' if app.config['PROFILE_SLOW_MS'] > 0 else None
+    if (request.headers.get(PROFILE_HEADER) or request.args.get('profile')) and 'user_id' in session:
+        user = User.query.get(session['user_id'])
+        if user and user.role == 'admin':
+            trigger = 'requested'
+    if trigger:
+        g.profile = profiler.start(request.method, request.full_path.rstrip('?'), trigger)
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None and profiler.stop(profile, response.status_code):
+        response.headers[PROFILE_ID_HEADER] = profile.id
+    return response
+
+@app.teardown_request
+def drop_profile(exc):
+    # Requests that raised skip after_request
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.stop(profile, 500)
+
 def faculty_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -134,12 +563,199 @@ def faculty_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_PURGE_SECONDS = 60
+idempotency_purged_at = 0.0
+
+def request_fingerprint(method, path, parts):
+    """sha256 hex digest of a request's method, path and body parts (bytes)"""
+    digest = hashlib.sha256(f"{method} {path}".encode('utf-8'))
+    for part in parts:
+        digest.update(len(part).to_bytes(8, 'big'))
+        digest.update(part)
+    return digest.hexdigest()
+
+def flask_request_parts():
+    # Multipart boundaries differ between attempts, so uploads are compared by fields and file contents
+    if not request.files:
+        return [request.get_data()]
+    parts = []
+    for name, value in sorted(request.form.items(multi=True)):
+        parts += [name.encode('utf-8'), value.encode('utf-8')]
+    for name, file in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+        parts += [name.encode('utf-8'), (file.filename or '').encode('utf-8'), file.stream.read()]
+        file.stream.seek(0)
+    return parts
+
+def purge_idempotency_keys(now):
+    """Delete expired keys, at most once every IDEMPOTENCY_PURGE_SECONDS per worker"""
+    global idempotency_purged_at
+    if time.monotonic() - idempotency_purged_at < IDEMPOTENCY_PURGE_SECONDS:
+        return
+    idempotency_purged_at = time.monotonic()
+    with db.engine.begin() as conn:
+        conn.execute(db.delete(IdempotencyKey).where(
+            IdempotencyKey.created_at < now - timedelta(hours=app.config['IDEMPOTENCY_KEY_HOURS'])
+        ))
+
+def claim_idempotency_key(user_id, key, endpoint, fingerprint):
+    """
+    Claim key for a request about to run, committed at once so concurrent
+    retries see it. Returns None when the request should run, otherwise the
+    (status, body, headers) to answer with: the stored response of the
+    request it repeats, or an error when that request is still running or
+    the key was used for a different request. Expired keys, and keys whose
+    first request never finished within IDEMPOTENCY_LOCK_SECONDS, are
+    claimed again.
+    """
+    if not key or len(key) > 255:
+        return 400, app.json.dumps({'error': 'Idempotency-Key must be 1 to 255 characters'}), {}
+    now = datetime.utcnow()
+    purge_idempotency_keys(now)
+    expired = now - timedelta(hours=app.config['IDEMPOTENCY_KEY_HOURS'])
+    abandoned = now - timedelta(seconds=app.config['IDEMPOTENCY_LOCK_SECONDS'])
+    values = {'endpoint': endpoint, 'fingerprint': fingerprint, 'status': None, 'response': None, 'created_at': now}
+    insert = (postgresql if db.engine.dialect.name == 'postgresql' else sqlite).insert(IdempotencyKey)
+    with db.engine.begin() as conn:
+        claimed = conn.execute(insert.values(user_id=user_id, key=key, **values).on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_=values,
+            where=(IdempotencyKey.created_at < expired)
+                  | (IdempotencyKey.status.is_(None) & (IdempotencyKey.created_at < abandoned))
+        )).rowcount
+        if claimed:
+            return None
+        stored = conn.execute(
+            db.select(IdempotencyKey.endpoint, IdempotencyKey.fingerprint, IdempotencyKey.status, IdempotencyKey.response)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        ).first()
+    if stored is not None and (stored.endpoint, stored.fingerprint) != (endpoint, fingerprint):
+        return 422, app.json.dumps({'error': 'Idempotency-Key was already used for a different request'}), {}
+    if stored is None or stored.status is None:
+        return 409, app.json.dumps({'error': 'A request with this Idempotency-Key is still being processed'}), {'Retry-After': '1'}
+    return stored.status, stored.response, {'Idempotent-Replayed': 'true'}
+
+def finish_idempotency_key(user_id, key, status, body):
+    """Store the response for retries to replay, or release the key after a server error so a retry runs again"""
+    statement = db.delete(IdempotencyKey) if status >= 500 else \
+        db.update(IdempotencyKey).values(status=status, response=body)
+    with db.engine.begin() as conn:
+        conn.execute(statement.where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key))
+
+def idempotent(f):
+    """
+    Requests sent with an Idempotency-Key header run once per user and key:
+    a retry gets the stored response of the first one instead of running
+    again (see claim_idempotency_key). Goes after login_required.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return f(*args, **kwargs)
+        user_id = session['user_id']
+        fingerprint = request_fingerprint(request.method, request.path, flask_request_parts())
+        answer = claim_idempotency_key(user_id, key, request.path, fingerprint)
+        if answer is not None:
+            status, body, headers = answer
+            return app.response_class(body, status, headers, mimetype='application/json')
+        response = None
+        try:
+            response = app.make_response(f(*args, **kwargs))
+        finally:
+            if response is None:
+                finish_idempotency_key(user_id, key, 500, None)
+            else:
+                finish_idempotency_key(user_id, key, response.status_code, response.get_data())
+        return response
+    return decorated_function
+
+def client_address(remote_addr, access_route):
+    """The client's IP: remote_addr, or the address RATE_LIMIT_PROXY_HOPS proxies put in X-Forwarded-For"""
+    hops = app.config['RATE_LIMIT_PROXY_HOPS']
+    if hops and len(access_route) >= hops:
+        return access_route[-hops]
+    return remote_addr
+
+def rate_limit_wait(limit_class, user_id, remote_addr, access_route, key=None):
+    """
+    Take a token from the bucket of limit_class for key, by default the user
+    (the client IP when not logged in). Seconds to wait when it is empty,
+    else 0. If the limiter fails, requests are let through.
+    """
+    limit = RATE_LIMITS[limit_class]
+    if rate_limiter is None or limit.per_minute <= 0:
+        return 0
+    if key is None:
+        key = f"user:{user_id}" if user_id is not None else f"ip:{client_address(remote_addr, access_route)}"
+    try:
+        return rate_limiter.acquire(limit_class, key, limit)
+    except Exception as e:
+        print(f"Rate limiter error, allowing request: {e}")
+        return 0
+
+RATE_LIMIT_ERROR = 'Too many requests, please try again shortly'
+ANALYSIS_BUSY_ERROR = 'The server is busy analyzing other feedback, please try again shortly'
+SUBMISSION_TIMEOUT_ERROR = 'Saving feedback is taking too long, please try again shortly'
+
+def rate_limit_checks(limit_class):
+    """
+    (limit_class, key) buckets a request takes tokens from. Logins and
+    registrations share a campus NAT or proxy address, so 'auth' is keyed by
+    the submitted username, with a much looser 'auth_ip' bucket per client IP
+    as a backstop against guessing across many usernames.
+    """
+    if limit_class != 'auth':
+        return [(limit_class, None)]
+    checks = [('auth_ip', f"ip:{client_address(request.remote_addr, request.access_route)}")]
+    username = (request.get_json(silent=True) or {}).get('username')
+    if isinstance(username, str) and username.strip():
+        checks.append(('auth', f"username:{username.strip().lower()}"))
+    return checks
+
+def rate_limited(limit_class):
+    """429 with Retry-After once a bucket of rate_limit_checks(limit_class) is used up"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            wait = 0
+            for check_class, key in rate_limit_checks(limit_class):
+                wait = rate_limit_wait(check_class, session.get('user_id'), request.remote_addr,
+                                       request.access_route, key)
+                if wait:
+                    break
+            if wait:
+                return jsonify({'error': RATE_LIMIT_ERROR}), 429, {'Retry-After': str(math.ceil(wait))}
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def analysis_slot(f):
+    """
+    Run the route holding one of ANALYSIS_MAX_CONCURRENT slots, so CPU-heavy
+    analysis can't occupy every thread; 503 with Retry-After when no slot
+    frees up within ANALYSIS_QUEUE_SECONDS
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if analysis_limiter is None:
+            return f(*args, **kwargs)
+        if not analysis_limiter.acquire():
+            analysis_limiter.reject()
+            return jsonify({'error': ANALYSIS_BUSY_ERROR}), 503, {'Retry-After': '1'}
+        try:
+            return f(*args, **kwargs)
+        finally:
+            analysis_limiter.release()
+    return decorated_function
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'message': 'API is running'})
 
 # Authentication Routes
 @app.route('/api/auth/register', methods=['POST'])
+@rate_limited('auth')
 def register():
     try:
         data = request.get_json()
@@ -181,6 +797,7 @@ def register():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/auth/login', methods=['POST'])
+@rate_limited('auth')
 def login():
     try:
         data = request.get_json()
@@ -225,83 +842,82 @@ def get_current_user():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def submission_fields(data, user):
+    """
+    Feedback column values for a submission request body; raises ValueError
+    with the message for the client when the body is invalid
+    """
+    if not data or 'feedback_text' not in data:
+        raise ValueError('Feedback text is required')
+    
+    # Get student_id from session if user is logged in as student
+    if user and user.role == 'student' and user.student_id:
+        student_id = user.student_id
+    else:
+        student_id = data.get('student_id', 'anonymous') or 'anonymous'
+    
+    feedback_type = data.get('feedback_type', 'campus')
+    if feedback_type not in ['campus', 'faculty']:
+        feedback_type = 'campus'
+    instructor_id = data.get('instructor_id', '') or ''
+    if feedback_type == 'faculty' and not instructor_id:
+        raise ValueError('Please select a faculty member for faculty feedback')
+    
+    return {
+        'student_id': student_id,
+        'class_name': data.get('class_name', '') or '',
+        'course_id': data.get('course_id', 'general') or 'general',
+        'instructor_id': str(instructor_id) if instructor_id else '',
+        'feedback_type': feedback_type,
+        'feedback_text': data['feedback_text']
+    }
+
 @app.route('/api/feedback', methods=['POST'])
 @login_required
+@rate_limited('submit')
+@idempotent
+@analysis_slot
 def submit_feedback():
     try:
-        data = request.get_json()
-        
-        if not data or 'feedback_text' not in data:
-            return jsonify({'error': 'Feedback text is required'}), 400
-        
-        # Get student_id from session if user is logged in as student
         user = User.query.get(session['user_id'])
-        if user and user.role == 'student' and user.student_id:
-            student_id = user.student_id
-        else:
-            student_id = data.get('student_id', 'anonymous') or 'anonymous'
-        
-        feedback_text = data['feedback_text']
-        feedback_type = data.get('feedback_type', 'campus')
-        if feedback_type not in ['campus', 'faculty']:
-            feedback_type = 'campus'
-        class_name = data.get('class_name', '') or ''
-        course_id = data.get('course_id', 'general') or 'general'
-        instructor_id = data.get('instructor_id', '') or ''
-        if feedback_type == 'faculty' and not instructor_id:
-            return jsonify({'error': 'Please select a faculty member for faculty feedback'}), 400
-        
-        # Process feedback using NLP
         try:
-            category = nlp_engine.categorize_feedback(feedback_text)
-        except Exception as e:
-            print(f"Error in NLP categorization: {e}")
-            category = 'general'
+            fields = submission_fields(request.get_json(), user)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Analyze sentiment
-        try:
-            sentiment_result = sentiment_analyzer.analyze(feedback_text)
-            sentiment = sentiment_result['sentiment']
-            sentiment_score = sentiment_result['score']
-        except Exception as e:
-            print(f"Error in sentiment analysis: {e}")
-            sentiment = 'neutral'
-            sentiment_score = 0.0
-        
-        # Generate suggestions
-        try:
-            suggestions = suggestion_generator.generate_suggestions(feedback_text, category, sentiment)
-        except Exception as e:
-            print(f"Error in suggestion generation: {e}")
-            suggestions = "No suggestions available at this time."
-        
-        # Check for urgent issues
-        try:
-            is_urgent = alert_system.check_urgent(feedback_text)
-        except Exception as e:
-            print(f"Error in alert system: {e}")
-            is_urgent = False
+        # Process feedback using NLP
+        analysis = feedback_analyzer.analyze(fields['feedback_text'])
         
         # Create feedback record
-        feedback = Feedback(
-            student_id=student_id,
-            class_name=class_name,
-            course_id=course_id,
-            instructor_id=str(instructor_id) if instructor_id else '',
-            feedback_type=feedback_type,
-            feedback_text=feedback_text,
-            category=category,
-            sentiment=sentiment,
-            sentiment_score=sentiment_score,
-            suggestions=suggestions,
-            is_urgent=is_urgent
-        )
+        feedback = Feedback(**fields)
+        apply_analysis(feedback, analysis)
         
-        db.session.add(feedback)
-        db.session.commit()
+        if submission_queue is not None:
+            try:
+                future = submission_queue.submit(feedback)
+                original = future.result(timeout=app.config['GROUP_COMMIT_TIMEOUT_SECONDS'])
+            except QueueFull:
+                return jsonify({'error': 'Too many submissions in progress, please try again shortly'}), 503, {'Retry-After': '1'}
+            except TimeoutError:
+                future.cancel()
+                return jsonify({'error': SUBMISSION_TIMEOUT_ERROR}), 503, {'Retry-After': '5'}
+        else:
+            original = add_feedback(feedback)
+        if original is not None and app.config['DEDUP_MODE'] == 'collapse':
+            return jsonify({
+                'success': True,
+                'duplicate': True,
+                'feedback': original.to_dict(),
+                'message': 'Similar feedback was already submitted'
+            }), 200
+        if submission_queue is None:
+            record_terms([feedback])
+            record_stats([feedback])
+            db.session.commit()
+        observe_feedback([feedback])
         
-        # Send alert if urgent
-        if is_urgent:
+        # Send alert if urgent (once per original, not for duplicates)
+        if feedback.is_urgent and original is None:
             try:
                 alert_system.send_alert(feedback)
             except Exception as e:
@@ -309,6 +925,7 @@ def submit_feedback():
         
         return jsonify({
             'success': True,
+            'duplicate': original is not None,
             'feedback': feedback.to_dict(),
             'message': 'Feedback submitted successfully'
         }), 201
@@ -326,8 +943,8 @@ def submit_feedback():
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-def process_feedback_row(row):
-    """Process a single row from CSV/Excel and create feedback entry"""
+def parse_feedback_row(row):
+    """Extract feedback fields from a single CSV/Excel row, or None if it has no text"""
     try:
         # Try to extract data from different possible column names (case-insensitive)
         feedback_text = None
@@ -377,69 +994,350 @@ def process_feedback_row(row):
                 class_name = str(row_dict[key]).strip()
                 break
         
-        # Process feedback using NLP
-        try:
-            category = nlp_engine.categorize_feedback(feedback_text)
-        except Exception as e:
-            print(f"Error in NLP categorization: {e}")
-            category = 'general'
-        
-        # Analyze sentiment
-        try:
-            sentiment_result = sentiment_analyzer.analyze(feedback_text)
-            sentiment = sentiment_result['sentiment']
-            sentiment_score = sentiment_result['score']
-        except Exception as e:
-            print(f"Error in sentiment analysis: {e}")
-            sentiment = 'neutral'
-            sentiment_score = 0.0
-        
-        # Generate suggestions
-        try:
-            suggestions = suggestion_generator.generate_suggestions(feedback_text, category, sentiment)
-        except Exception as e:
-            print(f"Error in suggestion generation: {e}")
-            suggestions = "No suggestions available at this time."
-        
-        # Check for urgent issues
-        try:
-            is_urgent = alert_system.check_urgent(feedback_text)
-        except Exception as e:
-            print(f"Error in alert system: {e}")
-            is_urgent = False
-        
-        # Create feedback record
-        feedback = Feedback(
-            student_id=student_id,
-            class_name=class_name,
-            course_id=course_id,
-            instructor_id=str(instructor_id),
-            feedback_type=feedback_type,
-            feedback_text=feedback_text,
-            category=category,
-            sentiment=sentiment,
-            sentiment_score=sentiment_score,
-            suggestions=suggestions,
-            is_urgent=is_urgent
-        )
-        
-        db.session.add(feedback)
-        
-        # Send alert if urgent
-        if is_urgent:
-            try:
-                alert_system.send_alert(feedback)
-            except Exception as e:
-                print(f"Error sending alert: {e}")
-        
-        return feedback
+        return {
+            'student_id': student_id,
+            'class_name': class_name,
+            'course_id': course_id,
+            'instructor_id': str(instructor_id),
+            'feedback_type': feedback_type,
+            'feedback_text': feedback_text
+        }
         
     except Exception as e:
         print(f"Error processing row: {e}")
         return None
 
+def apply_analysis(feedback, analysis):
+    """
+    Copy FeedbackAnalyzer results onto a feedback row. If the suggestions
+    can't be added to the catalog, the row keeps its old suggestions and
+    analyzer version, so a later re-analysis fills them in.
+    """
+    feedback.category = feedback.category_label or analysis['category']
+    feedback.sentiment = analysis['sentiment']
+    feedback.sentiment_score = analysis['sentiment_score']
+    feedback.is_urgent = analysis['is_urgent']
+    try:
+        feedback.suggestion_ids = intern_suggestions(analysis['suggestions'])
+    except Exception as e:
+        print(f"Error in suggestion generation: {e}")
+        return
+    feedback.analyzer_version = analysis.get('analyzer_version') or feedback_analyzer.version
+
+def analyze_texts(texts):
+    """Analyze a batch of texts, in a process pool when ANALYSIS_WORKERS > 1"""
+    workers = app.config['ANALYSIS_WORKERS']
+    pool = feedback_analyzer.create_pool(workers) if workers > 1 else None
+    if pool is None:
+        return feedback_analyzer.analyze_batch(texts)
+    with pool:
+        return feedback_analyzer.analyze_batch(texts, pool=pool)
+
+def find_duplicate(feedback, signature, keys, db_session=None):
+    """Earlier feedback in the same dedup scope and time window with near-identical text"""
+    db_session = db_session or db.session
+    since = datetime.utcnow() - timedelta(hours=app.config['DEDUP_WINDOW_HOURS'])
+    query = db_session.query(Feedback).join(FeedbackLSH, FeedbackLSH.feedback_id == Feedback.id).filter(
+        FeedbackLSH.bucket.in_(keys),
+        Feedback.course_id == feedback.course_id,
+        Feedback.timestamp >= since
+    )
+    if app.config['DEDUP_SCOPE'] == 'student_course':
+        query = query.filter(Feedback.student_id == feedback.student_id)
+    
+    candidates = [(candidate, duplicate_detector.unpack(candidate.minhash)) for candidate in query.distinct().all()]
+    original, _ = duplicate_detector.best_match(signature, candidates)
+    return original
+
+def add_feedback(feedback, db_session=None):
+    """
+    Add a new feedback row to the session (db.session by default) with
+    near-duplicate detection. Returns the earlier feedback it duplicates, or
+    None. Duplicates are stored with duplicate_of set ('flag' mode) or not
+    stored ('collapse').
+    """
+    db_session = db_session or db.session
+    if not app.config['DEDUP_ENABLED']:
+        db_session.add(feedback)
+        return None
+    
+    signature = duplicate_detector.signature(feedback.feedback_text)
+    keys = duplicate_detector.band_keys(signature)
+    original = find_duplicate(feedback, signature, keys, db_session)
+    if original is not None:
+        if app.config['DEDUP_MODE'] != 'collapse':
+            feedback.duplicate_of = original.id
+            db_session.add(feedback)
+        return original
+    
+    # Only originals are indexed, so duplicates always point at the first submission
+    feedback.minhash = duplicate_detector.pack(signature)
+    db_session.add(feedback)
+    db_session.flush()
+    db_session.add_all([FeedbackLSH(bucket=key, feedback_id=feedback.id) for key in set(keys)])
+    return None
+
+def index_original(feedback, db_session=None):
+    """Give a stored feedback row that has become an original its MinHash signature and LSH buckets"""
+    db_session = db_session or db.session
+    signature = duplicate_detector.signature(feedback.feedback_text)
+    feedback.minhash = duplicate_detector.pack(signature)
+    db_session.add_all([FeedbackLSH(bucket=key, feedback_id=feedback.id)
+                        for key in set(duplicate_detector.band_keys(signature))])
+
+def record_terms(feedbacks, sign=1, db_session=None):
+    """
+    Add the terms of feedback rows to the term_stats rollup, in the current
+    transaction of db_session (sign=-1 removes them again). Duplicates are
+    not counted.
+    """
+    db_session = db_session or db.session
+    counts = count_terms(
+        [(f.timestamp or datetime.utcnow(), f.course_id, f.feedback_text) for f in feedbacks if f.duplicate_of is None],
+        nlp_engine.extract_terms
+    )
+    if not counts:
+        return
+
+    insert = (postgresql if db_session.get_bind().dialect.name == 'postgresql' else sqlite).insert(TermStat)
+    statement = insert.on_conflict_do_update(
+        index_elements=[TermStat.day, TermStat.course_id, TermStat.term],
+        set_={'count': TermStat.count + insert.excluded['count']}
+    )
+    db_session.execute(statement, [
+        {'day': day, 'course_id': course_id, 'term': term, 'count': count * sign}
+        for (day, course_id, term), count in counts.items()
+    ])
+
+def record_stats(feedbacks, sign=1, db_session=None):
+    """
+    Add feedback rows to the cohort_stats rollup in the current transaction
+    of db_session (sign=-1 removes them again). Duplicates are not counted.
+    """
+    db_session = db_session or db.session
+    stats = count_stats(
+        (f.timestamp or datetime.utcnow(), {dimension: getattr(f, dimension) for dimension in DIMENSIONS},
+         f.sentiment_score, f.is_urgent)
+        for f in feedbacks if f.duplicate_of is None
+    )
+    if not stats:
+        return
+
+    insert = (postgresql if db_session.get_bind().dialect.name == 'postgresql' else sqlite).insert(CohortStat)
+    statement = insert.on_conflict_do_update(
+        index_elements=[CohortStat.dimension, CohortStat.value, CohortStat.score_bin, CohortStat.day],
+        set_={column: getattr(CohortStat, column) + insert.excluded[column]
+              for column in ('count', 'score_sum', 'score_sq_sum', 'urgent')}
+    )
+    db_session.execute(statement, [
+        {'dimension': dimension, 'value': value, 'score_bin': bin_, 'day': day,
+         'count': count * sign, 'score_sum': score_sum * sign, 'score_sq_sum': score_sq_sum * sign,
+         'urgent': urgent * sign}
+        for (dimension, value, bin_, day), (count, score_sum, score_sq_sum, urgent) in stats.items()
+    ])
+
+def bump_change_counter(name, db_session=None):
+    """Increment change counter name in the current transaction of db_session"""
+    db_session = db_session or db.session
+    insert = (postgresql if db_session.get_bind().dialect.name == 'postgresql' else sqlite).insert(ChangeCounter)
+    db_session.execute(insert.values(name=name, value=1).on_conflict_do_update(
+        index_elements=[ChangeCounter.name],
+        set_={'value': ChangeCounter.value + 1}
+    ))
+
+def observe_feedback(feedbacks):
+    """
+    Feed committed feedback rows to the hot cache, the live statistics and
+    the spike detector (the last two skip duplicates), storing any spike
+    alerts raised
+    """
+    if hot_cache is not None:
+        hot_cache.add([tuple(getattr(f, column) for column in HOT_CACHE_COLUMNS) for f in feedbacks])
+    alerts = []
+    now = time.time()
+    for f in feedbacks:
+        if f.duplicate_of is not None:
+            continue
+        if stream_stats is not None:
+            stream_stats.add(scope_keys(f.course_id, f.class_name, f.instructor_id), f.sentiment_score,
+                             None if f.student_id == 'anonymous' else f.student_id)
+        if spike_detector is not None:
+            scopes = [f"{kind}:{value}" for kind, value in (('course', f.course_id), ('class', f.class_name)) if value]
+            alerts.extend(spike_detector.add(scopes, f.sentiment_score, now))
+    if alerts:
+        store_spike_alerts(alerts)
+
+def store_spike_alerts(alerts):
+    """Save spike alerts and send the ones no other worker has saved for the same window"""
+    with Session(db.engine) as db_session:
+        insert = (postgresql if db_session.get_bind().dialect.name == 'postgresql' else sqlite).insert(SpikeAlert)
+        stored = []
+        for alert in alerts:
+            row = {
+                'scope': alert['scope'],
+                'scope_value': alert['scope_value'],
+                'metric': alert['metric'],
+                'window_start': datetime.utcfromtimestamp(alert['window_start']),
+                'window_minutes': alert['window_seconds'] / 60,
+                'observed': alert['observed'],
+                'baseline': alert['baseline'],
+                'z_score': alert['z_score'],
+                'feedback_count': alert['feedback_count'],
+                'created_at': datetime.utcnow()
+            }
+            if db_session.execute(insert.values(**row).on_conflict_do_nothing()).rowcount:
+                stored.append(row)
+        db_session.commit()
+    for row in stored:
+        try:
+            alert_system.send_spike_alert(row)
+        except Exception as e:
+            print(f"Error sending spike alert: {e}")
+
+# Ids re-read on every sync: concurrent transactions may commit out of id order
+HOT_CACHE_ID_OVERLAP = 256
+
+hot_cache_lock = threading.Lock()
+hot_cache_generation = None  # 'feedback' change counter the cache was loaded at
+hot_cache_synced_id = 0  # highest id read from the database
+hot_cache_checked_at = 0.0
+
+def sync_hot_cache():
+    """
+    Bring the hot cache in line with the database, at most every
+    HOT_CACHE_CHECK_SECONDS: reload it when the 'feedback' change counter
+    moved (rows were updated or deleted, maybe by another worker), else read
+    rows inserted since the last sync. Rows this worker stores are added by
+    observe_feedback right away, and rows it updates or deletes expire the
+    cache (expire_hot_cache). Returns False when the cache is disabled.
+    """
+    global hot_cache_generation, hot_cache_synced_id, hot_cache_checked_at
+    if hot_cache is None:
+        return False
+    with hot_cache_lock:
+        now = time.monotonic()
+        if hot_cache_generation is not None and now - hot_cache_checked_at < app.config['HOT_CACHE_CHECK_SECONDS']:
+            return True
+        columns = [getattr(Feedback, column) for column in HOT_CACHE_COLUMNS]
+        with db.engine.connect() as conn:
+            generation = conn.execute(
+                db.select(ChangeCounter.value).where(ChangeCounter.name == 'feedback')
+            ).scalar() or 0
+            low_id = max(hot_cache_synced_id - HOT_CACHE_ID_OVERLAP, hot_cache.oldest_id())
+            newer = 0
+            if generation == hot_cache_generation:
+                newer = conn.execute(db.select(db.func.count(Feedback.id)).where(Feedback.id > low_id)).scalar()
+            if generation != hot_cache_generation or newer > hot_cache.capacity:
+                rows = conn.execute(
+                    db.select(*columns).order_by(Feedback.id.desc()).limit(hot_cache.capacity)
+                ).all()[::-1]
+                newest_left_out = None
+                if len(rows) == hot_cache.capacity:
+                    newest_left_out = conn.execute(
+                        db.select(db.func.max(Feedback.timestamp)).where(Feedback.id < rows[0].id)
+                    ).scalar()
+                hot_cache.load(rows, newest_left_out)
+                hot_cache_generation = generation
+            elif newer != hot_cache.held_ids(low_id):
+                rows = conn.execute(db.select(*columns).where(Feedback.id > low_id).order_by(Feedback.id)).all()
+                hot_cache.add(rows)
+            else:
+                rows = []
+        if rows:
+            hot_cache_synced_id = max(hot_cache_synced_id, rows[-1].id)
+        hot_cache_checked_at = now
+        return True
+
+def expire_hot_cache():
+    """Reload the hot cache on the next read, once this worker has committed updates or deletes of feedback rows"""
+    global hot_cache_generation
+    with hot_cache_lock:
+        hot_cache_generation = None
+
+def list_window(args):
+    """Start of the optional `days` window (None for all time) and the optional `limit` of feedback list args"""
+    days = args.get('days', type=float)
+    limit = args.get('limit', type=int)
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    return since, min(max(limit, 1), 10000) if limit else None
+
+def list_includes_archives(args):
+    """
+    Whether a feedback list reads archived rows: always for a page with a
+    limit, otherwise only with include_archived=true, since a full list
+    would decode every archive file on every request
+    """
+    return bool(args.get('limit', type=int)) or args.get('include_archived', 'false').lower() == 'true'
+
+def list_cursor(feedback):
+    """`before` cursor for the rows after feedback in a newest-first list"""
+    return f"{feedback.timestamp.isoformat()}_{feedback.id}"
+
+def list_before(args):
+    """(timestamp, id) of the `before` cursor of feedback list args, or None"""
+    cursor = args.get('before')
+    if not cursor:
+        return None
+    timestamp, _, feedback_id = cursor.rpartition('_')
+    try:
+        return datetime.fromisoformat(timestamp), int(feedback_id)
+    except ValueError:
+        raise ValueError('Invalid before cursor')
+
+def before_condition(before):
+    """SQL condition for rows after the (timestamp, id) before cursor, newest first"""
+    timestamp, feedback_id = before
+    return db.or_(Feedback.timestamp < timestamp, db.and_(Feedback.timestamp == timestamp, Feedback.id < feedback_id))
+
+def cached_feedback_list(user, args):
+    """Rows of feedback_list_statement from the hot cache, or None when the database has to answer"""
+    if not sync_hot_cache():
+        return None
+    since, limit = list_window(args)
+    return hot_cache.select(scope_filters(user, args), since, limit, list_before(args))
+
+def cached_feedback_rollup(user, args):
+    """feedback_rollup rows for analytics_summary from the hot cache, or None when the database has to answer"""
+    if not sync_hot_cache():
+        return None
+    since, _ = list_window(args)
+    return hot_cache.rollup(scope_filters(user, args), since)
+
+def commit_submissions(feedbacks):
+    """
+    Store analyzed submissions in one transaction for the group commit
+    writer. Returns the original each one duplicates (or None); rows stay
+    readable after the session is closed. On failure the rows are reset
+    for the writer to retry them.
+    """
+    with app.app_context(), Session(db.engine, expire_on_commit=False) as db_session:
+        try:
+            originals = [add_feedback(feedback, db_session) for feedback in feedbacks]
+            collapse = app.config['DEDUP_MODE'] == 'collapse'
+            stored = [f for f, original in zip(feedbacks, originals) if original is None or not collapse]
+            record_terms(stored, db_session=db_session)
+            record_stats(stored, db_session=db_session)
+            db_session.commit()
+        except Exception:
+            db_session.rollback()
+            # What add_feedback and the flush set, which the rollback leaves on the rows
+            for feedback in feedbacks:
+                feedback.id = feedback.duplicate_of = feedback.minhash = None
+            raise
+        return originals
+
+submission_queue = GroupCommitQueue(
+    commit_submissions,
+    max_batch=app.config['GROUP_COMMIT_MAX_ROWS'],
+    max_wait=app.config['GROUP_COMMIT_MAX_WAIT_MS'] / 1000,
+    max_pending=app.config['GROUP_COMMIT_QUEUE_SIZE']
+) if app.config['GROUP_COMMIT'] else None
+
 @app.route('/api/feedback/upload', methods=['POST'])
 @admin_required
+@rate_limited('upload')
+@idempotent
+@analysis_slot
 def upload_feedback_file():
     try:
         if 'file' not in request.files:
@@ -470,19 +1368,38 @@ def upload_feedback_file():
             os.remove(filepath)
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
         
-        # Process each row
-        processed_count = 0
+        # Parse each row, then analyze all texts as one batch
+        rows = []
         failed_count = 0
-        feedbacks = []
         
         for index, row in df.iterrows():
-            feedback = process_feedback_row(row)
-            if feedback:
-                processed_count += 1
-                feedbacks.append(feedback)
+            fields = parse_feedback_row(row)
+            if fields:
+                rows.append(fields)
             else:
                 failed_count += 1
         
+        analyses = analyze_texts([fields['feedback_text'] for fields in rows])
+        
+        # Analysis results (and any new suggestion catalog entries) first, then insert
+        pending = []
+        for fields, analysis in zip(rows, analyses):
+            feedback = Feedback(**fields)
+            apply_analysis(feedback, analysis)
+            pending.append(feedback)
+        
+        feedbacks = []
+        duplicate_count = 0
+        for feedback in pending:
+            if add_feedback(feedback) is not None:
+                duplicate_count += 1
+                if app.config['DEDUP_MODE'] == 'collapse':
+                    continue
+            feedbacks.append(feedback)
+        processed_count = len(feedbacks)
+        record_terms(feedbacks)
+        record_stats(feedbacks)
+        
         # Commit all feedback entries
         try:
             db.session.commit()
@@ -490,6 +1407,15 @@ def upload_feedback_file():
             db.session.rollback()
             os.remove(filepath)
             return jsonify({'error': f'Error saving feedback to database: {str(e)}'}), 500
+        observe_feedback(feedbacks)
+        
+        # Send alerts once the rows have ids
+        for feedback in feedbacks:
+            if feedback.is_urgent and feedback.duplicate_of is None:
+                try:
+                    alert_system.send_alert(feedback)
+                except Exception as e:
+                    print(f"Error sending alert: {e}")
         
         # Clean up uploaded file
         try:
@@ -502,6 +1428,7 @@ def upload_feedback_file():
             'message': f'File processed successfully. {processed_count} feedback entries added.',
             'processed': processed_count,
             'failed': failed_count,
+            'duplicates': duplicate_count,
             'total_rows': len(df),
             'feedbacks': [f.to_dict() for f in feedbacks]
         }), 201
@@ -598,40 +1525,416 @@ def delete_faculty(faculty_user_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def scope_filters(user, args):
+    """
+    {column: value} equality filters for the feedback user may see, narrowed
+    by the instructor_id, course_id, class_name and feedback_type request args
+    """
+    # Faculty sees only their feedback
+    if user.role == 'faculty':
+        filters = {'instructor_id': str(user.id)}
+        if args.get('class_name'):
+            filters['class_name'] = args['class_name']
+        return filters
+    # Admin sees all
+    return {field: args[field] for field in ('instructor_id', 'course_id', 'class_name', 'feedback_type') if args.get(field)}
+
+def feedback_scope(user, args):
+    """Filter conditions for the feedback user may see (scope_filters as SQL)"""
+    return [getattr(Feedback, column) == value for column, value in scope_filters(user, args).items()]
+
+def feedback_list_statement(user, args):
+    """SELECT for the feedback list visible to user, filtered by request args (and the days, limit and before args)"""
+    since, limit = list_window(args)
+    before = list_before(args)
+    statement = db.select(Feedback).where(*feedback_scope(user, args))
+    if since is not None:
+        statement = statement.where(Feedback.timestamp >= since)
+    if before is not None:
+        statement = statement.where(before_condition(before))
+    return statement.order_by(Feedback.timestamp.desc(), Feedback.id.desc()).limit(limit)
+
+def feedback_rollup(conditions, trend_days=7):
+    """
+    One grouped scan of the feedback matching conditions, per (original or
+    duplicate, category, sentiment, suggestions, day): row count, sentiment
+    score sum and count, urgent count and the rows in the current and
+    previous suggestion trend windows. Analytics and suggestion summaries
+    are both computed from these rows.
+    """
+    recent_start = datetime.utcnow() - timedelta(days=trend_days)
+    previous_start = recent_start - timedelta(days=trend_days)
+    original = Feedback.duplicate_of.is_(None)
+    day = db.func.date(Feedback.timestamp)
+    return db.session.query(
+        original.label('original'),
+        Feedback.category,
+        Feedback.sentiment,
+        Feedback.suggestion_ids,
+        Feedback.suggestions_text,
+        day.label('day'),
+        db.func.count(Feedback.id).label('count'),
+        db.func.sum(Feedback.sentiment_score).label('score_sum'),
+        db.func.count(Feedback.sentiment_score).label('score_count'),
+        db.func.sum(db.case((Feedback.is_urgent, 1), else_=0)).label('urgent'),
+        db.func.sum(db.case((Feedback.timestamp >= recent_start, 1), else_=0)).label('recent'),
+        db.func.sum(db.case((db.and_(Feedback.timestamp >= previous_start, Feedback.timestamp < recent_start), 1), else_=0)).label('previous')
+    ).filter(*conditions).group_by(
+        original, Feedback.category, Feedback.sentiment, Feedback.suggestion_ids, Feedback.suggestions_text, day
+    ).all()
+
+def analytics_summary(rollup):
+    """Distributions, average score, urgent count and 30-day trend from feedback_rollup rows"""
+    # Near-duplicates would skew the distributions
+    rows = [row for row in rollup if row.original]
+    total_feedbacks = sum(row.count for row in rows)
+    if total_feedbacks == 0:
+        return {
+            'total_feedbacks': 0,
+            'sentiment_distribution': {},
+            'category_distribution': {},
+            'average_sentiment_score': 0,
+            'urgent_count': 0,
+            'trends': []
+        }
+    
+    sentiment_counts = {}
+    category_counts = {}
+    total_sentiment_score = 0
+    sentiment_score_count = 0
+    urgent_count = 0
+    days = {}
+    
+    for row in rows:
+        sentiment_counts[row.sentiment] = sentiment_counts.get(row.sentiment, 0) + row.count
+        category_counts[row.category] = category_counts.get(row.category, 0) + row.count
+        total_sentiment_score += row.score_sum or 0
+        sentiment_score_count += row.score_count
+        urgent_count += row.urgent or 0
+        if row.day:
+            day = days.setdefault(str(row.day)[:10], [0, 0, 0])
+            day[0] += row.count
+            day[1] += row.score_sum or 0
+            day[2] += row.score_count
+    
+    avg_sentiment_score = total_sentiment_score / sentiment_score_count if sentiment_score_count > 0 else 0
+    
+    # Trends (last 30 days)
+    trends = []
+    for i in range(30):
+        date = (datetime.utcnow() - timedelta(days=30-i)).strftime('%Y-%m-%d')
+        count, score_sum, score_count = days.get(date, (0, 0, 0))
+        trends.append({
+            'date': date,
+            'count': count,
+            'avg_sentiment': score_sum / score_count if score_count else 0
+        })
+    
+    return {
+        'total_feedbacks': total_feedbacks,
+        'sentiment_distribution': sentiment_counts,
+        'category_distribution': category_counts,
+        'average_sentiment_score': round(avg_sentiment_score, 2),
+        'urgent_count': urgent_count,
+        'trends': trends
+    }
+
+def suggestion_groups(rollup):
+    """Rows with stored suggestions merged per (category, sentiment, suggestions), for generate_summary_suggestions"""
+    merged = {}
+    for row in rollup:
+        if not row.original or not (row.suggestion_ids or row.suggestions_text):
+            continue
+        counts = merged.setdefault((row.category, row.sentiment, row.suggestion_ids, row.suggestions_text), [0, 0, 0])
+        counts[0] += row.count
+        counts[1] += row.recent or 0
+        counts[2] += row.previous or 0
+    
+    return [{
+        'category': category,
+        'sentiment': sentiment,
+        'suggestions': '; '.join(expand_suggestions(suggestion_ids)) if suggestion_ids else suggestions_text,
+        'count': count,
+        'recent': recent,
+        'previous': previous
+    } for (category, sentiment, suggestion_ids, suggestions_text), (count, recent, previous) in merged.items()]
+
+# feedback_rollup rows, as produced from the archived_feedback_stats summary
+ArchivedRollupRow = namedtuple('ArchivedRollupRow', 'original category sentiment suggestion_ids suggestions_text day '
+                                                    'count score_sum score_count urgent recent previous')
+
+def archive_file_count():
+    """Archive files in ARCHIVE_DIR, which archive_cache holds one entry each for"""
+    try:
+        return sum(1 for name in os.listdir(app.config['ARCHIVE_DIR']) if name.endswith('.npz'))
+    except FileNotFoundError:
+        return 0
+
+archive_cache = TTLCache(max_age=app.config['ARCHIVE_CACHE_SECONDS'], max_entries=max(archive_file_count(), 4))
+
+def archives_in_window(since=None, before=None):
+    """Archives holding feedback at or after since (all of them for None) and not after the before cursor, newest first"""
+    query = FeedbackArchive.query
+    if since is not None:
+        query = query.filter(FeedbackArchive.newest >= since)
+    if before is not None:
+        query = query.filter(FeedbackArchive.oldest <= before[0])
+    return query.order_by(FeedbackArchive.newest.desc()).all()
+
+def open_archive(archive):
+    """The rows of an archive file, loaded into a HotFeedbackCache for filtering; kept for ARCHIVE_CACHE_SECONDS"""
+    cached = archive_cache.get(archive.file_name)
+    if cached is None:
+        # Files archived since startup get room too, so a scan of them all doesn't evict its own files
+        archive_cache.max_entries = max(archive_cache.max_entries, archive_file_count())
+        rows = read_archive(os.path.join(app.config['ARCHIVE_DIR'], archive.file_name))
+        cached = HotFeedbackCache(max(len(rows), 1))
+        cached.load([tuple(getattr(f, column) for column in HOT_CACHE_COLUMNS) for f in rows])
+        archive_cache.put(archive.file_name, cached)
+    return cached
+
+def with_archives(feedbacks, filters, since=None, limit=None, before=None):
+    """
+    Feedback list rows (newest first, from the feedback table) merged with
+    the archived rows that belong in the same window. Archive files are
+    only opened when the window reaches back into them.
+    """
+    archives = archives_in_window(since, before)
+    if limit is not None and len(feedbacks) >= limit:
+        archives = [a for a in archives if a.newest >= feedbacks[limit - 1].timestamp]
+    if not archives:
+        return feedbacks
+    merged = list(feedbacks)
+    for archive in archives:
+        merged.extend(open_archive(archive).select(filters, since, limit, before))
+    merged.sort(key=lambda f: (f.timestamp, f.id), reverse=True)
+    return merged[:limit] if limit is not None else merged
+
+def archived_rollup(filters, since=None, trend_days=7):
+    """
+    feedback_rollup rows for archived feedback matching filters, from the
+    archived_feedback_stats summary. Windows are applied by whole days.
+    """
+    if not archives_in_window(since):
+        return []
+    recent_start = day_number(datetime.utcnow() - timedelta(days=trend_days))
+    previous_start = recent_start - trend_days
+    query = db.session.query(
+        ArchivedFeedbackStat.original,
+        ArchivedFeedbackStat.category,
+        ArchivedFeedbackStat.sentiment,
+        ArchivedFeedbackStat.suggestion_ids,
+        ArchivedFeedbackStat.suggestions_text,
+        ArchivedFeedbackStat.day,
+        db.func.sum(ArchivedFeedbackStat.count),
+        db.func.sum(ArchivedFeedbackStat.score_sum),
+        db.func.sum(ArchivedFeedbackStat.score_count),
+        db.func.sum(ArchivedFeedbackStat.urgent)
+    ).filter(*[getattr(ArchivedFeedbackStat, column) == value for column, value in filters.items()])
+    if since is not None:
+        query = query.filter(ArchivedFeedbackStat.day >= day_number(since))
+    rows = query.group_by(
+        ArchivedFeedbackStat.original, ArchivedFeedbackStat.category, ArchivedFeedbackStat.sentiment,
+        ArchivedFeedbackStat.suggestion_ids, ArchivedFeedbackStat.suggestions_text, ArchivedFeedbackStat.day
+    ).all()
+    return [ArchivedRollupRow(
+        original, category or None, sentiment or None, suggestion_ids or None, suggestions_text or None,
+        day_date(day).isoformat(), count, score_sum if score_count else None, score_count, urgent,
+        count if day >= recent_start else 0, count if previous_start <= day < recent_start else 0
+    ) for original, category, sentiment, suggestion_ids, suggestions_text, day, count, score_sum, score_count, urgent in rows]
+
 @app.route('/api/feedback', methods=['GET'])
 @login_required
+@read_only
 def get_feedback():
     try:
         user = User.query.get(session['user_id'])
-        instructor_id = request.args.get('instructor_id')
-        course_id = request.args.get('course_id')
-        class_name = request.args.get('class_name')
-        feedback_type = request.args.get('feedback_type')
+        feedbacks = cached_feedback_list(user, request.args)
+        if feedbacks is None:
+            feedbacks = db.session.execute(feedback_list_statement(user, request.args)).scalars().all()
+        since, limit = list_window(request.args)
+        if list_includes_archives(request.args):
+            feedbacks = with_archives(feedbacks, scope_filters(user, request.args), since, limit, list_before(request.args))
+        expand = request.args.get('expand_suggestions', 'true').lower() != 'false'
         
-        query = Feedback.query
+        return jsonify({
+            'success': True,
+            'feedbacks': [feedback_dict(f, expand) for f in feedbacks],
+            'count': len(feedbacks),
+            # A full page may have more rows after it
+            'next_before': list_cursor(feedbacks[-1]) if limit and len(feedbacks) == limit else None
+        }), 200
         
-        # Faculty sees only their feedback
-        if user.role == 'faculty':
-            query = query.filter_by(instructor_id=str(user.id))
-            if class_name:
-                query = query.filter_by(class_name=class_name)
-        # Admin sees all
-        else:
-            if instructor_id:
-                query = query.filter_by(instructor_id=instructor_id)
-            if course_id:
-                query = query.filter_by(course_id=course_id)
-            if class_name:
-                query = query.filter_by(class_name=class_name)
-            if feedback_type:
-                query = query.filter_by(feedback_type=feedback_type)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/dashboard', methods=['GET'])
+@login_required
+@read_only
+def get_dashboard():
+    """
+    Everything a dashboard shows on load in one round trip: the user, the
+    newest page of feedback, analytics and top suggestions. Takes the same
+    filters as /api/feedback; analytics and suggestions share one grouped scan.
+    Further pages come from /api/feedback with limit and before=next_before.
+    """
+    try:
+        user = User.query.get(session['user_id'])
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+        trend_days = min(max(request.args.get('trend_days', 7, type=int), 1), 365)
+        suggestion_limit = min(max(request.args.get('suggestion_limit', 10, type=int), 1), 100)
+        expand = request.args.get('expand_suggestions', 'true').lower() != 'false'
+        
+        conditions = feedback_scope(user, request.args)
+        filters = scope_filters(user, request.args)
+        rollup = feedback_rollup(conditions, trend_days) + archived_rollup(filters, trend_days=trend_days)
+        # One row past the page tells whether there are more
+        feedbacks = db.session.execute(
+            db.select(Feedback).where(*conditions).order_by(Feedback.timestamp.desc(), Feedback.id.desc())
+            .limit(per_page + 1)
+        ).scalars().all()
+        feedbacks = with_archives(feedbacks, filters, limit=per_page + 1)
+        has_more = len(feedbacks) > per_page
+        feedbacks = feedbacks[:per_page]
+        count = sum(row.count for row in rollup)
+        
+        return jsonify({
+            'success': True,
+            'user': user.to_dict(),
+            'feedbacks': [feedback_dict(f, expand) for f in feedbacks],
+            'count': count,
+            'has_more': has_more,
+            'next_before': list_cursor(feedbacks[-1]) if has_more else None,
+            'analytics': analytics_summary(rollup),
+            'suggestions': suggestion_generator.generate_summary_suggestions(suggestion_groups(rollup),
+                                                                             top_n=suggestion_limit),
+            'trend_days': trend_days
+        }), 200
         
-        feedbacks = query.order_by(Feedback.timestamp.desc()).all()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+search_index_ready = False
+
+def ensure_search_index():
+    """Create the FTS5 index and its sync triggers; False when the database isn't SQLite"""
+    global search_index_ready
+    if search_index_ready:
+        return True
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.begin() as conn:
+        definition = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'feedback_fts'").scalar()
+        if definition is not None and 'scope' not in definition:
+            # Built before scope tokens were indexed
+            for statement in DROP_SEARCH_INDEX:
+                conn.exec_driver_sql(statement)
+            definition = None
+        for statement in SEARCH_INDEX_DDL:
+            conn.exec_driver_sql(statement)
+        if definition is None:
+            conn.exec_driver_sql(REBUILD_SEARCH_INDEX)
+    search_index_ready = True
+    return True
+
+@app.route('/api/feedback/search', methods=['GET'])
+@login_required
+@read_only
+def search_feedback():
+    """Full-text search over feedback text with ranked, highlighted results"""
+    try:
+        started = time.perf_counter()
+        user = User.query.get(session['user_id'])
+        match = build_match_query(request.args.get('q', ''))
+        if not match:
+            return jsonify({'error': 'Search query is required'}), 400
+        
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        order = request.args.get('order', 'rank')
+        if order not in ('rank', 'recent'):
+            return jsonify({'error': 'order must be rank or recent'}), 400
+        try:
+            cursor_score, cursor_id = decode_cursor(request.args.get('cursor'))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        rank_truncated = False
+        use_fts = ensure_search_index()
+        if use_fts:
+            # Role scoping and filters are scope tokens in the index, so no feedback rows are read per match
+            fts = db.table('feedback_fts', db.column('rowid'), db.column('rank'))
+            fts_match = scoped_match(match, scope_filters(user, request.args))
+            # rank is BM25 on the text column only; scope tokens don't count
+            matches = (db.session.query(fts.c.rowid.label('id'), fts.c.rank.label('score'))
+                       .filter(db.text("feedback_fts MATCH :match AND rank MATCH 'bm25(1.0, 0.0)'")
+                               .bindparams(match=fts_match)))
+            window_size = app.config['SEARCH_RANK_WINDOW']
+            if order == 'rank' and window_size > 0:
+                # Opt-in: BM25 over the newest SEARCH_RANK_WINDOW matches only, so broad terms stay fast
+                window = matches.order_by(fts.c.rowid.desc()).limit(window_size).subquery()
+                rank_truncated = matches.order_by(fts.c.rowid.desc()).offset(window_size).first() is not None
+                query = db.session.query(window.c.id, window.c.score)
+                if cursor_id is not None and cursor_score is not None:
+                    query = query.filter(db.or_(window.c.score > cursor_score,
+                                                db.and_(window.c.score == cursor_score, window.c.id > cursor_id)))
+                query = query.order_by(window.c.score, window.c.id)
+            elif order == 'rank':
+                # ORDER BY rank with a LIMIT is FTS5's top-N path over the whole scoped doclist
+                query = matches
+                if cursor_id is not None and cursor_score is not None:
+                    query = query.filter(db.or_(fts.c.rank > cursor_score,
+                                                db.and_(fts.c.rank == cursor_score, fts.c.rowid > cursor_id)))
+                query = query.order_by(fts.c.rank, fts.c.rowid)
+            else:
+                # Ordering on the FTS rowid streams newest-first straight from the index
+                query = matches
+                if cursor_id is not None:
+                    query = query.filter(fts.c.rowid < cursor_id)
+                query = query.order_by(fts.c.rowid.desc())
+        else:
+            # No FTS5 outside SQLite: unranked substring match on every word
+            order = 'recent'
+            query = db.session.query(Feedback.id, db.null().label('score')).filter(*feedback_scope(user, request.args))
+            for word in match.replace('"', ' ').replace('*', ' ').split():
+                if word != 'OR':
+                    query = query.filter(Feedback.feedback_text.ilike(f'%{word}%'))
+            if cursor_id is not None:
+                query = query.filter(Feedback.id < cursor_id)
+            query = query.order_by(Feedback.id.desc())
+        
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        ids = [row_id for row_id, _ in rows]
+        
+        # Load full rows for this page only
+        feedbacks = {f.id: f for f in Feedback.query.filter(Feedback.id.in_(ids)).all()} if ids else {}
+        
+        results = []
+        for row_id, row_score in rows:
+            item = feedbacks[row_id].to_dict()
+            item['score'] = round(-row_score, 4) if row_score is not None else None
+            item['snippet'] = highlight(make_snippet(item['feedback_text'], match))
+            results.append(item)
+        
+        next_cursor = None
+        if has_more:
+            last_id, last_score = rows[-1]
+            next_cursor = encode_cursor(last_score if order == 'rank' else None, last_id)
         
         return jsonify({
             'success': True,
-            'feedbacks': [f.to_dict() for f in feedbacks],
-            'count': len(feedbacks)
+            'query': match,
+            'order': order,
+            'feedbacks': results,
+            'count': len(results),
+            'next_cursor': next_cursor,
+            'rank_truncated': rank_truncated,
+            'took_ms': round((time.perf_counter() - started) * 1000, 1)
         }), 200
         
     except Exception as e:
@@ -643,8 +1946,23 @@ def delete_feedback(feedback_id):
     try:
         feedback = Feedback.query.get_or_404(feedback_id)
         
+        record_terms([feedback], sign=-1)
+        record_stats([feedback], sign=-1)
+        FeedbackLSH.query.filter_by(feedback_id=feedback.id).delete()
+        # Its oldest duplicate becomes the original the others point at, and now counts in the rollups
+        duplicates = Feedback.query.filter_by(duplicate_of=feedback.id).order_by(Feedback.timestamp, Feedback.id).all()
+        if duplicates:
+            promoted = duplicates[0]
+            promoted.duplicate_of = None
+            index_original(promoted)
+            for duplicate in duplicates[1:]:
+                duplicate.duplicate_of = promoted.id
+            record_terms([promoted])
+            record_stats([promoted])
         db.session.delete(feedback)
+        bump_change_counter('feedback')
         db.session.commit()
+        expire_hot_cache()
         
         return jsonify({
             'success': True,
@@ -655,110 +1973,245 @@ def delete_feedback(feedback_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/feedback/<int:feedback_id>/category', methods=['PUT'])
+@admin_required
+def correct_feedback_category(feedback_id):
+    """Admin: Correct the category of a feedback; corrections are training labels for the categorizer"""
+    try:
+        feedback = Feedback.query.get_or_404(feedback_id)
+        category = (request.get_json() or {}).get('category')
+        if category not in nlp_engine.category_keywords:
+            return jsonify({'error': f"Category must be one of: {', '.join(nlp_engine.category_keywords)}"}), 400
+        
+        record_stats([feedback], sign=-1)
+        feedback.category = category
+        feedback.category_label = category
+        record_stats([feedback])
+        bump_change_counter('feedback')
+        db.session.commit()
+        expire_hot_cache()
+        return jsonify({'success': True, 'feedback': feedback.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/feedback/analytics', methods=['GET'])
 @login_required
+@read_only
 def get_analytics():
     try:
         user = User.query.get(session['user_id'])
-        instructor_id = request.args.get('instructor_id')
-        course_id = request.args.get('course_id')
-        class_name = request.args.get('class_name')
+        since, _ = list_window(request.args)
+        rollup = cached_feedback_rollup(user, request.args)
+        if rollup is None:
+            conditions = feedback_scope(user, request.args)
+            if since is not None:
+                conditions.append(Feedback.timestamp >= since)
+            rollup = feedback_rollup(conditions)
+        analytics = analytics_summary(list(rollup) + archived_rollup(scope_filters(user, request.args), since))
+        return jsonify({'success': True, 'analytics': analytics}), 200
         
-        query = Feedback.query
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/feedback/trends/phrases', methods=['GET'])
+@admin_required
+@read_only
+def get_phrase_trends():
+    """
+    Top rising and falling phrases: the last `days` days against the
+    `days` before them, read from the term_stats rollup
+    """
+    try:
+        days = min(max(request.args.get('days', 7, type=int), 1), 365)
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        min_count = max(request.args.get('min_count', 3, type=int), 1)
+        course_id = request.args.get('course_id')
+
+        today = day_number(datetime.utcnow())
+        recent_start = today - days + 1
+        previous_start = recent_start - days
+
+        recent = db.func.sum(db.case((TermStat.day >= recent_start, TermStat.count), else_=0))
+        previous = db.func.sum(db.case((TermStat.day < recent_start, TermStat.count), else_=0))
+        query = db.session.query(TermStat.term, recent, previous).filter(TermStat.day >= previous_start)
+        if course_id:
+            query = query.filter(TermStat.course_id == course_id)
+        rows = query.group_by(TermStat.term).having(db.func.max(TermStat.count) > 0).all()
+
+        totals = {term: (r, p) for term, r, p in rows if term == DOCUMENT_TERM}
+        recent_total, previous_total = totals.get(DOCUMENT_TERM, (0, 0))
+        rising, falling = score_trends(rows, recent_total, previous_total, min_count=min_count, limit=limit)
+
+        return jsonify({
+            'success': True,
+            'window': {
+                'days': days,
+                'recent_start': day_date(recent_start).isoformat(),
+                'previous_start': day_date(previous_start).isoformat(),
+                'recent_feedbacks': recent_total,
+                'previous_feedbacks': previous_total
+            },
+            'rising': rising,
+            'falling': falling
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+compare_cache = TTLCache(max_age=app.config['COMPARE_CACHE_SECONDS'])
+
+def cohort_comparison(group_by, start_day, end_day, bucket='all', values=None):
+    """
+    Summaries of every group_by value (or only values) between two day
+    ordinals (inclusive), from one grouped read of the cohort_stats rollup
+    """
+    groups = [CohortStat.value, CohortStat.score_bin]
+    if bucket == 'all':
+        day = db.literal(None)
+    else:
+        if bucket == 'week':
+            day = (CohortStat.day - 1) // 7 * 7 + 1  # Monday starting the week
+        else:
+            day = CohortStat.day  # Months are bucketed from days in Python
+        groups.append(day)
+    query = db.session.query(
+        CohortStat.value,
+        day,
+        CohortStat.score_bin,
+        db.func.sum(CohortStat.count),
+        db.func.sum(CohortStat.score_sum),
+        db.func.sum(CohortStat.score_sq_sum),
+        db.func.sum(CohortStat.urgent)
+    ).filter(CohortStat.dimension == group_by, CohortStat.day >= start_day, CohortStat.day <= end_day)
+    if values is not None:
+        query = query.filter(CohortStat.value.in_(values))
+    return compare_cohorts(query.group_by(*groups).all(), bucket)
+
+def compare_groups(group_by, start_day, end_day, bucket='all', sort='count', descending=True, limit=100, min_count=1):
+    """
+    (number of groups, sorted page of at most limit groups) for the compare
+    endpoint. Groups are summarized first; time buckets are read only for
+    the groups on the page. Both are cached for COMPARE_CACHE_SECONDS.
+    """
+    key = (group_by, start_day, end_day)
+    groups = compare_cache.get(key)
+    if groups is None:
+        groups = cohort_comparison(group_by, start_day, end_day)
+        compare_cache.put(key, groups)
+
+    groups = sort_groups([g for g in groups if g['count'] >= min_count], sort, descending)
+    page = groups[:limit]
+    if bucket != 'all' and page:
+        values = tuple(g['value'] or '' for g in page)
+        key = (group_by, start_day, end_day, bucket, values)
+        series = compare_cache.get(key)
+        if series is None:
+            series = {g['value']: g['buckets'] for g in cohort_comparison(group_by, start_day, end_day, bucket, values)}
+            compare_cache.put(key, series)
+        page = [dict(g, buckets=series.get(g['value'], [])) for g in page]
+    return len(groups), page
+
+@app.route('/api/feedback/compare', methods=['GET'])
+@admin_required
+@read_only
+def compare_feedback():
+    """
+    Admin: Side-by-side sentiment, volume and urgent rate of every
+    instructor, course, class or category over the last `days` days,
+    optionally split into day/week/month buckets
+    """
+    try:
+        group_by = request.args.get('group_by', 'course_id')
+        if group_by not in DIMENSIONS:
+            return jsonify({'error': f"group_by must be one of: {', '.join(DIMENSIONS)}"}), 400
+        bucket = request.args.get('bucket', 'all')
+        if bucket not in ('all', 'day', 'week', 'month'):
+            return jsonify({'error': 'bucket must be one of: all, day, week, month'}), 400
+        sort = request.args.get('sort', 'count')
+        if sort not in SORT_KEYS:
+            return jsonify({'error': f"sort must be one of: {', '.join(SORT_KEYS)}"}), 400
+        descending = request.args.get('order', 'asc' if sort == 'value' else 'desc') != 'asc'
+        days = min(max(request.args.get('days', 90, type=int), 1), 3660)
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 5000)
+        min_count = max(request.args.get('min_count', 1, type=int), 1)
+
+        end_day = day_number(datetime.utcnow())
+        start_day = end_day - days + 1
+        total, groups = compare_groups(group_by, start_day, end_day, bucket, sort, descending, limit, min_count)
+        response = jsonify({
+            'success': True,
+            'group_by': group_by,
+            'bucket': bucket,
+            'start': day_date(start_day).isoformat(),
+            'end': day_date(end_day).isoformat(),
+            'sort': sort,
+            'order': 'desc' if descending else 'asc',
+            'total_groups': total,
+            'groups': groups
+        })
+        response.headers['Cache-Control'] = f"private, max-age={int(app.config['COMPARE_CACHE_SECONDS'])}"
+        response.add_etag()
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/feedback/live-stats', methods=['GET'])
+@login_required
+def get_live_stats():
+    """
+    Live sentiment percentiles and distinct students for one scope, from
+    the in-memory streaming sketches: `scope` is all, course, class or
+    instructor, with `value` naming the course, class or instructor.
+    Faculty always get their own instructor scope.
+    """
+    try:
+        if stream_stats is None:
+            return jsonify({'error': 'Live statistics are disabled (STREAM_STATS_DIR is empty)'}), 404
+        user = User.query.get(session['user_id'])
         if user.role == 'faculty':
-            query = query.filter_by(instructor_id=str(user.id))
-            if class_name:
-                query = query.filter_by(class_name=class_name)
+            key = f"instructor:{user.id}"
         else:
-            if instructor_id:
-                query = query.filter_by(instructor_id=instructor_id)
-            if course_id:
-                query = query.filter_by(course_id=course_id)
-            if class_name:
-                query = query.filter_by(class_name=class_name)
-        
-        feedbacks = query.all()
-        
-        # Calculate analytics
-        total_feedbacks = len(feedbacks)
-        if total_feedbacks == 0:
-            return jsonify({
-                'success': True,
-                'analytics': {
-                    'total_feedbacks': 0,
-                    'sentiment_distribution': {},
-                    'category_distribution': {},
-                    'average_sentiment_score': 0,
-                    'urgent_count': 0,
-                    'trends': []
-                }
-            })
-        
-        # Sentiment distribution
-        sentiment_counts = {}
-        category_counts = {}
-        total_sentiment_score = 0
-        sentiment_score_count = 0
-        urgent_count = 0
-        
-        for feedback in feedbacks:
-            # Sentiment distribution
-            sentiment = feedback.sentiment
-            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + 1
-            
-            # Category distribution
-            category = feedback.category
-            category_counts[category] = category_counts.get(category, 0) + 1
-            
-            # Average sentiment score
-            if feedback.sentiment_score is not None:
-                total_sentiment_score += feedback.sentiment_score
-                sentiment_score_count += 1
-            
-            # Urgent count
-            if feedback.is_urgent:
-                urgent_count += 1
-        
-        avg_sentiment_score = total_sentiment_score / sentiment_score_count if sentiment_score_count > 0 else 0
-        
-        # Trends (last 30 days)
-        trends = []
-        from datetime import timedelta
-        for i in range(30):
-            date = datetime.utcnow() - timedelta(days=30-i)
-            day_feedbacks = [f for f in feedbacks if f.timestamp and f.timestamp.date() == date.date()]
-            day_scores = [f.sentiment_score for f in day_feedbacks if f.sentiment_score is not None]
-            trends.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'count': len(day_feedbacks),
-                'avg_sentiment': sum(day_scores) / len(day_scores) if day_scores else 0
-            })
-        
+            scope = request.args.get('scope', 'all')
+            if scope not in ('all', 'course', 'class', 'instructor'):
+                return jsonify({'error': 'scope must be one of: all, course, class, instructor'}), 400
+            if scope != 'all' and not request.args.get('value'):
+                return jsonify({'error': 'value is required for this scope'}), 400
+            key = 'all' if scope == 'all' else f"{scope}:{request.args['value']}"
+
+        stats = stream_stats.summary(key) or {'scope': key, 'count': 0, 'distinct_students': 0,
+                                               'min': None, 'max': None, 'percentiles': {}}
+        updated_at = stream_stats.updated_at
         return jsonify({
             'success': True,
-            'analytics': {
-                'total_feedbacks': total_feedbacks,
-                'sentiment_distribution': sentiment_counts,
-                'category_distribution': category_counts,
-                'average_sentiment_score': round(avg_sentiment_score, 2),
-                'urgent_count': urgent_count,
-                'trends': trends
-            }
+            'stats': stats,
+            'updated_at': datetime.utcfromtimestamp(updated_at).isoformat() if updated_at else None
         }), 200
-        
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def recent_spike_alert_statement():
+    """SELECT for the spike alerts of the last SPIKE_ALERT_DAYS, newest first"""
+    since = datetime.utcnow() - timedelta(days=app.config['SPIKE_ALERT_DAYS'])
+    return db.select(SpikeAlert).where(SpikeAlert.created_at >= since).order_by(SpikeAlert.created_at.desc())
+
 @app.route('/api/feedback/urgent', methods=['GET'])
 @admin_required
+@read_only
 def get_urgent_feedback():
     try:
         urgent_feedbacks = Feedback.query.filter_by(is_urgent=True).order_by(Feedback.timestamp.desc()).all()
+        expand = request.args.get('expand_suggestions', 'true').lower() != 'false'
+        spike_alerts = db.session.execute(recent_spike_alert_statement()).scalars().all()
         
         return jsonify({
             'success': True,
-            'feedbacks': [f.to_dict() for f in urgent_feedbacks],
-            'count': len(urgent_feedbacks)
+            'feedbacks': [f.to_dict(expand=expand) for f in urgent_feedbacks],
+            'count': len(urgent_feedbacks),
+            'spike_alerts': [a.to_dict() for a in spike_alerts],
+            'spike_count': len(spike_alerts)
         }), 200
         
     except Exception as e:
@@ -766,47 +2219,476 @@ def get_urgent_feedback():
 
 @app.route('/api/suggestions', methods=['GET'])
 @login_required
+@read_only
 def get_suggestions():
     try:
         user = User.query.get(session['user_id'])
-        instructor_id = request.args.get('instructor_id')
-        course_id = request.args.get('course_id')
-        class_name = request.args.get('class_name')
-        
-        query = Feedback.query
-        if user.role == 'faculty':
-            query = query.filter_by(instructor_id=str(user.id))
-            if class_name:
-                query = query.filter_by(class_name=class_name)
-        else:
-            if instructor_id:
-                query = query.filter_by(instructor_id=instructor_id)
-            if course_id:
-                query = query.filter_by(course_id=course_id)
-            if class_name:
-                query = query.filter_by(class_name=class_name)
-        
-        feedbacks = query.all()
-        
-        # Aggregate suggestions
-        all_suggestions = []
-        for feedback in feedbacks:
-            if feedback.suggestions:
-                all_suggestions.append({
+        conditions = feedback_scope(user, request.args)
+        
+        # Raw per-feedback list, paged
+        if request.args.get('detail', 'false').lower() == 'true':
+            query = Feedback.query.filter(*conditions, Feedback.duplicate_of.is_(None), db.or_(
+                db.func.coalesce(Feedback.suggestion_ids, '') != '',
+                db.func.coalesce(Feedback.suggestions_text, '') != ''
+            ))
+            page = max(request.args.get('page', 1, type=int), 1)
+            per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+            pagination = query.order_by(Feedback.id.desc()).paginate(page=page, per_page=per_page, error_out=False)
+            
+            return jsonify({
+                'success': True,
+                'suggestions': [{
                     'feedback_id': feedback.id,
                     'category': feedback.category,
                     'suggestion': feedback.suggestions,
                     'sentiment': feedback.sentiment
-                })
+                } for feedback in pagination.items],
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total
+            }), 200
+        
+        # Aggregated from the grouped scan, with volumes for the current and previous trend windows
+        trend_days = min(max(request.args.get('trend_days', 7, type=int), 1), 365)
+        groups = suggestion_groups(feedback_rollup(conditions, trend_days)
+                                   + archived_rollup(scope_filters(user, request.args), trend_days=trend_days))
         
         return jsonify({
             'success': True,
-            'suggestions': all_suggestions
+            'suggestions': suggestion_generator.generate_summary_suggestions(groups),
+            'total_feedbacks': sum(group['count'] for group in groups),
+            'trend_days': trend_days
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/suggestions/catalog', methods=['GET'])
+@login_required
+def get_suggestion_catalog():
+    """Id -> text map for clients that request feedback with expand_suggestions=false"""
+    try:
+        load_suggestion_catalog()
+        return jsonify({
+            'success': True,
+            'catalog': suggestion_catalog.to_dict()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/rate-limits', methods=['GET'])
+@admin_required
+def get_rate_limits():
+    """
+    Rate limits with their allowed and throttled request counts (this
+    worker's, or every worker's with the sqlite backend), and this worker's
+    analysis slots with the requests turned away for want of one
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'backend': rate_limiter.name if rate_limiter is not None else None,
+            'limits': {limit_class: limit._asdict() for limit_class, limit in RATE_LIMITS.items()},
+            'counts': rate_limiter.counts() if rate_limiter is not None else {},
+            'analysis': analysis_limiter.stats() if analysis_limiter is not None else None
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """This worker's requested and slow-request profiles, newest first"""
+    try:
+        return jsonify({
+            'success': True,
+            'worker': os.getpid(),
+            'slow_ms': app.config['PROFILE_SLOW_MS'],
+            'requested': [profile.summary() for profile in profiler.recent('requested')],
+            'slow': [profile.summary() for profile in profiler.recent('slow')]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def get_profile(profile_id):
+    """
+    One profile: format=json (default) gives SQL timings and the top stacks,
+    speedscope a speedscope file, collapsed flamegraph.pl input
+    """
+    try:
+        profile = profiler.get(profile_id)
+        if profile is None:
+            return jsonify({'error': 'Profile not found on this worker'}), 404
+        output = request.args.get('format', 'json')
+        if output == 'speedscope':
+            return app.response_class(app.json.dumps(profile.speedscope()), 200, mimetype='application/json', headers={
+                'Content-Disposition': f'attachment; filename="profile-{profile.id}.speedscope.json"'})
+        if output == 'collapsed':
+            return app.response_class(profile.collapsed(), 200, mimetype='text/plain', headers={
+                'Content-Disposition': f'attachment; filename="profile-{profile.id}.folded"'})
+        if output != 'json':
+            return jsonify({'error': "format must be 'json', 'speedscope' or 'collapsed'"}), 400
+        return jsonify({'success': True, 'profile': profile.to_dict()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# A row's analysis results and the other columns record_stats reads, from before re-analysis
+AnalyzedRow = namedtuple('AnalyzedRow', ('timestamp', 'duplicate_of', 'sentiment', 'sentiment_score', 'is_urgent',
+                                         'suggestion_ids') + DIMENSIONS)
+
+def reanalyze_feedback(chunk_size=500, rows_per_sec=None, workers=1, force=False, start_id=0, log=print):
+    """
+    Re-run analysis on rows stamped with an older analyzer version.
+    Rows are scanned in id order and committed per chunk, so an interrupted
+    run simply resumes on the next invocation. Only changed result columns
+    are written; unchanged rows just get the new version stamp. Alerts are
+    not re-sent for historic rows that become urgent.
+    """
+    rows_per_sec = rows_per_sec or app.config['REANALYSIS_ROWS_PER_SEC']
+    version = feedback_analyzer.version
+    pool = feedback_analyzer.create_pool(workers) if workers > 1 else None
+    last_id, scanned, changed = start_id, 0, 0
+    started = time.monotonic()
+    
+    try:
+        while True:
+            query = Feedback.query.filter(Feedback.id > last_id)
+            if not force:
+                query = query.filter(db.or_(Feedback.analyzer_version.is_(None), Feedback.analyzer_version != version))
+            feedbacks = query.order_by(Feedback.id).limit(chunk_size).all()
+            if not feedbacks:
+                break
+            
+            analyses = feedback_analyzer.analyze_batch([f.feedback_text for f in feedbacks], pool=pool)
+            
+            # Analysis results (and any new suggestion catalog entries) for the whole chunk first: the
+            # catalog is written on its own connection, which would wait on db.session's write lock
+            before = [AnalyzedRow(*(getattr(f, field) for field in AnalyzedRow._fields)) for f in feedbacks]
+            for feedback, analysis, old in zip(feedbacks, analyses, before):
+                apply_analysis(feedback, analysis)
+                if (old.category, old.sentiment, old.sentiment_score, old.suggestion_ids, old.is_urgent) != (
+                        feedback.category, feedback.sentiment, feedback.sentiment_score,
+                        feedback.suggestion_ids, feedback.is_urgent):
+                    changed += 1
+                    if feedback.suggestions_text and feedback.suggestion_ids:
+                        feedback.suggestions_text = None
+            record_stats(before, sign=-1)
+            record_stats(feedbacks)
+            bump_change_counter('feedback')
+            db.session.commit()
+            expire_hot_cache()
+            
+            scanned += len(feedbacks)
+            last_id = feedbacks[-1].id
+            log(f"Re-analysis: {scanned} scanned, {changed} changed, last id {last_id}")
+            
+            # Stay within the rows/sec budget
+            ahead = scanned / rows_per_sec - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    return {'version': version, 'scanned': scanned, 'changed': changed, 'last_id': last_id}
+
+@app.cli.command('reanalyze')
+@click.option('--chunk-size', default=500, show_default=True, help='Rows per chunk and commit')
+@click.option('--rows-per-sec', type=float, default=None, help='Throttle, defaults to REANALYSIS_ROWS_PER_SEC')
+@click.option('--workers', default=1, show_default=True, help='Analysis processes')
+@click.option('--force', is_flag=True, help='Also re-analyze rows already on the current version')
+@click.option('--start-id', default=0, help='Resume a --force run after this feedback id')
+@click.option('--dry-run', is_flag=True, help='Only count stale rows')
+def reanalyze_command(chunk_size, rows_per_sec, workers, force, start_id, dry_run):
+    """Re-analyze feedback produced by an older analyzer version"""
+    version = feedback_analyzer.version
+    stale = Feedback.query.filter(db.or_(Feedback.analyzer_version.is_(None), Feedback.analyzer_version != version)).count()
+    print(f"Analyzer version {version}: {stale} stale rows")
+    if dry_run:
+        return
+    result = reanalyze_feedback(chunk_size=chunk_size, rows_per_sec=rows_per_sec, workers=workers,
+                                force=force, start_id=start_id)
+    print(f"Done: {result['scanned']} scanned, {result['changed']} changed")
+
+@app.cli.command('build-dedup-index')
+@click.option('--chunk-size', default=1000, show_default=True)
+def build_dedup_index_command(chunk_size):
+    """Compute MinHash signatures and LSH buckets for rows stored before dedup existed"""
+    last_id, indexed = 0, 0
+    while True:
+        feedbacks = Feedback.query.filter(Feedback.id > last_id, Feedback.minhash.is_(None),
+                                          Feedback.duplicate_of.is_(None)).order_by(Feedback.id).limit(chunk_size).all()
+        if not feedbacks:
+            break
+        for feedback in feedbacks:
+            index_original(feedback)
+        db.session.commit()
+        indexed += len(feedbacks)
+        last_id = feedbacks[-1].id
+        print(f"Indexed {indexed} rows, last id {last_id}")
+    print(f"Done: {indexed} rows indexed")
+
+@app.cli.command('train-categorizer')
+@click.option('--csv', 'csv_path', type=click.Path(exists=True), help='Extra labeled rows (text and category columns)')
+@click.option('--output', default=None, help='Artifact path, defaults to CATEGORIZER_MODEL_FILE')
+@click.option('--epochs', default=200, show_default=True)
+def train_categorizer_command(csv_path, output, epochs):
+    """Train the TF-IDF categorizer on admin-corrected rows (and optionally a labeled CSV)"""
+    rows = db.session.query(Feedback.feedback_text, Feedback.category_label).filter(
+        Feedback.category_label.isnot(None)).all()
+    texts = [text for text, _ in rows]
+    labels = [label for _, label in rows]
+    if csv_path:
+        df = pd.read_csv(csv_path)
+        df.columns = [str(c).lower().strip() for c in df.columns]
+        text_column = next(c for c in ['feedback_text', 'feedback', 'text'] if c in df.columns)
+        df = df[df[text_column].notna() & df['category'].notna()]
+        texts += df[text_column].astype(str).tolist()
+        labels += df['category'].astype(str).tolist()
+    if len(set(labels)) < 2:
+        print(f"Need labeled rows from at least two categories, found {len(texts)} rows")
+        return
+    
+    output = output or app.config['CATEGORIZER_MODEL_FILE']
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    started = time.perf_counter()
+    classifier = HashedTfidfClassifier.train(texts, labels, epochs=epochs)
+    classifier.save(output)
+    accuracy = sum(p == l for p, l in zip(classifier.predict(texts), labels)) / len(labels)
+    print(f"Trained on {len(texts)} rows in {time.perf_counter() - started:.1f} s "
+          f"(training accuracy {accuracy:.1%}), saved {output}")
+    print("Set CATEGORIZER=model to use it, then run `flask reanalyze` to update stored rows")
+
+@app.cli.command('build-term-stats')
+@click.option('--chunk-size', default=1000, show_default=True)
+def build_term_stats_command(chunk_size):
+    """Rebuild the phrase trend rollup from all stored feedback, archives included"""
+    TermStat.query.delete()
+    counted = 0
+    for feedbacks in archived_feedback_chunks(chunk_size):
+        record_terms(feedbacks)
+        db.session.commit()
+        counted += len(feedbacks)
+    last_id = 0
+    while True:
+        feedbacks = Feedback.query.filter(Feedback.id > last_id).order_by(Feedback.id).limit(chunk_size).all()
+        if not feedbacks:
+            break
+        record_terms(feedbacks)
+        db.session.commit()
+        counted += len(feedbacks)
+        last_id = feedbacks[-1].id
+        print(f"Counted {counted} rows, last id {last_id}")
+    print(f"Done: {counted} rows counted")
+
+@app.cli.command('rebuild-stream-stats')
+@click.option('--chunk-size', default=1000, show_default=True)
+def rebuild_stream_stats_command(chunk_size):
+    """
+    Replace the live statistics snapshots with sketches of all stored
+    feedback. Stop the server first: running workers would add the rows
+    they hold in memory again.
+    """
+    if stream_stats is None:
+        raise click.ClickException('STREAM_STATS_DIR is empty')
+    rebuilt = StreamingStats(app.config['STREAM_STATS_DIR'], snapshot_seconds=0)
+    last_id, counted = 0, 0
+    for feedbacks in archived_feedback_chunks(chunk_size):
+        for f in feedbacks:
+            if f.duplicate_of is None:
+                rebuilt.add(scope_keys(f.course_id, f.class_name, f.instructor_id), f.sentiment_score,
+                            None if f.student_id == 'anonymous' else f.student_id)
+                counted += 1
+    while True:
+        feedbacks = Feedback.query.filter(Feedback.id > last_id, Feedback.duplicate_of.is_(None)) \
+            .order_by(Feedback.id).limit(chunk_size).all()
+        if not feedbacks:
+            break
+        for f in feedbacks:
+            rebuilt.add(scope_keys(f.course_id, f.class_name, f.instructor_id), f.sentiment_score,
+                        None if f.student_id == 'anonymous' else f.student_id)
+        counted += len(feedbacks)
+        last_id = feedbacks[-1].id
+    os.makedirs(app.config['STREAM_STATS_DIR'], exist_ok=True)
+    for name in os.listdir(app.config['STREAM_STATS_DIR']):
+        if name.endswith('.json'):
+            os.remove(os.path.join(app.config['STREAM_STATS_DIR'], name))
+    rebuilt.save_as(os.path.join(app.config['STREAM_STATS_DIR'], 'rebuilt.json'))
+    print(f"Done: {counted} rows in {len(rebuilt.scope_names())} scopes")
+
+@app.cli.command('build-cohort-stats')
+@click.option('--chunk-size', default=1000, show_default=True)
+def build_cohort_stats_command(chunk_size):
+    """Rebuild the cohort comparison rollup from all stored feedback, archives included"""
+    CohortStat.query.delete()
+    counted = 0
+    for feedbacks in archived_feedback_chunks(chunk_size):
+        record_stats(feedbacks)
+        db.session.commit()
+        counted += len(feedbacks)
+    last_id = 0
+    while True:
+        feedbacks = Feedback.query.filter(Feedback.id > last_id).order_by(Feedback.id).limit(chunk_size).all()
+        if not feedbacks:
+            break
+        record_stats(feedbacks)
+        db.session.commit()
+        counted += len(feedbacks)
+        last_id = feedbacks[-1].id
+        print(f"Counted {counted} rows, last id {last_id}")
+    print(f"Done: {counted} rows counted")
+
+def archived_feedback_chunks(chunk_size):
+    """Rows of every archive file in chunks, for rebuilding rollups"""
+    for archive in FeedbackArchive.query.order_by(FeedbackArchive.id).all():
+        rows = read_archive(os.path.join(app.config['ARCHIVE_DIR'], archive.file_name))
+        for start in range(0, len(rows), chunk_size):
+            yield rows[start:start + chunk_size]
+        print(f"Counted archive {archive.file_name}")
+
+def retention_cutoff(now=None):
+    """Start of the oldest semester kept in the feedback table (RETENTION_SEMESTERS, the current one included)"""
+    months = app.config['SEMESTER_START_MONTHS']
+    start = semester_start(now or datetime.utcnow(), months)
+    for _ in range(app.config['RETENTION_SEMESTERS'] - 1):
+        start = previous_semester(start, months)
+    return start
+
+def database_size():
+    """(bytes the database takes, bytes of that in free pages); free is None on PostgreSQL"""
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'sqlite':
+            page_size = conn.exec_driver_sql('PRAGMA page_size').scalar()
+            return (page_size * conn.exec_driver_sql('PRAGMA page_count').scalar(),
+                    page_size * conn.exec_driver_sql('PRAGMA freelist_count').scalar())
+        return conn.execute(db.text('SELECT pg_database_size(current_database())')).scalar(), None
+
+def archive_batch(semester, feedbacks):
+    """
+    Write feedbacks (one semester, id order) to a new archive file, then in
+    one transaction add them to the archived_feedback_stats summary, record
+    the file and delete the rows. term_stats and cohort_stats keep counting
+    them. Returns the FeedbackArchive.
+    """
+    file_name = f"feedback-{semester}-{feedbacks[0].id}-{feedbacks[-1].id}.npz"
+    path = os.path.join(app.config['ARCHIVE_DIR'], file_name)
+    write_archive(path, feedbacks)
+    try:
+        insert = (postgresql if db.engine.dialect.name == 'postgresql' else sqlite).insert(ArchivedFeedbackStat)
+        statement = insert.on_conflict_do_update(
+            index_elements=[getattr(ArchivedFeedbackStat, column) for column in SUMMARY_COLUMNS],
+            set_={column: getattr(ArchivedFeedbackStat, column) + insert.excluded[column]
+                  for column in ('count', 'score_sum', 'score_count', 'urgent')}
+        )
+        db.session.execute(statement, [
+            {**dict(zip(SUMMARY_COLUMNS, key)), 'count': count, 'score_sum': score_sum, 'score_count': score_count,
+             'urgent': urgent}
+            for key, (count, score_sum, score_count, urgent) in summarize(feedbacks).items()
+        ])
+        archive = FeedbackArchive(semester=semester, file_name=file_name, row_count=len(feedbacks),
+                                  file_bytes=os.path.getsize(path), oldest=min(f.timestamp for f in feedbacks),
+                                  newest=max(f.timestamp for f in feedbacks))
+        db.session.add(archive)
+        ids = [f.id for f in feedbacks]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            db.session.execute(db.delete(FeedbackLSH).where(FeedbackLSH.feedback_id.in_(chunk)))
+            db.session.execute(db.delete(Feedback).where(Feedback.id.in_(chunk)))
+        bump_change_counter('feedback')
+        db.session.commit()
+        expire_hot_cache()
+    except Exception:
+        db.session.rollback()
+        os.remove(path)
+        raise
+    return archive
+
+def archive_feedback(cutoff, batch_size=100000, dry_run=False, log=print):
+    """
+    Move feedback older than cutoff into archive files, one semester at a
+    time in batches of batch_size rows. An original whose near-duplicates are
+    still in the table stays until they are archived too. Returns
+    {semester: [rows, file bytes]}.
+    """
+    months = app.config['SEMESTER_START_MONTHS']
+    os.makedirs(app.config['ARCHIVE_DIR'], exist_ok=True)
+    columns = [getattr(Feedback, column).label(column) for column in ARCHIVE_COLUMNS]
+    report = {}
+    after = None
+    while True:
+        query = db.select(db.func.min(Feedback.timestamp)).where(Feedback.timestamp < cutoff)
+        if after is not None:
+            query = query.where(Feedback.timestamp >= after)
+        oldest = db.session.execute(query).scalar()
+        if oldest is None:
+            return report
+        start = semester_start(oldest, months)
+        after = next_semester(start, months)
+        semester = semester_label(start)
+        duplicated_elsewhere = db.select(Feedback.duplicate_of).where(
+            Feedback.duplicate_of.isnot(None), db.or_(Feedback.timestamp < start, Feedback.timestamp >= after)
+        )
+        in_semester = [Feedback.timestamp >= start, Feedback.timestamp < after, Feedback.id.notin_(duplicated_elsewhere)]
+        if dry_run:
+            count = db.session.execute(db.select(db.func.count(Feedback.id)).where(*in_semester)).scalar()
+            if count:
+                report[semester] = [count, 0]
+                log(f"{semester}: {count:,} rows would be archived")
+            continue
+        last_id = 0
+        while True:
+            feedbacks = db.session.execute(
+                db.select(*columns).where(*in_semester, Feedback.id > last_id).order_by(Feedback.id).limit(batch_size)
+            ).all()
+            if not feedbacks:
+                break
+            archive = archive_batch(semester, feedbacks)
+            totals = report.setdefault(semester, [0, 0])
+            totals[0] += archive.row_count
+            totals[1] += archive.file_bytes
+            last_id = feedbacks[-1].id
+            log(f"{semester}: {totals[0]:,} rows archived to {totals[1] / 2**20:.1f} MiB")
+
+@app.cli.command('archive-feedback')
+@click.option('--batch-size', default=100000, show_default=True, help='Rows per archive file')
+@click.option('--dry-run', is_flag=True, help='Only count the rows each semester would archive')
+@click.option('--vacuum', is_flag=True, help='VACUUM afterwards, so SQLite returns the freed pages to the filesystem')
+def archive_feedback_command(batch_size, dry_run, vacuum):
+    """
+    Move feedback from semesters before the last RETENTION_SEMESTERS into
+    compressed files in ARCHIVE_DIR and report the space reclaimed
+    """
+    if app.config['RETENTION_SEMESTERS'] < 1:
+        raise click.ClickException('RETENTION_SEMESTERS must be at least 1')
+    cutoff = retention_cutoff()
+    size_before, free_before = database_size()
+    print(f"Archiving feedback before {cutoff:%Y-%m-%d} ({app.config['RETENTION_SEMESTERS']} semesters kept)")
+    report = archive_feedback(cutoff, batch_size=batch_size, dry_run=dry_run)
+    rows = sum(r for r, _ in report.values())
+    if dry_run:
+        print(f"Dry run: {rows:,} rows in {len(report)} semesters would be archived")
+        return
+    file_bytes = sum(b for _, b in report.values())
+    size_after, free_after = database_size()
+    print(f"Archived {rows:,} rows from {len(report)} semesters into {file_bytes / 2**20:.1f} MiB of archives; "
+          f"{Feedback.query.count():,} rows remain in the feedback table")
+    if free_after is None:
+        print(f"Database: {size_before / 2**20:.1f} MiB -> {size_after / 2**20:.1f} MiB "
+              "(PostgreSQL reuses the freed space once autovacuum has run)")
+        return
+    print(f"Database: {size_after / 2**20:.1f} MiB with {free_after / 2**20:.1f} MiB free "
+          f"({(free_after - free_before) / 2**20:.1f} MiB freed by archiving)")
+    if vacuum:
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql('VACUUM')
+        size_vacuumed, _ = database_size()
+        print(f"VACUUM: {size_after / 2**20:.1f} MiB -> {size_vacuumed / 2**20:.1f} MiB "
+              f"({(size_before - size_vacuumed) / 2**20:.1f} MiB reclaimed in total)")
+    elif free_after:
+        print("Run with --vacuum to return the free pages to the filesystem")
+
 if __name__ == '__main__':
     print("Starting Student Feedback Analyzer API...")
     print("Initializing database...")
@@ -815,12 +2697,11 @@ if __name__ == '__main__':
         with app.app_context():
             db.create_all()
             
-            # Add new columns to existing DB (SQLite migration)
-            import sqlite3
-            db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-            if db_path and db_path != app.config['SQLALCHEMY_DATABASE_URI']:
+            # Add new columns to existing DB (SQLite migration), on the engine's own
+            # database file (relative paths resolve to the instance folder)
+            if db.engine.dialect.name == 'sqlite':
                 try:
-                    conn = sqlite3.connect(db_path)
+                    conn = db.engine.raw_connection()
                     c = conn.cursor()
                     c.execute("PRAGMA table_info(users)")
                     user_cols = [row[1] for row in c.fetchall()]
@@ -829,14 +2710,28 @@ if __name__ == '__main__':
                             c.execute(f"ALTER TABLE users ADD COLUMN {col} {defn}")
                     c.execute("PRAGMA table_info(feedback)")
                     fb_cols = [row[1] for row in c.fetchall()]
-                    for col, defn in [('class_name', 'VARCHAR(100)'), ('feedback_type', "VARCHAR(20) DEFAULT 'campus'")]:
+                    for col, defn in [('class_name', 'VARCHAR(100)'), ('instructor_id', 'VARCHAR(100)'),
+                                      ('feedback_type', "VARCHAR(20) DEFAULT 'campus'"),
+                                      ('suggestion_ids', 'VARCHAR(64)'), ('analyzer_version', 'VARCHAR(16)'),
+                                      ('duplicate_of', 'INTEGER'), ('minhash', 'BLOB'),
+                                      ('category_label', 'VARCHAR(100)')]:
                         if col not in fb_cols:
                             c.execute(f"ALTER TABLE feedback ADD COLUMN {col} {defn}")
+                    c.execute("CREATE INDEX IF NOT EXISTS ix_feedback_analyzer_version ON feedback (analyzer_version)")
+                    c.execute("CREATE INDEX IF NOT EXISTS ix_feedback_duplicate_of ON feedback (duplicate_of)")
                     conn.commit()
                     conn.close()
                 except Exception as me:
                     print(f"Migration: {me}")
             
+            ensure_search_index()
+            
+            # Seed the suggestion catalog and move old free-text suggestions onto it
+            intern_suggestions(suggestion_generator.all_suggestion_texts())
+            converted = migrate_legacy_suggestions()
+            if converted:
+                print(f"Converted suggestions on {converted} feedback rows to catalog ids")
+            
             # Create default admin user if it doesn't exist
             admin = User.query.filter_by(username='admin').first()
             if not admin:
@@ -867,6 +2762,10 @@ if __name__ == '__main__':
     print("  - GET  /api/feedback - Get all feedbacks")
     print("  - GET  /api/feedback/analytics - Get analytics")
     print("  - GET  /api/feedback/urgent - Get urgent alerts")
+    print("  - GET  /api/feedback/trends/phrases - Rising and falling phrases")
+    print("  - GET  /api/feedback/compare - Compare instructors, courses, classes or categories")
+    print("  - GET  /api/feedback/live-stats - Live sentiment percentiles and distinct students")
+    print("  - GET  /api/profiles - Requested and slow-request profiles (admin)")
     print("  - GET  /api/health - Health check")
     
     app.run(debug=True, port=5000, host='0.0.0.0')
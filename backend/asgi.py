@@ -0,0 +1,469 @@
+"""
+ASGI entry point: feedback submission and the feedback read endpoints run
+on an async Quart app, every other route is forwarded to the Flask app
+
+Usage: uvicorn asgi:application --host 0.0.0.0 --port 5000 [--workers 2]
+
+Sessions are the Flask app's signed cookies (same SECRET_KEY), so a login on
+either app is valid on both. Database access uses the async driver for the
+configured database (aiosqlite, asyncpg for PostgreSQL), and analysis runs in
+an executor, so the event loop keeps serving other connections meanwhile.
+"""
+import asyncio
+import contextvars
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import SyncToAsync, ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, g, jsonify, request, session
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import (ANALYSIS_BUSY_ERROR, CORS_ORIGINS, IDEMPOTENCY_HEADER, PROFILE_HEADER, PROFILE_ID_HEADER,
+                 RATE_LIMIT_ERROR, SUBMISSION_TIMEOUT_ERROR, Feedback, User, add_feedback, alert_system,
+                 analysis_limiter, app as flask_app, apply_analysis, cached_feedback_list, claim_idempotency_key,
+                 compressor, database_pragmas, db, feedback_analyzer, feedback_dict, finish_idempotency_key,
+                 read_engine as flask_read_engine, feedback_list_statement, install_sql_timing, list_before,
+                 list_cursor, list_includes_archives, list_window, load_suggestion_catalog, observe_feedback, profiler,
+                 rate_limit_wait, rate_limiter, recent_spike_alert_statement, record_stats, record_terms,
+                 request_fingerprint, scope_filters, submission_fields, submission_queue, suggestion_catalog,
+                 with_archives)
+from services.db_config import install_sqlite_pragmas
+from services.feedback_analyzer import _analyze_in_worker
+from services.group_commit import QueueFull
+from services.read_routing import record_write, wrote_recently
+from services.json_provider import FastJSONProvider
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+# Served by the Quart app; everything else goes to Flask
+ASYNC_ROUTES = {
+    ('GET', '/api/health'),
+    ('GET', '/api/auth/me'),
+    ('GET', '/api/feedback'),
+    ('POST', '/api/feedback'),
+    ('GET', '/api/feedback/urgent'),
+}
+
+quart_app = Quart(__name__)
+quart_app.config['SECRET_KEY'] = flask_app.config['SECRET_KEY']
+quart_app.json = FastJSONProvider(quart_app, backend=flask_app.config['JSON_BACKEND'])
+
+
+def async_url(url):
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+with flask_app.app_context():
+    database_url = db.engine.url  # Resolved by Flask-SQLAlchemy (instance folder for relative SQLite paths)
+engine = create_async_engine(async_url(database_url), **flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+install_sqlite_pragmas(engine.sync_engine, database_pragmas())
+install_sql_timing(engine.sync_engine, profiler)
+# Objects stay readable after commit; lazy loads would need a greenlet round trip
+async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+# Dashboard reads follow READ_DATABASE_URL like the Flask routes
+read_engine = None
+read_session = async_session
+if flask_read_engine is not None:
+    read_options = {k: v for k, v in flask_app.config['SQLALCHEMY_BINDS']['read'].items() if k != 'url'}
+    read_engine = create_async_engine(async_url(flask_read_engine.url), **read_options)
+    install_sqlite_pragmas(read_engine.sync_engine, database_pragmas() + [('query_only', 'ON')])
+    install_sql_timing(read_engine.sync_engine, profiler)
+    read_session = async_sessionmaker(read_engine, expire_on_commit=False)
+
+# SQLite allows one writer at a time: queue writers here rather than in its busy timeout
+write_lock = asyncio.Lock() if database_url.get_backend_name() == 'sqlite' else None
+
+# Slot polling interval while waiting for analysis_limiter, which is shared with threaded Flask routes
+ANALYSIS_SLOT_POLL_SECONDS = 0.02
+
+# Analysis, suggestion interning and other blocking work from the sync code base
+blocking_executor = ThreadPoolExecutor(thread_name_prefix='asgi-blocking')
+analysis_pool = None
+
+
+def in_app_context(function, *args):
+    """Run a function that needs the Flask app context, in the blocking executor"""
+    def call():
+        with flask_app.app_context():
+            return function(*args)
+    # In the caller's context, so its queries count towards the request's profile
+    return asyncio.get_running_loop().run_in_executor(blocking_executor, contextvars.copy_context().run, call)
+
+
+async def analyze(feedback_text):
+    """FeedbackAnalyzer results, from the process pool when ANALYSIS_WORKERS > 1"""
+    loop = asyncio.get_running_loop()
+    if analysis_pool is not None:
+        return await loop.run_in_executor(analysis_pool, _analyze_in_worker, feedback_text)
+    return await loop.run_in_executor(blocking_executor, feedback_analyzer.analyze, feedback_text)
+
+
+def reading_session():
+    """Session on the read engine, or the primary while the user's last write may not have replicated"""
+    if read_engine is not None and not wrote_recently(session, flask_app.config['READ_YOUR_WRITES_SECONDS']):
+        return read_session()
+    return async_session()
+
+
+async def current_user():
+    async with async_session() as db_session:
+        return await db_session.get(User, session['user_id'])
+
+
+def login_required(f):
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'Authentication required'}), 401
+        return await f(*args, **kwargs)
+    return decorated_function
+
+
+def admin_required(f):
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({'error': 'Authentication required'}), 401
+        user = await current_user()
+        if not user or user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+        return await f(*args, **kwargs)
+    return decorated_function
+
+
+def idempotent(f):
+    """Idempotency-Key handling of the Flask app's idempotent decorator; goes after login_required"""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return await f(*args, **kwargs)
+        user_id = session['user_id']
+        fingerprint = request_fingerprint(request.method, request.path, [await request.get_data()])
+        answer = await in_app_context(claim_idempotency_key, user_id, key, request.path, fingerprint)
+        if answer is not None:
+            status, body, headers = answer
+            return quart_app.response_class(body, status=status, headers=headers, mimetype='application/json')
+        response = None
+        try:
+            response = await quart_app.make_response(await f(*args, **kwargs))
+        finally:
+            if response is None:
+                await in_app_context(finish_idempotency_key, user_id, key, 500, None)
+            else:
+                await in_app_context(finish_idempotency_key, user_id, key, response.status_code,
+                                     await response.get_data())
+        return response
+    return decorated_function
+
+
+def rate_limited(limit_class):
+    """The Flask app's rate_limited; the sqlite backend is queried off the event loop"""
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            check = (limit_class, session.get('user_id'), request.remote_addr, request.access_route)
+            if rate_limiter is not None and rate_limiter.name == 'sqlite':
+                wait = await asyncio.get_running_loop().run_in_executor(blocking_executor, rate_limit_wait, *check)
+            else:
+                wait = rate_limit_wait(*check)
+            if wait:
+                return jsonify({'error': RATE_LIMIT_ERROR}), 429, {'Retry-After': str(math.ceil(wait))}
+            return await f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def analysis_slot(f):
+    """The Flask app's analysis_slot, waiting for a slot without blocking the event loop"""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        if analysis_limiter is None:
+            return await f(*args, **kwargs)
+        deadline = asyncio.get_running_loop().time() + analysis_limiter.max_wait
+        while not analysis_limiter.acquire(timeout=0):
+            if asyncio.get_running_loop().time() >= deadline:
+                analysis_limiter.reject()
+                return jsonify({'error': ANALYSIS_BUSY_ERROR}), 503, {'Retry-After': '1'}
+            await asyncio.sleep(ANALYSIS_SLOT_POLL_SECONDS)
+        try:
+            return await f(*args, **kwargs)
+        finally:
+            analysis_limiter.release()
+    return decorated_function
+
+
+async def feedback_dicts(feedbacks, expand):
+    """feedback_dict for rows, refreshing the suggestion catalog off the event loop if rows use unseen ids"""
+    if expand and any(suggestion_catalog.unknown_ids(f.suggestion_ids) for f in feedbacks if f.suggestion_ids):
+        await in_app_context(load_suggestion_catalog)
+    return [feedback_dict(f, expand) for f in feedbacks]
+
+
+@quart_app.before_serving
+async def start_pools():
+    global analysis_pool
+    workers = flask_app.config['ANALYSIS_WORKERS']
+    analysis_pool = feedback_analyzer.create_pool(workers) if workers > 1 else None
+
+
+@quart_app.after_serving
+async def stop_pools():
+    if analysis_pool is not None:
+        analysis_pool.shutdown()
+    blocking_executor.shutdown()
+    await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
+
+
+@quart_app.after_request
+async def add_cors_headers(response):
+    # Same policy as flask-cors on the Flask app; preflight requests are answered there
+    origin = request.headers.get('Origin')
+    if origin in CORS_ORIGINS:
+        response.headers['Access-Control-Allow-Origin'] = origin
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        response.vary.add('Origin')
+    return response
+
+
+@quart_app.after_request
+async def remember_writes(response):
+    # Read-your-writes, as on the Flask app
+    if read_engine is not None and request.method in ('POST', 'PUT', 'PATCH', 'DELETE') \
+            and response.status_code < 400 and 'user_id' in session:
+        record_write(session)
+    return response
+
+
+@quart_app.after_request
+async def compress_response(response):
+    # The Flask app's ResponseCompressor
+    if not compressor.compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoded = compressor.encode(await response.get_data(), request.accept_encodings)
+    if encoded is not None:
+        compressor.set_encoded(response, *encoded)
+    return response
+
+
+@quart_app.before_request
+async def start_profile():
+    """The Flask app's start_profile; the profile follows the request's task"""
+    trigger = 'slow' if flask_app.config['PROFILE_SLOW_MS'] > 0 else None
+    if (request.headers.get(PROFILE_HEADER) or request.args.get('profile')) and 'user_id' in session:
+        user = await current_user()
+        if user and user.role == 'admin':
+            trigger = 'requested'
+    if trigger:
+        g.profile = profiler.start(request.method, request.full_path.rstrip('?'), trigger, task=asyncio.current_task())
+
+
+@quart_app.after_request
+async def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None and profiler.stop(profile, response.status_code):
+        response.headers[PROFILE_ID_HEADER] = profile.id
+    return response
+
+
+@quart_app.teardown_request
+async def drop_profile(exc):
+    # Requests that raised skip after_request
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.stop(profile, 500)
+
+
+@quart_app.route('/api/health', methods=['GET'])
+async def health_check():
+    return jsonify({'status': 'healthy', 'message': 'API is running'})
+
+
+@quart_app.route('/api/auth/me', methods=['GET'])
+@login_required
+async def get_current_user():
+    try:
+        user = await current_user()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        return jsonify({'success': True, 'user': user.to_dict()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def store_feedback(db_session, feedback):
+    """Sync half of submission, run on the async session's connection"""
+    original = add_feedback(feedback, db_session)
+    if original is not None and flask_app.config['DEDUP_MODE'] == 'collapse':
+        return original
+    record_terms([feedback], db_session=db_session)
+    record_stats([feedback], db_session=db_session)
+    return original
+
+
+async def store_and_commit(feedback):
+    """Store one submission in its own transaction; the original it duplicates, or None"""
+    async with async_session() as db_session:
+        if write_lock is not None:
+            await write_lock.acquire()
+        try:
+            original = await db_session.run_sync(store_feedback, feedback)
+            if original is None or flask_app.config['DEDUP_MODE'] != 'collapse':
+                await db_session.commit()
+            return original
+        finally:
+            if write_lock is not None:
+                write_lock.release()
+
+
+@quart_app.route('/api/feedback', methods=['POST'])
+@login_required
+@rate_limited('submit')
+@idempotent
+@analysis_slot
+async def submit_feedback():
+    try:
+        user = await current_user()
+        try:
+            fields = submission_fields(await request.get_json(), user)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        analysis = await analyze(fields['feedback_text'])
+        feedback = Feedback(**fields)
+        # Interns new suggestion texts through the sync engine
+        await in_app_context(apply_analysis, feedback, analysis)
+
+        if submission_queue is not None:
+            try:
+                # Timing out cancels the queued submission, unless the writer has already taken it
+                original = await asyncio.wait_for(asyncio.wrap_future(submission_queue.submit(feedback)),
+                                                  flask_app.config['GROUP_COMMIT_TIMEOUT_SECONDS'])
+            except QueueFull:
+                return jsonify({'error': 'Too many submissions in progress, please try again shortly'}), 503, {'Retry-After': '1'}
+            except TimeoutError:
+                return jsonify({'error': SUBMISSION_TIMEOUT_ERROR}), 503, {'Retry-After': '5'}
+        else:
+            original = await store_and_commit(feedback)
+        if original is not None and flask_app.config['DEDUP_MODE'] == 'collapse':
+            return jsonify({
+                'success': True,
+                'duplicate': True,
+                'feedback': (await feedback_dicts([original], True))[0],
+                'message': 'Similar feedback was already submitted'
+            }), 200
+        # Spike alerts are written through the sync engine
+        await in_app_context(observe_feedback, [feedback])
+
+        # Send alert if urgent (once per original, not for duplicates)
+        if feedback.is_urgent and original is None:
+            try:
+                alert_system.send_alert(feedback)
+            except Exception as e:
+                print(f"Error sending alert: {e}")
+
+        return jsonify({
+            'success': True,
+            'duplicate': original is not None,
+            'feedback': (await feedback_dicts([feedback], True))[0],
+            'message': 'Feedback submitted successfully'
+        }), 201
+
+    except Exception as e:
+        import traceback
+        print(f"Error in submit_feedback: {traceback.format_exc()}")
+        return jsonify({
+            'error': str(e),
+            'message': 'An error occurred while processing your feedback. Please try again.'
+        }), 500
+
+
+@quart_app.route('/api/feedback', methods=['GET'])
+@login_required
+async def get_feedback():
+    try:
+        async with reading_session() as db_session:
+            user = await db_session.get(User, session['user_id'])
+            # The hot cache syncs with blocking queries now and then, so it is read off the event loop
+            feedbacks = await in_app_context(cached_feedback_list, user, request.args)
+            if feedbacks is None:
+                feedbacks = (await db_session.execute(feedback_list_statement(user, request.args))).scalars().all()
+        # Archive files are read with blocking I/O
+        since, limit = list_window(request.args)
+        if list_includes_archives(request.args):
+            feedbacks = await in_app_context(with_archives, feedbacks, scope_filters(user, request.args),
+                                             since, limit, list_before(request.args))
+        expand = request.args.get('expand_suggestions', 'true').lower() != 'false'
+
+        return jsonify({
+            'success': True,
+            'feedbacks': await feedback_dicts(feedbacks, expand),
+            'count': len(feedbacks),
+            # A full page may have more rows after it
+            'next_before': list_cursor(feedbacks[-1]) if limit and len(feedbacks) == limit else None
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@quart_app.route('/api/feedback/urgent', methods=['GET'])
+@admin_required
+async def get_urgent_feedback():
+    try:
+        async with reading_session() as db_session:
+            urgent_feedbacks = (await db_session.execute(
+                db.select(Feedback).filter_by(is_urgent=True).order_by(Feedback.timestamp.desc())
+            )).scalars().all()
+            spike_alerts = (await db_session.execute(recent_spike_alert_statement())).scalars().all()
+        expand = request.args.get('expand_suggestions', 'true').lower() != 'false'
+
+        return jsonify({
+            'success': True,
+            'feedbacks': await feedback_dicts(urgent_feedbacks, expand),
+            'count': len(urgent_feedbacks),
+            'spike_alerts': [a.to_dict() for a in spike_alerts],
+            'spike_count': len(spike_alerts)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+flask_asgi = WsgiToAsgi(flask_app)
+
+
+class RequestThreadContext(ThreadSensitiveContext):
+    """
+    ThreadSensitiveContext whose exit does not wait for the WSGI thread.
+    asgiref's waits on the event loop, so a request that ends while its
+    thread still needs the loop (a client hanging up mid-response) would
+    block every other request on the worker for good.
+    """
+
+    async def __aexit__(self, exc, value, tb):
+        if not self.token:
+            return
+        executor = SyncToAsync.context_to_thread_executor.pop(self, None)
+        if executor:
+            executor.shutdown(wait=False)
+        SyncToAsync.thread_sensitive_context.reset(self.token)
+
+
+async def application(scope, receive, send):
+    """Route ported endpoints (and lifespan events) to Quart, the rest to Flask"""
+    if scope['type'] == 'http' and (scope['method'], scope['path']) not in ASYNC_ROUTES:
+        # Each request gets its own WSGI thread; without a context asgiref
+        # shares one thread across connections and refuses nested use of it
+        async with RequestThreadContext():
+            await flask_asgi(scope, receive, send)
+    else:
+        await quart_app(scope, receive, send)
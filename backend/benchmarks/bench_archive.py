@@ -0,0 +1,119 @@
+"""
+Archive old semesters (`flask archive-feedback`) of a multi-year feedback
+history and compare database size and request times before and after:
+recent-window lists and analytics, which no longer scan archived rows, and
+all-time analytics, which read the archived summary instead
+
+Usage: python benchmarks/bench_archive.py [rows] [years]
+
+Seeds a fresh SQLite database in a temporary directory with synthetic
+feedback spread evenly over the last `years` years; RETENTION_SEMESTERS
+defaults to 2. The hot cache is turned off so the database path is timed.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+workdir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(workdir, 'archives')
+os.environ.setdefault('RETENTION_SEMESTERS', '2')
+os.environ.setdefault('STREAM_STATS_DIR', '')
+os.environ['HOT_CACHE_ROWS'] = '0'
+
+import app as backend
+
+CATEGORIES = ['teaching_style', 'course_content', 'infrastructure', 'assessment', 'student_support', 'general']
+SENTIMENTS = ['positive', 'neutral', 'negative']
+PHRASES = ['The lectures move too fast', 'Lab equipment is outdated', 'Great explanations in class',
+           'Assignments are due too close together', 'The wifi in the library keeps dropping',
+           'More practice problems would help', 'Office hours are really useful']
+
+
+def seed(rows, years, chunk=50_000):
+    random.seed(42)
+    now = datetime.utcnow()
+    step = years * 365 * 86400 / rows
+    feedback = backend.Feedback.__table__
+    with backend.db.engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = []
+            for n in range(start, min(start + chunk, rows)):
+                instructor = random.randrange(200)
+                batch.append({
+                    'student_id': f"S{random.randrange(20000)}",
+                    'course_id': f"C{instructor % 40}",
+                    'class_name': f"K{instructor % 50}",
+                    'instructor_id': str(instructor),
+                    'feedback_type': random.choice(['campus', 'faculty']),
+                    'feedback_text': f"{random.choice(PHRASES)}. {random.choice(PHRASES).lower()} ({n})",
+                    'category': random.choice(CATEGORIES),
+                    'sentiment': random.choice(SENTIMENTS),
+                    'sentiment_score': round(random.uniform(-1, 1), 3),
+                    'is_urgent': random.random() < 0.02,
+                    'suggestion_ids': random.choice([None, '1', '2,3', '1,4']),
+                    'timestamp': now - timedelta(seconds=(rows - n) * step)
+                })
+            conn.execute(feedback.insert(), batch)
+            print(f"\rseeded {min(start + chunk, rows):,} rows", end='', flush=True)
+    print()
+
+
+def latency(client, url, repeat=5):
+    client.get(url)  # warm up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        response = client.get(url)
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert response.status_code == 200, response.data
+    return statistics.median(samples)
+
+
+URLS = ['/api/feedback?days=30&limit=50&course_id=C7', '/api/feedback/analytics?days=30',
+        '/api/feedback/analytics?course_id=C7', '/api/feedback/analytics', '/api/feedback/urgent']
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    years = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with backend.app.app_context():
+        backend.db.create_all()
+        admin = backend.User(username='admin', role='admin')
+        admin.set_password('bench')
+        backend.db.session.add(admin)
+        backend.db.session.commit()
+        seed(rows, years)
+        size_before, _ = backend.database_size()
+
+    client = backend.app.test_client()
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'bench'})
+    before = {url: latency(client, url) for url in URLS}
+
+    with backend.app.app_context():
+        t0 = time.perf_counter()
+        report = backend.archive_feedback(backend.retention_cutoff(), log=lambda line: None)
+        elapsed = time.perf_counter() - t0
+        archived = sum(r for r, _ in report.values())
+        file_bytes = sum(b for _, b in report.values())
+        with backend.db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql('VACUUM')
+        size_after, _ = backend.database_size()
+        remaining = backend.Feedback.query.count()
+    print(f"archived {archived:,} rows from {len(report)} semesters in {elapsed:.1f} s "
+          f"({archived / elapsed:,.0f} rows/s); {remaining:,} rows left in the feedback table")
+    print(f"database {size_before / 2**20:.1f} MiB -> {size_after / 2**20:.1f} MiB after VACUUM; "
+          f"archives {file_bytes / 2**20:.1f} MiB")
+
+    for url in URLS:
+        print(f"{url:48s} before {before[url]:9.1f} ms   after {latency(client, url):9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
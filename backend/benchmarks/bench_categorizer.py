@@ -0,0 +1,97 @@
+"""
+Compare keyword and TF-IDF model categorization: held-out accuracy and throughput
+
+Usage: python benchmarks/bench_categorizer.py [labeled.csv] [rows]
+
+The CSV needs a text column (feedback_text, feedback or text) and a category
+column. Without one, labeled texts are generated that mix listed keywords
+with paraphrases the keyword lists don't contain.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pandas as pd
+
+from services.nlp_engine import NLPEngine
+from services.text_classifier import HashedTfidfClassifier
+
+PARAPHRASES = {
+    'teaching_style': ['goes too quickly', 'hard to follow', 'talks fast', 'boring slides', 'examples help',
+                       'reads from notes', 'voice is low', 'skips steps', 'explains well'],
+    'course_content': ['outdated topics', 'too much theory', 'more practicals', 'units overlap', 'reading list',
+                       'coding problems', 'case studies', 'portion is heavy'],
+    'infrastructure': ['fans not working', 'ac broken', 'power cuts', 'benches are broken', 'network is down',
+                       'no drinking water', 'washrooms dirty', 'mic is faulty', 'systems crash'],
+    'assessment': ['marked unfairly', 'results delayed', 'papers not returned', 'rechecking', 'internals',
+                   'answer key', 'weightage unclear', 'viva was strict'],
+    'student_support': ['no one replies', 'cannot reach sir', 'hard to meet', 'doubts ignored', 'nobody guides',
+                        'counsellor busy', 'mentor absent', 'extra classes needed'],
+}
+FILLER = ['the', 'class', 'really', 'very', 'this', 'semester', 'we', 'our', 'is', 'are', 'always', 'sometimes',
+          'week', 'today', 'please', 'it', 'and', 'but', 'also', 'quite']
+
+
+def synthesize(count, seed=3):
+    engine = NLPEngine()
+    random.seed(seed)
+    texts, labels = [], []
+    for _ in range(count):
+        category = random.choice(list(PARAPHRASES))
+        words = random.sample(FILLER, random.randint(3, 8))
+        words += random.sample(PARAPHRASES[category], random.randint(1, 2))
+        if random.random() < 0.5:
+            words.append(random.choice(engine.category_keywords[category]))
+        if random.random() < 0.3:
+            # Off-topic keyword, the kind that makes keyword counting tie or misfire
+            other = random.choice([c for c in PARAPHRASES if c != category])
+            words.append(random.choice(engine.category_keywords[other]))
+        random.shuffle(words)
+        texts.append(' '.join(words))
+        labels.append(category)
+    return texts, labels
+
+
+def load_csv(path):
+    df = pd.read_csv(path)
+    df.columns = [str(c).lower().strip() for c in df.columns]
+    text_column = next(c for c in ['feedback_text', 'feedback', 'text'] if c in df.columns)
+    df = df[df[text_column].notna() & df['category'].notna()].sample(frac=1, random_state=3)
+    return df[text_column].astype(str).tolist(), df['category'].astype(str).tolist()
+
+
+def accuracy(predicted, labels):
+    return sum(p == l for p, l in zip(predicted, labels)) / len(labels)
+
+
+def main():
+    args = sys.argv[1:]
+    if args and not args[0].isdigit():
+        texts, labels = load_csv(args.pop(0))
+    else:
+        texts, labels = synthesize(int(args[0]) if args else 20_000)
+    split = int(len(texts) * 0.8)
+    train_texts, train_labels = texts[:split], labels[:split]
+    test_texts, test_labels = texts[split:], labels[split:]
+
+    t0 = time.perf_counter()
+    classifier = HashedTfidfClassifier.train(train_texts, train_labels)
+    print(f"Trained on {len(train_texts):,} rows in {time.perf_counter() - t0:.1f} s")
+
+    keyword_engine = NLPEngine()
+    model_engine = NLPEngine(classifier=classifier)
+    for label, run in [('keyword', lambda: [keyword_engine.categorize_feedback(t) for t in test_texts]),
+                       ('model, per text', lambda: [model_engine.categorize_feedback(t) for t in test_texts]),
+                       ('model, batch', lambda: model_engine.categorize_batch(test_texts))]:
+        t0 = time.perf_counter()
+        predicted = run()
+        elapsed = time.perf_counter() - t0
+        print(f"  {label:16s} accuracy {accuracy(predicted, test_labels):6.1%}  "
+              f"{len(test_texts) / elapsed:>10,.0f} texts/s")
+
+
+if __name__ == '__main__':
+    main()
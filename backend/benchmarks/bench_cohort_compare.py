@@ -0,0 +1,119 @@
+"""
+Time cohort comparisons (GET /api/feedback/compare) for many groups over a
+large feedback history, read from the cohort_stats rollup, against one
+grouped scan of the feedback table computing the same counts and means
+(no medians)
+
+Usage: python benchmarks/bench_cohort_compare.py [rows] [groups] [days]
+
+Seeds a fresh SQLite database in a temporary directory with synthetic
+feedback spread evenly over the last `days` days; seeding 1M rows takes a
+minute or two.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+import app as backend
+from services.cohort_stats import count_stats
+from services.term_trends import day_number
+
+CATEGORIES = ['teaching_style', 'course_content', 'infrastructure', 'assessment', 'student_support', 'general']
+SENTIMENTS = ['positive', 'neutral', 'negative']
+
+
+def seed(rows, groups, days, chunk=50_000):
+    random.seed(42)
+    now = datetime.utcnow()
+    feedback = backend.Feedback.__table__
+    stat = backend.CohortStat.__table__
+    with backend.db.engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = []
+            for n in range(start, min(start + chunk, rows)):
+                instructor = random.randrange(groups)
+                batch.append({
+                    'student_id': f"S{n % 5000}",
+                    'course_id': f"C{instructor % (groups // 5 or 1)}",
+                    'class_name': f"K{instructor % 50}",
+                    'instructor_id': str(instructor),
+                    'feedback_text': 'x',
+                    'category': random.choice(CATEGORIES),
+                    'sentiment': random.choice(SENTIMENTS),
+                    'sentiment_score': round(max(-1.0, min(1.0, random.gauss(0.1 + instructor % 7 / 20, 0.35))), 2),
+                    'is_urgent': random.random() < 0.02,
+                    'timestamp': now - timedelta(seconds=random.uniform(0, days * 86400))
+                })
+            conn.execute(feedback.insert(), batch)
+            # What record_stats adds at ingestion; merged per chunk with the same upsert
+            stats = count_stats((row['timestamp'], row, row['sentiment_score'], row['is_urgent']) for row in batch)
+            insert = backend.sqlite.insert(stat)
+            conn.execute(insert.on_conflict_do_update(
+                index_elements=['dimension', 'value', 'score_bin', 'day'],
+                set_={column: stat.c[column] + insert.excluded[column]
+                      for column in ('count', 'score_sum', 'score_sq_sum', 'urgent')}
+            ), [{'dimension': d, 'value': v, 'score_bin': b, 'day': day, 'count': c, 'score_sum': s,
+                 'score_sq_sum': sq, 'urgent': u} for (d, v, b, day), (c, s, sq, u) in stats.items()])
+            print(f"\rseeded {min(start + chunk, rows):,} rows", end='', flush=True)
+    print()
+
+
+def raw_scan(group_by, start):
+    # The one-pass alternative: group the feedback table itself
+    column = getattr(backend.Feedback, group_by)
+    return backend.db.session.query(
+        column,
+        backend.db.func.count(),
+        backend.db.func.avg(backend.Feedback.sentiment_score),
+        backend.db.func.sum(backend.db.case((backend.Feedback.is_urgent, 1), else_=0))
+    ).filter(backend.Feedback.timestamp >= start, backend.Feedback.duplicate_of.is_(None)).group_by(column).all()
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    groups = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 365
+
+    with backend.app.app_context():
+        backend.db.create_all()
+        seed(rows, groups, days)
+        rollup_rows = backend.CohortStat.query.count()
+        print(f"{rows:,} feedback rows, {groups} instructors, {days} days; {rollup_rows:,} rollup rows (all dimensions)")
+
+        end_day = day_number(datetime.utcnow())
+        start_day = end_day - days
+        for group_by, bucket, limit in [('instructor_id', 'all', 1000), ('instructor_id', 'week', 50),
+                                        ('instructor_id', 'month', 100), ('instructor_id', 'week', 1000),
+                                        ('course_id', 'all', 1000), ('category', 'week', 1000)]:
+            def cold():
+                backend.compare_cache.clear()
+                return backend.compare_groups(group_by, start_day, end_day, bucket, limit=limit)
+            elapsed, (total, page) = timed(cold)
+            cached, _ = timed(lambda: backend.compare_groups(group_by, start_day, end_day, bucket, limit=limit))
+            print(f"rollup   {group_by:14s} bucket={bucket:6s} {total:5d} groups, {len(page):4d} returned  "
+                  f"{elapsed * 1000:8.1f} ms  (cached {cached * 1000:.2f} ms)")
+        start = datetime.utcnow() - timedelta(days=days + 1)
+        for group_by in ['instructor_id', 'course_id']:
+            elapsed, result = timed(lambda: raw_scan(group_by, start))
+            print(f"raw scan {group_by:14s} bucket=all    {len(result):5d} groups, {len(result):4d} returned  "
+                  f"{elapsed * 1000:8.1f} ms  (no medians)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Mixed read/write throughput on SQLite with default connection settings and
+with the tuned profile (WAL, synchronous=NORMAL, busy_timeout, cache and
+mmap pragmas, sized pool)
+
+Usage: python benchmarks/bench_db_concurrency.py [readers] [writers] [seconds]
+
+Each reader and writer is a separate process, like gunicorn workers. Readers
+run dashboard queries (latest feedback for a course, category counts);
+writers insert one feedback row per transaction.
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import app as backend
+from services.db_config import engine_options, install_sqlite_pragmas, sqlite_pragmas
+
+Feedback = backend.Feedback
+COURSES = [f"CS{n}" for n in range(10)]
+CATEGORIES = ['teaching_style', 'course_content', 'infrastructure', 'assessment', 'student_support', 'general']
+
+
+def make_engine(url, profile):
+    if profile == 'default':
+        return create_engine(url)
+    engine = create_engine(url, **engine_options(url))
+    install_sqlite_pragmas(engine, sqlite_pragmas())
+    return engine
+
+
+def make_row(n):
+    return Feedback(student_id=f"S{n % 500}", course_id=random.choice(COURSES), feedback_text=f"Feedback number {n}",
+                    category=random.choice(CATEGORIES), sentiment='neutral', sentiment_score=0.0,
+                    suggestion_ids='', is_urgent=False)
+
+
+def reader(url, profile, seconds, results):
+    engine = make_engine(url, profile)
+    done, errors = 0, 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        course = random.choice(COURSES)
+        try:
+            with Session(engine) as session:
+                session.execute(select(Feedback).filter_by(course_id=course)
+                                .order_by(Feedback.timestamp.desc()).limit(50)).scalars().all()
+                session.execute(select(Feedback.category, func.count()).filter_by(course_id=course)
+                                .group_by(Feedback.category)).all()
+            done += 1
+        except OperationalError:
+            errors += 1
+    results.put(('read', done, errors))
+
+
+def writer(url, profile, seconds, results):
+    engine = make_engine(url, profile)
+    done, errors = 0, 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            with Session(engine) as session:
+                session.add(make_row(done))
+                session.commit()
+            done += 1
+        except OperationalError:
+            errors += 1
+    results.put(('write', done, errors))
+
+
+def run(profile, readers, writers, seconds):
+    url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = make_engine(url, profile)
+    backend.db.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([make_row(n) for n in range(20_000)])
+        session.commit()
+    engine.dispose()
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=reader, args=(url, profile, seconds, results)) for _ in range(readers)]
+    processes += [multiprocessing.Process(target=writer, args=(url, profile, seconds, results)) for _ in range(writers)]
+    for process in processes:
+        process.start()
+    totals = {'read': [0, 0], 'write': [0, 0]}
+    for _ in processes:
+        kind, done, errors = results.get()
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    for process in processes:
+        process.join()
+
+    print(f"{profile:8s} reads {totals['read'][0] / seconds:8.0f}/s  writes {totals['write'][0] / seconds:7.0f}/s  "
+          f"'database is locked' errors: {totals['read'][1]} reads, {totals['write'][1]} writes")
+
+
+def main():
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    print(f"{readers} reader and {writers} writer processes, {seconds:g} s, 20,000 seeded rows")
+    for profile in ['default', 'tuned']:
+        run(profile, readers, writers, seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare per-submission commits with the group commit queue: sustained rows
+per second and per-submission latency for concurrent submitters writing
+already analyzed feedback (analysis is left out to isolate the write path)
+
+Usage: python benchmarks/bench_group_commit.py [threads] [rows per thread]
+
+Runs against a fresh SQLite database in a temporary directory.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+import app as backend
+from services.group_commit import GroupCommitQueue
+
+SUBJECTS = ['The lectures', 'The lab sessions', 'The wifi', 'The assignments', 'The grading', 'The projector']
+COMMENTS = ['are too fast', 'were helpful', 'is broken', 'need more examples', 'is unfair', 'keeps failing']
+
+
+def make_feedback(thread, n):
+    text = f"{SUBJECTS[n % len(SUBJECTS)]} {COMMENTS[(n // 6) % len(COMMENTS)]}, thread {thread} row {n}"
+    return backend.Feedback(student_id=f"S{thread}", course_id=f"CS{n % 5}", feedback_text=text,
+                            category='general', sentiment='neutral', sentiment_score=0.0, suggestion_ids='',
+                            is_urgent=False)
+
+
+def commit_directly(feedback):
+    # What submit_feedback does without GROUP_COMMIT
+    with backend.app.app_context():
+        backend.add_feedback(feedback)
+        backend.record_terms([feedback])
+        backend.db.session.commit()
+
+
+def run(label, store, threads, rows):
+    latencies = []
+    lock = threading.Lock()
+
+    def submitter(index):
+        mine = []
+        for n in range(rows):
+            feedback = make_feedback(index, n)
+            t0 = time.perf_counter()
+            store(feedback)
+            mine.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=submitter, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    print(f"{label:22s} {len(latencies) / elapsed:8.0f} rows/s  p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.1f} ms")
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with backend.app.app_context():
+        backend.db.create_all()
+
+    print(f"{threads} threads x {rows} rows")
+    run('commit per submission', commit_directly, threads, rows)
+    for max_batch, max_wait in [(100, 0.002), (100, 0.01)]:
+        queue = GroupCommitQueue(backend.commit_submissions, max_batch=max_batch, max_wait=max_wait)
+        run(f"group commit {max_wait * 1000:g} ms", lambda f: queue.submit(f).result(), threads, rows)
+
+
+if __name__ == '__main__':
+    main()
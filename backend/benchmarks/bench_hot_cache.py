@@ -0,0 +1,135 @@
+"""
+Memory and latency of the hot feedback cache (HOT_CACHE_ROWS): bytes held
+per 100k rows against the same rows as ORM objects, and GET /api/feedback
+and /api/feedback/analytics recent-window requests served from the cache
+against the database path
+
+Usage: python benchmarks/bench_hot_cache.py [rows] [cache_rows]
+
+Seeds a fresh SQLite database in a temporary directory with synthetic
+feedback over the last year, newest ids newest; seeding 1M rows takes a
+minute or two.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+os.environ.setdefault('STREAM_STATS_DIR', '')
+if len(sys.argv) > 2:
+    os.environ['HOT_CACHE_ROWS'] = sys.argv[2]
+
+import app as backend
+
+CATEGORIES = ['teaching_style', 'course_content', 'infrastructure', 'assessment', 'student_support', 'general']
+SENTIMENTS = ['positive', 'neutral', 'negative']
+PHRASES = ['The lectures move too fast', 'Lab equipment is outdated', 'Great explanations in class',
+           'Assignments are due too close together', 'The wifi in the library keeps dropping',
+           'More practice problems would help', 'Office hours are really useful']
+
+
+def seed(rows, days=365, chunk=50_000):
+    random.seed(42)
+    now = datetime.utcnow()
+    step = days * 86400 / rows
+    feedback = backend.Feedback.__table__
+    with backend.db.engine.begin() as conn:
+        for start in range(0, rows, chunk):
+            batch = []
+            for n in range(start, min(start + chunk, rows)):
+                instructor = random.randrange(200)
+                batch.append({
+                    'student_id': f"S{random.randrange(20000)}",
+                    'course_id': f"C{instructor % 40}",
+                    'class_name': f"K{instructor % 50}",
+                    'instructor_id': str(instructor),
+                    'feedback_type': random.choice(['campus', 'faculty']),
+                    'feedback_text': f"{random.choice(PHRASES)}. {random.choice(PHRASES).lower()} ({n})",
+                    'category': random.choice(CATEGORIES),
+                    'sentiment': random.choice(SENTIMENTS),
+                    'sentiment_score': round(random.uniform(-1, 1), 3),
+                    'is_urgent': random.random() < 0.02,
+                    'suggestion_ids': random.choice([None, '1', '2,3', '1,4']),
+                    'timestamp': now - timedelta(seconds=(rows - n) * step + random.uniform(0, step))
+                })
+            conn.execute(feedback.insert(), batch)
+            print(f"\rseeded {min(start + chunk, rows):,} rows", end='', flush=True)
+    print()
+
+
+def measure(fn):
+    """(result, bytes still allocated by fn's result)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def latency(client, url, cached, repeat=20):
+    """Median milliseconds of GET url with the hot cache on or off"""
+    cache = backend.hot_cache
+    if not cached:
+        backend.hot_cache = None
+    try:
+        client.get(url)  # warm up
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            response = client.get(url)
+            samples.append((time.perf_counter() - t0) * 1000)
+            assert response.status_code == 200, response.data
+        return statistics.median(samples), response.get_json()
+    finally:
+        backend.hot_cache = cache
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    capacity = backend.app.config['HOT_CACHE_ROWS']
+
+    with backend.app.app_context():
+        backend.db.create_all()
+        admin = backend.User(username='admin', role='admin')
+        admin.set_password('bench')
+        backend.db.session.add(admin)
+        for n, text in enumerate(['Practice problems', 'Slower pace', 'Update lab', 'Spread deadlines'], 1):
+            backend.db.session.add(backend.Suggestion(id=n, text=text))
+        backend.db.session.commit()
+        seed(rows)
+
+        _, cache_bytes = measure(backend.sync_hot_cache)
+        backend.hot_cache_generation = None  # Forces a full reload, timed without tracemalloc
+        t0 = time.perf_counter()
+        backend.sync_hot_cache()
+        load_seconds = time.perf_counter() - t0
+        print(f"hot cache: {backend.hot_cache.size:,} rows loaded in {load_seconds:.2f} s, "
+              f"{cache_bytes / backend.hot_cache.size * 100_000 / 2**20:.1f} MiB per 100k rows "
+              f"(tracemalloc), {backend.hot_cache.memory_bytes() / backend.hot_cache.size * 100_000 / 2**20:.1f} MiB "
+              f"estimated by memory_bytes")
+        newest = backend.db.select(backend.Feedback).order_by(backend.Feedback.id.desc()).limit(capacity)
+        orm_rows, orm_bytes = measure(lambda: backend.db.session.execute(newest).scalars().all())
+        print(f"ORM objects: {orm_bytes / len(orm_rows) * 100_000 / 2**20:.1f} MiB per 100k rows")
+        del orm_rows
+        backend.db.session.expunge_all()
+
+    client = backend.app.test_client()
+    client.post('/api/auth/login', json={'username': 'admin', 'password': 'bench'})
+    for url in ['/api/feedback?limit=50', '/api/feedback?limit=50&course_id=C7',
+                '/api/feedback?days=1&class_name=K3', '/api/feedback/analytics?days=7',
+                '/api/feedback/analytics?days=7&instructor_id=12', '/api/feedback/analytics?days=30&course_id=C7']:
+        cache_ms, cached = latency(client, url, cached=True)
+        db_ms, uncached = latency(client, url, cached=False)
+        assert cached.keys() == uncached.keys()
+        print(f"{url:52s} cache {cache_ms:8.2f} ms   database {db_ms:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
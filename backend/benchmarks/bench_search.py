@@ -0,0 +1,85 @@
+"""
+Benchmark full-text search latency on a synthetic feedback table
+
+Usage: python benchmarks/bench_search.py [rows]
+"""
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.search import SEARCH_INDEX_DDL, build_match_query, highlight, make_snippet, scoped_match
+
+# Zipf-distributed filler vocabulary plus domain words at realistic rates
+FILLER = [f"w{i}" for i in range(20_000)]
+FILLER_CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(FILLER))))
+DOMAIN_WORDS = {
+    'lecture': 0.08, 'lab': 0.05, 'wifi': 0.02, 'projector': 0.005, 'slow': 0.03, 'unclear': 0.02,
+    'confusing': 0.01, 'grading': 0.02, 'graded': 0.01, 'pace': 0.02, 'library': 0.01
+}
+
+QUERIES = ['projector', '"lab wifi"', 'unclear OR confusing', 'grad*', 'slow lecture pace', 'lecture']
+
+
+def populate(conn, count):
+    conn.execute("""CREATE TABLE feedback (
+        id INTEGER PRIMARY KEY, instructor_id VARCHAR(100), course_id VARCHAR(100), class_name VARCHAR(100),
+        feedback_type VARCHAR(50), feedback_text TEXT NOT NULL)""")
+    for statement in SEARCH_INDEX_DDL:
+        conn.execute(statement)
+    random.seed(7)
+    batch = []
+    for i in range(1, count + 1):
+        words = random.choices(FILLER, cum_weights=FILLER_CUM_WEIGHTS, k=random.randint(8, 30))
+        words += [word for word, rate in DOMAIN_WORDS.items() if random.random() < rate]
+        random.shuffle(words)
+        text = ' '.join(words)
+        batch.append((i, str(i % 200), f"CS{i % 40}", f"Section {i % 7}", 'campus', text))
+        if len(batch) == 10_000:
+            conn.executemany("INSERT INTO feedback VALUES (?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    conn.executemany("INSERT INTO feedback VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    path = os.path.join(tempfile.mkdtemp(), 'search_bench.db')
+    conn = sqlite3.connect(path)
+    t0 = time.perf_counter()
+    populate(conn, count)
+    print(f"Indexed {count:,} rows in {time.perf_counter() - t0:.1f} s")
+
+    # Same shapes as /api/feedback/search: BM25 over every match, or over the newest SEARCH_RANK_WINDOW=5000
+    ranked = """SELECT rowid, rank FROM feedback_fts WHERE feedback_fts MATCH ? AND rank MATCH 'bm25(1.0, 0.0)'
+        ORDER BY rank, rowid LIMIT 21"""
+    windowed = """SELECT m.id, m.score FROM (
+            SELECT rowid AS id, bm25(feedback_fts, 1.0, 0.0) AS score
+            FROM feedback_fts WHERE feedback_fts MATCH ? ORDER BY rowid DESC LIMIT 5000
+        ) m ORDER BY m.score, m.id LIMIT 21"""
+    recent = """SELECT rowid, NULL FROM feedback_fts WHERE feedback_fts MATCH ? ORDER BY rowid DESC LIMIT 21"""
+    for label, statement, scope in [
+            ('admin, rank', ranked, {}),
+            ('admin, window', windowed, {}),
+            ('admin, recent', recent, {}),
+            ('faculty, rank', ranked, {'instructor_id': '17'}),
+            ('faculty, recent', recent, {'instructor_id': '17'}),
+            ('class, rank', ranked, {'instructor_id': '17', 'class_name': 'Section 3'})]:
+        for query in QUERIES:
+            match = build_match_query(query)
+            t0 = time.perf_counter()
+            rows = conn.execute(statement, (scoped_match(match, scope),)).fetchall()
+            ids = [row[0] for row in rows]
+            texts = conn.execute(f"SELECT feedback_text FROM feedback WHERE id IN ({','.join('?' * len(ids))})",
+                                 ids).fetchall()
+            [highlight(make_snippet(text, match)) for text, in texts]
+            print(f"  {label:16s} {query:22s} {(time.perf_counter() - t0) * 1000:8.1f} ms  {len(rows)} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare the full (VADER + TextBlob), fast (merged lexicon) and auto sentiment
+modes: agreement with the full combined score and per-text latency
+
+Usage: python benchmarks/bench_sentiment.py [feedback.csv] [rows]
+
+The CSV needs a feedback text column (feedback_text, feedback or text).
+Without one, feedback-like sentences are generated.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pandas as pd
+
+from services.sentiment_analyzer import SentimentAnalyzer
+
+SUBJECTS = ['the lectures', 'the professor', 'the lab sessions', 'the course material', 'the assignments',
+            'the wifi in the library', 'the grading', 'the mentor', 'the exams', 'the projector', 'this class']
+VERBS = ['are', 'is', 'were', 'was', 'seem', 'feel']
+MODIFIERS = ['', '', '', 'very', 'really', 'extremely', 'quite', 'too', 'not', 'never', 'not very', 'kind of',
+             'somewhat', 'absolutely', 'hardly']
+ADJECTIVES = ['good', 'clear', 'boring', 'helpful', 'slow', 'confusing', 'excellent', 'bad', 'poor', 'great',
+              'useful', 'difficult', 'interesting', 'unclear', 'amazing', 'terrible', 'fine', 'okay', 'fast',
+              'organized', 'unfair', 'engaging', 'outdated', 'friendly', 'rude', 'late', 'broken', 'easy']
+TAILS = ['', '', '.', '!', '!!', ' and I learned a lot', ' so I could not follow', ' which helps', ' no complaints',
+         ' please fix it', ' most of the time']
+
+
+def clause():
+    return f"{random.choice(SUBJECTS)} {random.choice(VERBS)} {random.choice(MODIFIERS)} {random.choice(ADJECTIVES)}"
+
+
+def synthesize(count, seed=5):
+    random.seed(seed)
+    texts = []
+    for _ in range(count):
+        text = clause()
+        if random.random() < 0.4:
+            text += random.choice([' but ', ' and ', '. ', ', although ']) + clause()
+        texts.append((text + random.choice(TAILS)).replace('  ', ' ').capitalize())
+    return texts
+
+
+def load_csv(path):
+    df = pd.read_csv(path)
+    df.columns = [str(c).lower().strip() for c in df.columns]
+    column = next(c for c in ['feedback_text', 'feedback', 'text'] if c in df.columns)
+    return df[column].dropna().astype(str).tolist()
+
+
+def main():
+    args = sys.argv[1:]
+    texts = load_csv(args.pop(0)) if args and not args[0].isdigit() else synthesize(int(args[0]) if args else 5_000)
+
+    results = {}
+    for mode in ['full', 'fast', 'auto']:
+        analyzer = SentimentAnalyzer(mode=mode)
+        analyzer.analyze('warm up')
+        t0 = time.perf_counter()
+        results[mode] = [analyzer.analyze(text) for text in texts]
+        elapsed = time.perf_counter() - t0
+        print(f"{mode:5s} {elapsed / len(texts) * 1e6:8.1f} us/text")
+
+    full = results['full']
+    for mode in ['fast', 'auto']:
+        errors = sorted(abs(a['score'] - b['score']) for a, b in zip(results[mode], full))
+        agree = sum(a['sentiment'] == b['sentiment'] for a, b in zip(results[mode], full)) / len(texts)
+        fallbacks = sum(r.get('mode') == 'full' for r in results[mode]) / len(texts)
+        print(f"{mode:5s} score error mean {statistics.mean(errors):.3f}  p95 {errors[int(len(errors) * 0.95)]:.3f}  "
+              f"max {errors[-1]:.3f}  label agreement {agree:.1%}  full-pipeline fallbacks {fallbacks:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark JSON serialization and response compression for a large feedback list
+
+Usage: python benchmarks/bench_serialization.py [rows]
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import Flask
+
+from services.compression import ResponseCompressor, brotli
+from services.json_provider import FastJSONProvider
+
+SAMPLE_TEXTS = [
+    "The lectures are too fast and the explanations are often unclear",
+    "Great teaching style, the examples really helped me understand",
+    "Lab computers are slow and the wifi keeps dropping during practicals",
+    "Assignments are fair but grading feedback takes too long",
+    "Office hours are helpful, the instructor is always available for doubts",
+    "Course content feels outdated, more practical projects would help",
+]
+SAMPLE_SUGGESTIONS = (
+    "Consider slowing down the pace of lectures; Try to provide more examples and real-world "
+    "applications; Consider using visual aids to enhance understanding"
+)
+
+
+def make_rows(count):
+    random.seed(42)
+    start = datetime(2024, 1, 1)
+    return [{
+        'id': i,
+        'student_id': f"S{i % 5000:05d}",
+        'class_name': random.choice(['DSE-A', 'BTech-CSE-3A', 'MBA-1']),
+        'course_id': f"CS{100 + i % 40}",
+        'instructor_id': str(i % 200),
+        'feedback_type': random.choice(['campus', 'faculty']),
+        'feedback_text': random.choice(SAMPLE_TEXTS),
+        'category': random.choice(['teaching_style', 'course_content', 'infrastructure']),
+        'sentiment': random.choice(['positive', 'negative', 'neutral']),
+        'sentiment_score': round(random.uniform(-1, 1), 3),
+        'timestamp': start + timedelta(minutes=i),
+        'is_urgent': i % 97 == 0,
+        'suggestions': SAMPLE_SUGGESTIONS,
+    } for i in range(count)]
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None or elapsed < best else best
+    return best, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(count)
+    payload = {'success': True, 'feedbacks': rows, 'count': count}
+
+    def baseline():
+        # What the old code did: isoformat in to_dict, then Flask's default provider
+        converted = [dict(r, timestamp=r['timestamp'].isoformat()) for r in rows]
+        body = {'success': True, 'feedbacks': converted, 'count': count}
+        return json.dumps(body, ensure_ascii=True, sort_keys=True).encode('utf-8')
+
+    app = Flask(__name__)
+    fast = FastJSONProvider(app)
+    stdlib = FastJSONProvider(app, backend='stdlib')
+
+    print(f"Rows: {count:,}")
+    results = [('baseline (stdlib, sorted)', *timed(baseline)),
+               ('FastJSONProvider stdlib', *timed(lambda: stdlib.dumps_bytes(payload))),
+               (f"FastJSONProvider {fast.backend}", *timed(lambda: fast.dumps_bytes(payload)))]
+    for name, elapsed, body in results:
+        print(f"  {name:28s} {elapsed * 1000:8.1f} ms  {len(body) / 1e6:7.2f} MB")
+
+    body = results[-1][2]
+    compressor = ResponseCompressor()
+    for encoding in (['gzip', 'br'] if brotli is not None else ['gzip']):
+        elapsed, compressed = timed(lambda: compressor.compress(body, encoding), repeat=1)
+        print(f"  {encoding:28s} {elapsed * 1000:8.1f} ms  {len(compressed) / 1e6:7.2f} MB on the wire")
+    assert gzip.decompress(compressor.compress(body, 'gzip')) == body
+
+
+if __name__ == '__main__':
+    main()
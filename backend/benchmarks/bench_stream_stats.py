@@ -0,0 +1,57 @@
+"""
+Cost and accuracy of the live statistics sketches: per-submission update
+time, summary read time, and percentile / distinct student error against
+exact values computed from the same rows
+
+Usage: python benchmarks/bench_stream_stats.py [rows] [courses]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.streaming_stats import StreamingStats, scope_keys
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    courses = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    random.seed(7)
+    data = []
+    for n in range(rows):
+        course = random.randrange(courses)
+        score = round(max(-1.0, min(1.0, random.gauss(course % 9 / 20 - 0.1, 0.4))), 3)
+        data.append((f"C{course}", f"K{course % 40}", str(course % 60), score, f"S{random.randrange(rows // 4)}"))
+
+    stats = StreamingStats(tempfile.mkdtemp(), snapshot_seconds=0)
+    t0 = time.perf_counter()
+    for course, class_name, instructor, score, student in data:
+        stats.add(scope_keys(course, class_name, instructor), score, student)
+    per_row = (time.perf_counter() - t0) / rows
+    print(f"{rows:,} rows, {courses} courses, {len(stats.scope_names())} scopes: "
+          f"{per_row * 1e6:.1f} us per submission")
+
+    for scope, rows_in in [('all', data), ('course:C0', [r for r in data if r[0] == 'C0'])]:
+        stats.version += 1  # Force a cold summary
+        t0 = time.perf_counter()
+        summary = stats.summary(scope)
+        cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        stats.summary(scope)
+        warm = time.perf_counter() - t0
+        scores = sorted(r[3] for r in rows_in)
+        exact = statistics.quantiles(scores, n=20, method='inclusive')
+        exact = {'p5': exact[0], 'p25': exact[4], 'p50': exact[9], 'p75': exact[14], 'p95': exact[18]}
+        students = len({r[4] for r in rows_in})
+        errors = ', '.join(f"{k} {summary['percentiles'][k] - v:+.4f}" for k, v in exact.items())
+        print(f"{scope:10s} read {cold * 1000:6.2f} ms cold, {warm * 1e6:5.1f} us cached; "
+              f"students {summary['distinct_students']:,} vs {students:,} "
+              f"({(summary['distinct_students'] - students) / students:+.1%}); percentile error {errors}")
+
+
+if __name__ == '__main__':
+    main()
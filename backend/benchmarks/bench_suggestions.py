@@ -0,0 +1,70 @@
+"""
+Benchmark per-feedback suggestion generation
+
+Usage: python benchmarks/bench_suggestions.py [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.suggestion_generator import SuggestionGenerator
+
+SAMPLES = [
+    ("The lectures are too fast and the explanations are often unclear", 'teaching_style', 'negative'),
+    ("Great teaching style, the examples really helped me understand", 'teaching_style', 'positive'),
+    ("Lab computers are slow and the wifi keeps dropping during practicals", 'infrastructure', 'negative'),
+    ("Assignments are difficult and there is a lack of reference material", 'course_content', 'negative'),
+    ("Office hours are boring and the instructor is not available for doubts", 'student_support', 'negative'),
+    ("It was fine overall, nothing in particular to add", 'general', 'neutral'),
+]
+
+ISSUE_PATTERNS = {
+    'pace': ['too fast', 'too slow', 'pace', 'speed'],
+    'clarity': ['unclear', 'confusing', 'not clear', 'difficult to understand'],
+    'engagement': ['boring', 'monotonous', 'not engaging', 'dry'],
+    'resources': ['lack of', 'need more', 'insufficient', 'missing'],
+    'support': ['not available', 'unresponsive', 'no help', 'lack of support']
+}
+
+
+def legacy_generate(generator, feedback_text, category, sentiment):
+    """The substring-check implementation this benchmark compares against"""
+    base_suggestions = generator.category_suggestions.get(category, generator.category_suggestions['general'])
+    sentiment_suggestions = base_suggestions.get(sentiment, base_suggestions.get('neutral', []))
+    text_lower = feedback_text.lower()
+    [issue for issue, patterns in ISSUE_PATTERNS.items() if any(p in text_lower for p in patterns)]
+    contextual = []
+    if 'slow' in text_lower or 'fast' in text_lower:
+        if category == 'teaching_style':
+            contextual.append("Adjust lecture pace based on student feedback")
+    if 'difficult' in text_lower or 'hard' in text_lower:
+        contextual.append("Consider providing additional resources or supplementary materials")
+    if 'boring' in text_lower or 'monotonous' in text_lower:
+        contextual.append("Incorporate interactive activities and engaging teaching methods")
+    if 'unclear' in text_lower or 'confusing' in text_lower:
+        contextual.append("Provide clearer explanations and use more examples")
+    return "; ".join((list(sentiment_suggestions) + contextual)[:5])
+
+
+def per_feedback_us(fn, iterations):
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        for text, category, sentiment in SAMPLES:
+            fn(text, category, sentiment)
+    return (time.perf_counter() - t0) * 1e6 / (iterations * len(SAMPLES))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    generator = SuggestionGenerator()
+    legacy = per_feedback_us(lambda *args: legacy_generate(generator, *args), iterations)
+    rules = per_feedback_us(generator.generate_suggestion_list, iterations)
+    print(f"legacy substring checks  {legacy:6.2f} us/feedback")
+    print(f"compiled rule engine     {rules:6.2f} us/feedback "
+          f"({len(generator.rule_engine.rules)} rules, {len(generator.rule_engine.phrases)} phrases)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,490 @@
+"""
+Campus feedback window: students log in and submit feedback through the
+window while admins and faculty keep their dashboards open and admins upload
+CSV batches. Reports throughput, error and throttle rates and latency
+percentiles per endpoint, and exits with status 1 when an SLO is missed.
+
+Usage: python benchmarks/campus_window.py --start sync|async [--students 10000] [--duration 3600] [--workers 2]
+       python benchmarks/campus_window.py --url http://127.0.0.1:5000 [--seed] [--students 10000] ...
+
+--start launches the server like load_test.py --compare, on a fresh SQLite
+database seeded with the accounts. --url runs against a server that is
+already up, with accounts student0.., faculty0.. and admin0.. (password
+--password); --seed creates them first through the app's DATABASE_URL.
+Every simulated user connects from this machine's address, so that server
+needs RATE_LIMIT_AUTH_IP_PER_MINUTE=0 (--start sets it); the per-user and
+per-username limits stay in force.
+
+Student think times shrink with --duration, so a 60 s run is a compressed
+hour; dashboards poll every --poll seconds regardless. SLOs come from
+DEFAULT_SLOS and any --slo 'ENDPOINT:METRIC<=VALUE', e.g.
+--slo 'POST /api/feedback:p95<=800', where ENDPOINT may be '*' and METRIC
+is p50, p95, p99 or max (milliseconds) or error_rate or throttle_rate
+(fractions).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_test import BACKEND_DIR, start_server, wait_until_up
+
+SEED = """
+import sys
+sys.path.insert(0, 'benchmarks')
+from campus_window import seed_accounts
+seed_accounts({students}, {faculty}, {admins}, {password!r})
+"""
+
+# Latency limits in ms, and error and throttle rates; ('*', metric) applies to every endpoint
+DEFAULT_SLOS = {
+    ('*', 'error_rate'): 0.01,
+    ('POST /api/feedback', 'throttle_rate'): 0.05,
+    ('POST /api/feedback', 'p95'): 2000,
+    ('POST /api/auth/login', 'p95'): 1000,
+    ('GET /api/faculty', 'p95'): 500,
+    ('GET /api/dashboard', 'p95'): 2000,
+    ('GET /api/feedback', 'p95'): 1000,
+    ('GET /api/feedback/analytics', 'p95'): 1000,
+    ('GET /api/feedback/urgent', 'p95'): 1000,
+    ('POST /api/feedback/upload', 'p99'): 60000,
+}
+LATENCY_METRICS = ('p50', 'p95', 'p99', 'max')
+
+CLASSES = [f"{year}{section}" for year in ('FE', 'SE', 'TE', 'BE') for section in ('-A', '-B', '-C')]
+COURSES = ['CS101', 'CS102', 'CS201', 'MA101', 'MA201', 'PH101', 'EE101', 'ME101']
+
+# Synthetic corpus: a subject per category, and what students say about it
+SUBJECTS = {
+    'teaching': ['The lectures', 'The professor', 'The explanations in class', 'The pace of teaching',
+                 'The tutorial sessions'],
+    'content': ['The course material', 'The syllabus', 'The lab manual', 'The reference books', 'The examples'],
+    'infrastructure': ['The wifi in the library', 'The projector in room 204', 'The lab computers',
+                       'The air conditioning', 'The canteen', 'The hostel water supply'],
+    'assessment': ['The grading', 'The mid-term exam', 'The assignment deadlines', 'The quizzes',
+                   'The practical exam'],
+    'support': ['The mentor', 'Office hours', 'The placement cell', 'The counselling service',
+                'The administration office'],
+}
+REMARKS = {
+    'positive': ['is excellent and really helpful', 'has improved a lot this semester', 'is clear and well organised',
+                 'made the subject interesting', 'is great, thank you'],
+    'negative': ['is too fast to follow', 'is broken again', 'is unfair and unclear', 'needs more examples',
+                 'keeps disconnecting during class', 'is confusing and poorly organised', 'is always late'],
+    'neutral': ['could be scheduled differently', 'is okay but could use more practice problems',
+                'should be shared earlier', 'is average'],
+}
+ENDINGS = ['', '', ' Please look into it.', ' Overall I am satisfied.', ' It affects my preparation.',
+           ' Many of us feel the same.']
+URGENT = ['I am being harassed by seniors in the hostel', 'I feel unsafe on campus after the ragging incident',
+          'There was a fire in the chemistry lab and nobody responded']
+
+
+def feedback_text(rng):
+    """One synthetic feedback text: mostly negative or mixed, as feedback windows are; about 1% urgent"""
+    if rng.random() < 0.01:
+        return rng.choice(URGENT)
+    sentiment = rng.choices(['negative', 'positive', 'neutral'], weights=[5, 3, 2])[0]
+    subject = rng.choice(SUBJECTS[rng.choice(list(SUBJECTS))])
+    text = f"{subject} {rng.choice(REMARKS[sentiment])}.{rng.choice(ENDINGS)}"
+    if rng.random() < 0.15:
+        text += f" Also, {rng.choice(SUBJECTS[rng.choice(list(SUBJECTS))]).lower()} {rng.choice(REMARKS['negative'])}."
+    return text
+
+
+def seed_accounts(students, faculty, admins, password):
+    """Create the schema and the load test accounts that don't exist yet, sharing one password hash"""
+    sys.path.insert(0, BACKEND_DIR)
+    import app as backend
+    with backend.app.app_context():
+        backend.db.create_all()
+        backend.ensure_search_index()
+        backend.intern_suggestions(backend.suggestion_generator.all_suggestion_texts())
+        existing = set(backend.db.session.execute(backend.db.select(backend.User.username)).scalars())
+        password_hash = backend.generate_password_hash(password)
+        rows = [{'username': f"student{i}", 'role': 'student', 'student_id': f"S{i:05d}", 'name': f"Student {i}"}
+                for i in range(students)]
+        rows += [{'username': f"faculty{i}", 'role': 'faculty', 'faculty_id': f"F{i:03d}", 'name': f"Faculty {i}",
+                  'classes': ','.join(random.Random(i).sample(CLASSES, 3))} for i in range(faculty)]
+        rows += [{'username': f"admin{i}", 'role': 'admin', 'name': f"Admin {i}"} for i in range(admins)]
+        blank = {'student_id': None, 'faculty_id': None, 'classes': None, 'password_hash': password_hash}
+        rows = [{**blank, **row} for row in rows if row['username'] not in existing]
+        if rows:
+            backend.db.session.execute(backend.User.__table__.insert(), rows)
+        backend.db.session.commit()
+        print(f"seeded {len(rows):,} accounts")
+
+
+class Stats:
+    """Latencies and outcomes per endpoint ('METHOD /path')"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.outcomes = {}
+
+    def record(self, endpoint, seconds, outcome):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        self.outcomes.setdefault(endpoint, Counter())[outcome] += 1
+
+    def summary(self, elapsed):
+        """{endpoint: metrics}, plus '*' for all requests together"""
+        endpoints = sorted(self.outcomes)
+        summary = {endpoint: self._metrics(self.latencies[endpoint], self.outcomes[endpoint], elapsed)
+                   for endpoint in endpoints}
+        summary['*'] = self._metrics([s for e in endpoints for s in self.latencies[e]],
+                                     sum(self.outcomes.values(), Counter()), elapsed)
+        return summary
+
+    @staticmethod
+    def _metrics(latencies, outcomes, elapsed):
+        latencies = sorted(latencies)
+        requests = sum(outcomes.values())
+
+        def percentile(p):
+            return latencies[min(math.ceil(len(latencies) * p) - 1, len(latencies) - 1)] * 1000 if latencies else None
+
+        errors = sum(n for outcome, n in outcomes.items() if outcome not in ('ok', 'throttled'))
+        return {
+            'requests': requests,
+            'throughput': requests / elapsed,
+            'error_rate': errors / requests if requests else 0.0,
+            'throttle_rate': outcomes['throttled'] / requests if requests else 0.0,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': latencies[-1] * 1000 if latencies else None,
+            'outcomes': dict(outcomes),
+        }
+
+
+class Browser:
+    """
+    One user's keep-alive HTTP/1.1 connection with its session cookie, timing
+    every request into stats. Like the frontend, requests give up after
+    timeout seconds.
+    """
+
+    def __init__(self, host, port, stats, timeout):
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.timeout = timeout
+        self.cookie = None
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        """(status, headers, body), or None if the request failed without a response"""
+        endpoint = f"{method} {path.split('?', 1)[0]}"
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(body)}"]
+        if self.cookie:
+            head.append(f"Cookie: {self.cookie}")
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        request = ('\r\n'.join(head) + '\r\n\r\n').encode() + body
+        start = time.perf_counter()
+        while True:
+            reused = self.writer is not None
+            try:
+                if not reused:
+                    self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                                      self.timeout)
+                self.writer.write(request)
+                status, response_headers, response_body = await asyncio.wait_for(self._read_response(),
+                                                                                 self.timeout)
+                break
+            except (ConnectionError, asyncio.IncompleteReadError, IndexError) as e:
+                # The server closed an idle keep-alive connection: resend once on a new one, as browsers do
+                self.close()
+                if reused:
+                    continue
+                self.stats.record(endpoint, time.perf_counter() - start, type(e).__name__)
+                return None
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                self.stats.record(endpoint, time.perf_counter() - start, type(e).__name__)
+                self.close()
+                return None
+        if status in (429, 503):
+            outcome = 'throttled'
+        elif status >= 400:
+            outcome = f"HTTP {status}"
+        else:
+            outcome = 'ok'
+        self.stats.record(endpoint, time.perf_counter() - start, outcome)
+        if 'set-cookie' in response_headers:
+            self.cookie = response_headers['set-cookie'].split(';', 1)[0]
+        if response_headers.get('connection') == 'close':
+            self.close()
+        return status, response_headers, response_body
+
+    async def json(self, method, path, payload, headers=None):
+        return await self.request(method, path, json.dumps(payload).encode(),
+                                  {'Content-Type': 'application/json', **(headers or {})})
+
+    async def _read_response(self):
+        status = int((await self.reader.readline()).split(b' ', 2)[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'chunked' not in headers.get('transfer-encoding', '').lower():
+            return status, headers, await self.reader.readexactly(int(headers.get('content-length', 0)))
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            chunks.append((await self.reader.readexactly(size + 2))[:-2])
+            if size == 0:
+                return status, headers, b''.join(chunks)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def retry_after(response, default=1.0):
+    try:
+        return float(response[1].get('retry-after', default))
+    except ValueError:
+        return default
+
+
+class CampusWindow:
+    def __init__(self, args):
+        parts = urlsplit(args.url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.args = args
+        self.stats = Stats()
+        self.rng = random.Random(args.seed_value)
+        self.faculty = []  # (user id, classes) from GET /api/faculty
+        self.submitted = 0
+        self.deadline = None
+
+    def browser(self):
+        return Browser(self.host, self.port, self.stats, self.args.client_timeout)
+
+    def think(self, low, high):
+        # Student pauses scale with the window, so a compressed window keeps the same shape
+        return self.rng.uniform(low, high) * self.args.duration / 3600
+
+    async def login(self, browser, username):
+        response = await browser.json('POST', '/api/auth/login', {'username': username, 'password': self.args.password})
+        return response is not None and response[0] == 200
+
+    async def student(self, index, start_at):
+        await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+        browser = self.browser()
+        try:
+            if not await self.login(browser, f"student{index}"):
+                return
+            response = await browser.request('GET', '/api/faculty')
+            if response is not None and response[0] == 200 and not self.faculty:
+                self.faculty = [(f['id'], f['classes'] or CLASSES) for f in json.loads(response[2])['faculty']]
+            text = None
+            for _ in range(2 if self.rng.random() < 0.1 else 1):
+                await asyncio.sleep(self.think(10, 60))
+                # 2% submit the same text again, which dedup flags
+                if text is None or self.rng.random() >= 0.2:
+                    text = feedback_text(self.rng)
+                await self.submit(browser, index, text)
+        finally:
+            browser.close()
+
+    async def submit(self, browser, index, text):
+        """The StudentFeedbackForm request; retried like a user would after a timeout or 429/503, same key"""
+        if self.faculty and self.rng.random() < 0.6:
+            instructor, classes = self.rng.choice(self.faculty)
+            payload = {'feedback_type': 'faculty', 'instructor_id': str(instructor), 'class_name': self.rng.choice(classes)}
+        else:
+            payload = {'feedback_type': 'campus', 'instructor_id': '', 'class_name': self.rng.choice(CLASSES)}
+        payload.update(student_id=f"S{index:05d}", course_id='general', feedback_text=text)
+        key = str(uuid.uuid4())
+        for attempt in range(3):
+            response = await browser.json('POST', '/api/feedback', payload, {'Idempotency-Key': key})
+            if response is not None and response[0] in (200, 201):
+                self.submitted += 1
+                return
+            if response is not None and response[0] not in (409, 429, 503):
+                return
+            await asyncio.sleep(retry_after(response) if response is not None else self.think(2, 10))
+
+    async def poll(self, username, requests):
+        """A dashboard left open: log in, then cycle through requests every --poll seconds until the window ends"""
+        await asyncio.sleep(self.rng.uniform(0, self.args.poll))
+        browser = self.browser()
+        try:
+            if not await self.login(browser, username):
+                return
+            n = 0
+            while time.monotonic() < self.deadline:
+                await browser.request('GET', requests[n % len(requests)]())
+                n += 1
+                await asyncio.sleep(self.args.poll * self.rng.uniform(0.8, 1.2))
+        finally:
+            browser.close()
+
+    def admin_requests(self):
+        return [
+            lambda: '/api/dashboard?per_page=1',
+            lambda: '/api/feedback/analytics' + self.rng.choice(['', '?feedback_type=faculty', '?feedback_type=campus']),
+            lambda: '/api/feedback/urgent',
+            lambda: '/api/feedback?' + urlencode(self.rng.choice([{'limit': 50}, {'days': 1, 'limit': 200},
+                                                                    {'class_name': self.rng.choice(CLASSES)}])),
+        ]
+
+    def faculty_requests(self, index):
+        classes = random.Random(index).sample(CLASSES, 3)
+        return [lambda: '/api/dashboard?' + urlencode({'per_page': 500, **self.rng.choice(
+            [{}, {'class_name': self.rng.choice(classes)}])})]
+
+    async def upload(self, admin, start_at, rows):
+        """An admin's CSV import of rows collected offline"""
+        await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+        lines = ['student_id,course_id,instructor_id,class_name,feedback_type,feedback_text']
+        for n in range(rows):
+            text = feedback_text(self.rng).replace('"', "'")
+            lines.append(f"P{n:05d},{self.rng.choice(COURSES)},general,{self.rng.choice(CLASSES)},campus,\"{text}\"")
+        boundary = uuid.uuid4().hex
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"offline.csv\"\r\n"
+                f"Content-Type: text/csv\r\n\r\n" + '\n'.join(lines) + f"\r\n--{boundary}--\r\n").encode()
+        browser = Browser(self.host, self.port, self.stats, self.args.upload_timeout)
+        try:
+            if await self.login(browser, admin):
+                await browser.request('POST', '/api/feedback/upload', body, {
+                    'Content-Type': f"multipart/form-data; boundary={boundary}", 'Idempotency-Key': str(uuid.uuid4())})
+        finally:
+            browser.close()
+
+    async def run(self):
+        args = self.args
+        start = time.monotonic()
+        self.deadline = start + args.duration
+        # Arrivals at random through the window
+        arrivals = sorted(self.rng.uniform(0, args.duration) for _ in range(args.students))
+        tasks = [self.student(i, start + at) for i, at in enumerate(arrivals)]
+        tasks += [self.poll(f"admin{i % args.admins}", self.admin_requests()) for i in range(args.admin_dashboards)]
+        tasks += [self.poll(f"faculty{i}", self.faculty_requests(i))
+                  for i in range(min(args.faculty_dashboards, args.faculty))]
+        tasks += [self.upload(f"admin{i % args.admins}", start + (i + 0.5) * args.duration / args.uploads,
+                              args.upload_rows) for i in range(args.uploads)]
+        await asyncio.gather(*tasks)
+        return time.monotonic() - start
+
+
+def parse_slo(spec):
+    endpoint, _, rule = spec.rpartition(':')
+    metric, _, value = rule.partition('<=')
+    metric = metric.strip()
+    if not endpoint or metric not in LATENCY_METRICS + ('error_rate', 'throttle_rate') or not value:
+        raise argparse.ArgumentTypeError(f"expected 'ENDPOINT:METRIC<=VALUE', got {spec!r}")
+    return (endpoint.strip(), metric), float(value)
+
+
+def check_slos(summary, slos):
+    """Descriptions of the SLOs summary misses; '*' rules apply to every endpoint"""
+    misses = []
+    for (endpoint, metric), limit in sorted(slos.items()):
+        for name in ([e for e in summary if e != '*'] if endpoint == '*' else [endpoint]):
+            value = summary.get(name, {}).get(metric)
+            if value is not None and value > limit:
+                unit = ' ms' if metric in LATENCY_METRICS else ''
+                misses.append(f"{name} {metric} {value:.4g}{unit} > {limit:g}{unit}")
+    return misses
+
+
+def report(summary, elapsed, submitted):
+    def ms(value):
+        return f"{value:9.1f}" if value is not None else '      n/a'
+    print(f"\n{'endpoint':30s} {'requests':>9s} {'req/s':>8s} {'errors':>7s} {'throttled':>9s} "
+          f"{'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    for endpoint, m in summary.items():
+        print(f"{'all' if endpoint == '*' else endpoint:30s} {m['requests']:9d} {m['throughput']:8.2f} "
+              f"{m['error_rate']:7.2%} {m['throttle_rate']:9.2%} {ms(m['p50'])} {ms(m['p95'])} {ms(m['p99'])} "
+              f"{ms(m['max'])}")
+    print(f"\n{submitted:,} feedback submissions stored in {elapsed:.0f} s")
+    failures = {endpoint: {o: n for o, n in m['outcomes'].items() if o not in ('ok', 'throttled')}
+                for endpoint, m in summary.items() if endpoint != '*'}
+    for endpoint, outcomes in failures.items():
+        if outcomes:
+            print(f"  {endpoint}: {outcomes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Campus feedback window load test')
+    parser.add_argument('--url', help='Server to test, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--start', choices=['sync', 'async'], help='Start this server on a fresh database')
+    parser.add_argument('--workers', type=int, default=2, help='Server processes with --start')
+    parser.add_argument('--port', type=int, default=5190, help='Port for --start')
+    parser.add_argument('--seed', action='store_true', help='Create the accounts in DATABASE_URL before a --url run')
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--faculty', type=int, default=60)
+    parser.add_argument('--admins', type=int, default=3)
+    parser.add_argument('--duration', type=float, default=3600, help='Seconds the window lasts')
+    parser.add_argument('--admin-dashboards', type=int, default=5, help='Admin dashboards open during the window')
+    parser.add_argument('--faculty-dashboards', type=int, default=20, help='Faculty dashboards open during the window')
+    parser.add_argument('--poll', type=float, default=15, help='Seconds between dashboard requests')
+    parser.add_argument('--uploads', type=int, default=3, help='CSV uploads spread over the window')
+    parser.add_argument('--upload-rows', type=int, default=500)
+    parser.add_argument('--client-timeout', type=float, default=10, help='Seconds before a request is given up (axios)')
+    parser.add_argument('--upload-timeout', type=float, default=300)
+    parser.add_argument('--password', default='campus')
+    parser.add_argument('--seed-value', type=int, default=42, help='Random seed of the simulated traffic')
+    parser.add_argument('--slo', type=parse_slo, action='append', default=[], help="e.g. 'POST /api/feedback:p95<=800'")
+    parser.add_argument('--json', help='Also write the per-endpoint summary to this file')
+    args = parser.parse_args()
+    if bool(args.url) == bool(args.start):
+        parser.error('one of --url or --start is required')
+
+    # Concurrent students each hold a socket
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(max(soft, 65536), hard), hard))
+    seed = SEED.format(students=args.students, faculty=args.faculty, admins=args.admins, password=args.password)
+
+    server = database = None
+    if args.start:
+        database = tempfile.mktemp(suffix='.db')
+        args.url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.start, args.port, args.workers, 'sqlite:///' + database, init=seed,
+                              RATE_LIMIT_AUTH_IP_PER_MINUTE='0')
+    elif args.seed:
+        seed_accounts(args.students, args.faculty, args.admins, args.password)
+    try:
+        wait_until_up(args.url)
+        print(f"{args.students:,} students over {args.duration:g} s, {args.admin_dashboards} admin and "
+              f"{args.faculty_dashboards} faculty dashboards, {args.uploads} uploads of {args.upload_rows} rows")
+        window = CampusWindow(args)
+        elapsed = asyncio.run(window.run())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            for suffix in ['', '-wal', '-shm']:
+                if os.path.exists(database + suffix):
+                    os.remove(database + suffix)
+
+    summary = window.stats.summary(elapsed)
+    report(summary, elapsed, window.submitted)
+    misses = check_slos(summary, {**DEFAULT_SLOS, **dict(args.slo)})
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'elapsed': elapsed, 'submitted': window.submitted, 'endpoints': summary,
+                       'slo_misses': misses}, f, indent=2)
+    if misses:
+        print('\nSLO missed:\n  ' + '\n  '.join(misses))
+        sys.exit(1)
+    print('\nAll SLOs met')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Load test for feedback submission and reads: many concurrent keep-alive
+clients, reporting throughput and latency percentiles
+
+Usage: python benchmarks/load_test.py --url http://127.0.0.1:5000 [--clients 1000] [--requests 5] [--mix submit]
+       python benchmarks/load_test.py --compare [--clients 1000] [--workers 2]
+
+--url runs against a server that is already up (log in as --username /
+--password, an admin by default). --compare starts the sync app under
+gunicorn and the ASGI app under uvicorn on fresh SQLite databases and runs
+the same load against both, with rate limits and the analysis concurrency
+limit off so the servers themselves are measured.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SUBJECTS = ['The lectures', 'The lab sessions', 'The wifi in the library', 'The assignments', 'The professor',
+            'The projector in room 204', 'The grading', 'The course material', 'The canteen food', 'The mentor']
+COMMENTS = ['are too fast to follow', 'were really helpful this week', 'is broken again', 'need more examples',
+            'is unfair and unclear', 'are excellent', 'keeps disconnecting', 'could be more engaging']
+
+INIT_DB = """
+import app as m
+with m.app.app_context():
+    m.db.create_all()
+    m.ensure_search_index()
+    user = m.User(username='loadtest', role='admin', name='Load test')
+    user.set_password('loadtest')
+    m.db.session.add(user)
+    m.db.session.commit()
+    m.intern_suggestions(m.suggestion_generator.all_suggestion_texts())
+"""
+
+
+def feedback_body(client, n):
+    text = f"{random.choice(SUBJECTS)} {random.choice(COMMENTS)} (client {client}, request {n})"
+    return json.dumps({'feedback_text': text, 'course_id': random.choice(['CS101', 'CS102', 'MA201'])}).encode()
+
+
+def login(url, username, password):
+    """Session cookie for username"""
+    request = urllib.request.Request(url + '/api/auth/login', method='POST',
+                                     data=json.dumps({'username': username, 'password': password}).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        return response.headers['Set-Cookie'].split(';', 1)[0]
+
+
+async def read_response(reader):
+    """(status, body) of one HTTP/1.1 response"""
+    status = int((await reader.readline()).split(b' ', 2)[1])
+    length, chunked, close = 0, False, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value:
+            chunked = True
+        elif name == 'connection' and value == 'close':
+            close = True
+    if not chunked:
+        return status, await reader.readexactly(length), close
+    chunks = []
+    while True:
+        size = int((await reader.readline()).split(b';')[0], 16)
+        chunks.append(await reader.readexactly(size + 2))
+        if size == 0:
+            return status, b''.join(chunks), close
+
+
+async def client(index, host, port, cookie, requests, mix, latencies, errors, timeout):
+    reader = writer = None
+    for n in range(requests):
+        submit = mix == 'submit' or (mix == 'mixed' and n % 2 == 0)
+        if submit:
+            body = feedback_body(index, n)
+            head = (f"POST /api/feedback HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        else:
+            body = b''
+            head = f"GET /api/feedback?course_id=CS101 HTTP/1.1\r\nHost: {host}\r\nCookie: {cookie}\r\n\r\n"
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            writer.write(head.encode() + body)
+            status, _, close = await asyncio.wait_for(read_response(reader), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            errors[f"HTTP {status}"] = errors.get(f"HTTP {status}", 0) + 1
+        if close:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url, cookie, clients, requests, mix, timeout):
+    parts = urlsplit(url)
+    latencies, errors = [], {}
+    start = time.perf_counter()
+    await asyncio.gather(*[client(i, parts.hostname, parts.port or 80, cookie, requests, mix, latencies, errors,
+                                  timeout) for i in range(clients)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) if latencies else None,
+        'p99': latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] if latencies else None,
+        'errors': errors,
+    }
+
+
+def report(label, result):
+    def ms(value):
+        return f"{value * 1000:8.1f} ms" if value is not None else '       n/a'
+    print(f"{label:6s} {result['requests']:6d} ok in {result['elapsed']:6.1f} s  {result['throughput']:8.1f} req/s  "
+          f"p50 {ms(result['p50'])}  p99 {ms(result['p99'])}  errors {result['errors'] or 0}")
+
+
+def wait_until_up(url, seconds=60):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url + '/api/health', timeout=1).close()
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not come up")
+
+
+def start_server(kind, port, workers, database_url, init=INIT_DB, **settings):
+    """The sync (gunicorn) or async (uvicorn) server on database_url after running init there; settings override env vars"""
+    env = dict(os.environ, DATABASE_URL=database_url, **settings)
+    subprocess.run([sys.executable, '-c', init], cwd=BACKEND_DIR, env=env, check=True)
+    if kind == 'sync':
+        command = ['gunicorn', 'app:app', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+                   '--threads', '8', '--backlog', '2048', '--log-level', 'warning']
+    else:
+        command = ['uvicorn', 'asgi:application', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(workers), '--backlog', '2048', '--log-level', 'warning']
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+def compare(args):
+    results = {}
+    for kind, port in [('sync', 5181), ('async', 5182)]:
+        database = tempfile.mktemp(suffix='.db')
+        server = start_server(kind, port, args.workers, 'sqlite:///' + database, RATE_LIMIT_BACKEND='',
+                              ANALYSIS_MAX_CONCURRENT='0')
+        try:
+            url = f'http://127.0.0.1:{port}'
+            wait_until_up(url)
+            cookie = login(url, 'loadtest', 'loadtest')
+            results[kind] = asyncio.run(run_load(url, cookie, args.clients, args.requests, args.mix, args.timeout))
+        finally:
+            server.terminate()
+            server.wait()
+            for suffix in ['', '-wal', '-shm']:
+                if os.path.exists(database + suffix):
+                    os.remove(database + suffix)
+    print(f"{args.clients} clients x {args.requests} requests ({args.mix}), {args.workers} workers each")
+    for kind, result in results.items():
+        report(kind, result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feedback API load test')
+    parser.add_argument('--url', help='Server to test, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--compare', action='store_true', help='Start and compare the sync and ASGI servers')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=5, help='Requests per client')
+    parser.add_argument('--mix', choices=['submit', 'read', 'mixed'], default='submit')
+    parser.add_argument('--workers', type=int, default=2, help='Server processes in --compare mode')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds before a request counts as failed')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin')
+    args = parser.parse_args()
+
+    # One socket per client
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(max(soft, args.clients + 256), hard), hard))
+
+    if args.compare:
+        compare(args)
+    elif args.url:
+        cookie = login(args.url, args.username, args.password)
+        report('run', asyncio.run(run_load(args.url, cookie, args.clients, args.requests, args.mix, args.timeout)))
+    else:
+        parser.error('--url or --compare is required')
+
+
+if __name__ == '__main__':
+    main()
@@ -99,6 +99,31 @@ class AlertSystem:
         
         return alert_message
     
+    def send_spike_alert(self, spike):
+        """
+        Send alert for a course or class whose feedback volume or sentiment
+        broke from its usual level (see services/spike_detector.py)
+        """
+        if spike['metric'] == 'volume':
+            change = f"{spike['observed']:g} feedbacks against a usual {spike['baseline']:.1f}"
+        else:
+            change = f"mean sentiment {spike['observed']:+.2f} against a usual {spike['baseline']:+.2f}"
+        alert_message = {
+            'alert_id': f"SPIKE-{spike['scope']}-{spike['scope_value']}-{spike['metric']}-{spike['window_start']:%Y%m%d%H%M}",
+            'timestamp': datetime.utcnow().isoformat(),
+            'scope': spike['scope'],
+            'scope_value': spike['scope_value'],
+            'metric': spike['metric'],
+            'window_start': spike['window_start'].isoformat(),
+            'z_score': spike['z_score'],
+            'description': change
+        }
+        
+        # Same delivery as send_alert
+        print(f"📈 SPIKE ALERT [{spike['scope'].upper()} {spike['scope_value']}]: {alert_message}")
+        
+        return alert_message
+    
     def extract_urgent_issues(self, feedback_text):
         """
         Extract specific urgent issues mentioned in feedback
@@ -0,0 +1,182 @@
+import json
+import socket
+import struct
+import threading
+import time
+
+# Each message is a 4-byte big-endian length followed by that many bytes of JSON
+_header = struct.Struct('>I')
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+class AnalysisUnavailable(Exception):
+    """The analysis server could not be reached or failed the request"""
+
+
+def parse_address(address):
+    """
+    (family, address) for 'unix:/path', '/path' or 'host:port'
+    """
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    if address.startswith('/'):
+        return socket.AF_UNIX, address
+    host, _, port = address.rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(_header.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_message(sock):
+    """
+    Next message, or None when the peer closed the connection between messages
+    """
+    header = sock.recv(_header.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _header.size:
+        header += _recv_exactly(sock, _header.size - len(header))
+    (size,) = _header.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message of {size} bytes exceeds the limit")
+    return json.loads(_recv_exactly(sock, size))
+
+
+class AnalysisClient:
+    """
+    Blocking client for the analysis server. Each thread keeps its own
+    connection, so gunicorn threads never interleave messages on a socket.
+    """
+
+    def __init__(self, address, timeout=30.0):
+        self.family, self.address = parse_address(address)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(self.family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+            self._local.sock = sock
+        return sock
+
+    def close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            self._local.sock = None
+            sock.close()
+
+    def call(self, method, **params):
+        """
+        Send one request and wait for its reply; a stale pooled connection
+        is replaced once before giving up
+        """
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, dict(params, method=method))
+                reply = recv_message(sock)
+                if reply is None:
+                    raise ConnectionError("Connection closed")
+                break
+            except (OSError, ValueError) as e:
+                self.close()
+                if attempt:
+                    raise AnalysisUnavailable(str(e)) from e
+        if 'error' in reply:
+            raise AnalysisUnavailable(reply['error'])
+        return reply
+
+    def ping(self):
+        return self.call('ping')
+
+    def analyze_batch(self, texts):
+        """
+        (results, analyzer version) for texts
+        """
+        reply = self.call('analyze', texts=list(texts))
+        return reply['results'], reply['version']
+
+
+class RemoteFeedbackAnalyzer:
+    """
+    FeedbackAnalyzer stand-in that forwards analysis to the analysis server.
+    While the server is unreachable, work runs on an in-process analyzer
+    that is only built the first time it is needed, and the server is tried
+    again after retry_after seconds. Results carry the analyzer_version of
+    whichever side produced them.
+    """
+
+    def __init__(self, client, local_factory, retry_after=5.0):
+        self.client = client
+        self.local_factory = local_factory
+        self.retry_after = retry_after
+        self._local = None
+        self._down_until = 0.0
+        self._remote_version = None
+        self._lock = threading.Lock()
+
+    @property
+    def local(self):
+        with self._lock:
+            if self._local is None:
+                print("Loading in-process analyzer (analysis server unavailable)")
+                self._local = self.local_factory()
+            return self._local
+
+    def _remote_available(self):
+        return time.monotonic() >= self._down_until
+
+    def _mark_down(self, error):
+        print(f"Analysis server unavailable, analyzing in-process: {error}")
+        self._down_until = time.monotonic() + self.retry_after
+
+    @property
+    def version(self):
+        if self._remote_available():
+            try:
+                self._remote_version = self.client.ping()['version']
+                return self._remote_version
+            except AnalysisUnavailable as e:
+                self._mark_down(e)
+        return self.local.version
+
+    def analyze(self, feedback_text):
+        return self.analyze_batch([feedback_text])[0]
+
+    def analyze_batch(self, texts, pool=None, chunksize=32):
+        if self._remote_available():
+            try:
+                results, version = self.client.analyze_batch(texts)
+                for result in results:
+                    result['analyzer_version'] = version
+                return results
+            except AnalysisUnavailable as e:
+                self._mark_down(e)
+        local = self.local
+        results = local.analyze_batch(texts, pool=pool, chunksize=chunksize)
+        for result in results:
+            result['analyzer_version'] = local.version
+        return results
+
+    def create_pool(self, workers):
+        """
+        The server has its own worker pool; in-process fallback runs serially
+        """
+        return None
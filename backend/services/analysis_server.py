@@ -0,0 +1,190 @@
+"""
+Standalone analysis server: a pool of processes holding the NLP models,
+behind a Unix socket or localhost TCP port (see services/analysis_rpc.py)
+
+Usage: python -m services.analysis_server [--address unix:/tmp/feedback-analysis.sock] [--workers 2]
+
+Reads SUGGESTION_RULES_FILE, CATEGORIZER, CATEGORIZER_MODEL_FILE,
+SENTIMENT_MODE and SENTIMENT_AUTO_MARGIN like the web app, so both sides
+produce the same analyzer version.
+"""
+import argparse
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from services.analysis_rpc import parse_address, recv_message, send_message
+from services.feedback_analyzer import FeedbackAnalyzer, _analyze_batch_in_worker
+
+
+class _PendingRequest:
+    """Results of one request, filled in as its batches complete"""
+
+    def __init__(self, size):
+        self.results = [None] * size
+        self.remaining = size
+        self.error = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def complete(self, offset, results=None, error=None):
+        with self._lock:
+            if error is not None:
+                self.error = error
+                self.done.set()
+                return
+            self.results[offset:offset + len(results)] = results
+            self.remaining -= len(results)
+            if self.remaining <= 0:
+                self.done.set()
+
+
+class _UnixListener(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # every web worker thread may connect at once
+
+
+class _TCPListener(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class AnalysisServer:
+    """
+    Connection threads queue texts; a dispatcher thread merges queued texts
+    from concurrent requests into batches of up to max_batch (waiting at
+    most max_wait seconds for a batch to fill) and hands each batch to one
+    pool worker. Large requests are split, so they spread across workers.
+    """
+
+    def __init__(self, analyzer, workers=2, max_batch=64, max_wait=0.005):
+        self.analyzer = analyzer
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.pool = None
+
+    def submit(self, texts):
+        pending = _PendingRequest(len(texts))
+        if not texts:
+            pending.done.set()
+        for offset in range(0, len(texts), self.max_batch):
+            self.queue.put((pending, offset, texts[offset:offset + self.max_batch]))
+        return pending
+
+    def _dispatch(self):
+        while True:
+            items = [self.queue.get()]
+            size = len(items[0][2])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                items.append(item)
+                size += len(item[2])
+
+            texts = [text for _, _, chunk in items for text in chunk]
+            future = self.pool.submit(_analyze_batch_in_worker, texts)
+            future.add_done_callback(lambda f, items=items: self._deliver(f, items))
+
+    @staticmethod
+    def _deliver(future, items):
+        try:
+            results = future.result()
+        except Exception as e:
+            for pending, offset, _ in items:
+                pending.complete(offset, error=str(e))
+            return
+        position = 0
+        for pending, offset, chunk in items:
+            pending.complete(offset, results[position:position + len(chunk)])
+            position += len(chunk)
+
+    def handle(self, message):
+        method = message.get('method')
+        if method == 'ping':
+            return {'version': self.analyzer.version, 'workers': self.workers}
+        if method == 'analyze':
+            pending = self.submit(list(message.get('texts') or []))
+            pending.done.wait()
+            if pending.error is not None:
+                return {'error': pending.error}
+            return {'results': pending.results, 'version': self.analyzer.version}
+        return {'error': f"Unknown method: {method}"}
+
+    def serve_forever(self, address):
+        family, bind_address = parse_address(address)
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        message = recv_message(self.request)
+                    except (OSError, ValueError):
+                        return
+                    if message is None:
+                        return
+                    send_message(self.request, server.handle(message))
+
+        # Start (and load models in) every worker before any socket exists, so
+        # workers never inherit client connections
+        self.pool = self.analyzer.create_pool(self.workers)
+        list(self.pool.map(_analyze_batch_in_worker, [['warm up']] * self.workers))
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(bind_address):
+                os.remove(bind_address)
+            listener = _UnixListener(bind_address, Handler)
+        else:
+            listener = _TCPListener(bind_address, Handler)
+
+        threading.Thread(target=self._dispatch, daemon=True).start()
+        print(f"Analysis server (version {self.analyzer.version}, {self.workers} workers) listening on {address}")
+        try:
+            listener.serve_forever()
+        finally:
+            listener.server_close()
+            self.pool.shutdown()
+            if family == socket.AF_UNIX and os.path.exists(bind_address):
+                os.remove(bind_address)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Feedback analysis server')
+    parser.add_argument('--address', default=os.getenv('ANALYSIS_SERVER') or 'unix:/tmp/feedback-analysis.sock')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('ANALYSIS_SERVER_WORKERS', 2)))
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    args = parser.parse_args()
+    # Shut the pool down on SIGTERM instead of leaving workers behind
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    analyzer = FeedbackAnalyzer.create(
+        rules_file=os.getenv('SUGGESTION_RULES_FILE'),
+        model_file=os.getenv('CATEGORIZER_MODEL_FILE', 'models/categorizer.npz')
+        if os.getenv('CATEGORIZER', 'keyword') == 'model' else None,
+        sentiment_mode=os.getenv('SENTIMENT_MODE', 'full'),
+        sentiment_auto_margin=float(os.getenv('SENTIMENT_AUTO_MARGIN', 0.05))
+    )
+    AnalysisServer(analyzer, workers=max(args.workers, 1), max_batch=args.max_batch,
+                   max_wait=args.max_wait_ms / 1000).serve_forever(args.address)
+
+
+if __name__ == '__main__':
+    main()
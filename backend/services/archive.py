@@ -0,0 +1,124 @@
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services.term_trends import day_number
+
+FORMAT_VERSION = 1
+
+# Feedback attributes kept in archives (everything but the dedup signature)
+ARCHIVE_COLUMNS = ('id', 'student_id', 'class_name', 'course_id', 'instructor_id', 'feedback_type', 'feedback_text',
+                   'category', 'category_label', 'sentiment', 'sentiment_score', 'timestamp', 'is_urgent',
+                   'suggestions_text', 'suggestion_ids', 'analyzer_version', 'duplicate_of')
+INTEGER_COLUMNS = ('id', 'duplicate_of')  # 0 stands for None
+STRING_COLUMNS = tuple(c for c in ARCHIVE_COLUMNS if c not in INTEGER_COLUMNS + ('sentiment_score', 'timestamp', 'is_urgent'))
+
+# An archived feedback row, with the same attribute names as the Feedback model
+ArchivedFeedback = namedtuple('ArchivedFeedback', ARCHIVE_COLUMNS)
+
+# Columns archived rows are summarized by, in the order of summarize keys
+SUMMARY_COLUMNS = ('day', 'instructor_id', 'course_id', 'class_name', 'feedback_type', 'category', 'sentiment',
+                   'suggestion_ids', 'suggestions_text', 'original')
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def semester_start(timestamp, start_months):
+    """Start of the semester containing timestamp; semesters begin on the 1st of each of start_months"""
+    months = sorted(start_months)
+    year = timestamp.year
+    started = [month for month in months if month <= timestamp.month]
+    if started:
+        return datetime(year, started[-1], 1)
+    return datetime(year - 1, months[-1], 1)
+
+
+def next_semester(start, start_months):
+    """Start of the semester after the one beginning at start"""
+    later = [month for month in sorted(start_months) if month > start.month]
+    if later:
+        return datetime(start.year, later[0], 1)
+    return datetime(start.year + 1, min(start_months), 1)
+
+
+def previous_semester(start, start_months):
+    return semester_start(start - timedelta(days=1), start_months)
+
+
+def semester_label(start):
+    """Archive name of the semester beginning at start, e.g. '2025-07'"""
+    return start.strftime('%Y-%m')
+
+
+def _encode_strings(values):
+    # UTF-8 bytes laid end to end with offsets, and a mask for None
+    encoded = [b'' if value is None else value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.array([len(value) for value in encoded], dtype=np.int64), out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    present = np.array([value is not None for value in values], dtype=bool)
+    return data, offsets, np.packbits(present)
+
+
+def _decode_strings(data, offsets, present, count):
+    blob = data.tobytes()
+    present = np.unpackbits(present, count=count).astype(bool).tolist()
+    bounds = offsets.tolist()
+    return [blob[bounds[i]:bounds[i + 1]].decode('utf-8') if present[i] else None for i in range(count)]
+
+
+def write_archive(path, rows):
+    """
+    Write rows (Feedback or ArchivedFeedback objects) to a compressed
+    columnar .npz file at path, replacing it atomically
+    """
+    arrays = {'format': np.array(FORMAT_VERSION), 'count': np.array(len(rows))}
+    for column in INTEGER_COLUMNS:
+        arrays[column] = np.array([getattr(row, column) or 0 for row in rows], dtype=np.int64)
+    arrays['sentiment_score'] = np.array([row.sentiment_score for row in rows], dtype=np.float64)
+    arrays['timestamp'] = np.array([row.timestamp for row in rows], dtype='datetime64[us]').astype(np.int64)
+    arrays['is_urgent'] = np.packbits(np.array([bool(row.is_urgent) for row in rows], dtype=bool))
+    for column in STRING_COLUMNS:
+        data, offsets, present = _encode_strings([getattr(row, column) for row in rows])
+        arrays[f"{column}.data"], arrays[f"{column}.offsets"], arrays[f"{column}.present"] = data, offsets, present
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(temporary, path)
+
+
+def read_archive(path):
+    """ArchivedFeedback rows of an archive file, in the order they were written"""
+    with np.load(path, allow_pickle=False) as arrays:
+        if int(arrays['format']) != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported archive format {int(arrays['format'])}")
+        count = int(arrays['count'])
+        columns = {column: [value or None for value in arrays[column].tolist()] for column in INTEGER_COLUMNS}
+        columns['sentiment_score'] = [None if score != score else score for score in arrays['sentiment_score'].tolist()]
+        columns['timestamp'] = [EPOCH + timedelta(microseconds=micros) for micros in arrays['timestamp'].tolist()]
+        columns['is_urgent'] = np.unpackbits(arrays['is_urgent'], count=count).astype(bool).tolist()
+        for column in STRING_COLUMNS:
+            columns[column] = _decode_strings(arrays[f"{column}.data"], arrays[f"{column}.offsets"],
+                                              arrays[f"{column}.present"], count)
+    return [ArchivedFeedback(*values) for values in zip(*(columns[column] for column in ARCHIVE_COLUMNS))]
+
+
+def summarize(rows):
+    """
+    Counter-style dict of SUMMARY_COLUMNS keys -> [count, score_sum,
+    score_count, urgent] for Feedback or ArchivedFeedback rows; missing
+    values are stored as ''
+    """
+    summary = {}
+    for row in rows:
+        key = (day_number(row.timestamp),) + tuple(getattr(row, column) or '' for column in SUMMARY_COLUMNS[1:-1]) \
+            + (row.duplicate_of is None,)
+        entry = summary.setdefault(key, [0, 0.0, 0, 0])
+        entry[0] += 1
+        if row.sentiment_score is not None:
+            entry[1] += row.sentiment_score
+            entry[2] += 1
+        entry[3] += 1 if row.is_urgent else 0
+    return summary
@@ -0,0 +1,211 @@
+import math
+from datetime import date
+
+from services.term_trends import day_number
+
+# Columns feedback can be grouped by in cohort comparisons
+DIMENSIONS = ('instructor_id', 'course_id', 'class_name', 'category')
+
+# Sentiment scores in [-1, 1] fall into 0.1 wide bins for medians; rows without a score use UNSCORED_BIN
+SCORE_BINS = 20
+UNSCORED_BIN = -1
+
+# 95% two-sided normal quantile
+Z_95 = 1.959964
+
+
+def score_bin(score):
+    if score is None:
+        return UNSCORED_BIN
+    return min(SCORE_BINS - 1, max(0, int((score + 1) * SCORE_BINS / 2)))
+
+
+def count_stats(rows):
+    """
+    Counter-style dict of (dimension, value, score_bin, day) -> [count,
+    score_sum, score_sq_sum, urgent] for (timestamp, values, score, urgent)
+    rows, where values maps each of DIMENSIONS to the row's value (missing
+    values are stored as '')
+    """
+    stats = {}
+    for timestamp, values, score, urgent in rows:
+        day = day_number(timestamp)
+        bin_ = score_bin(score)
+        score = score or 0.0
+        for dimension in DIMENSIONS:
+            entry = stats.setdefault((dimension, values.get(dimension) or '', bin_, day), [0, 0.0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += score
+            entry[2] += score * score
+            entry[3] += 1 if urgent else 0
+    return stats
+
+
+def bucket_start(day, bucket):
+    """First day (ordinal) of the day/week/month bucket containing day"""
+    if bucket == 'month':
+        return date.fromordinal(day).replace(day=1).toordinal()
+    if bucket == 'week':
+        return day - (day - 1) % 7  # Ordinal 1 is a Monday
+    return day
+
+
+def wilson_interval(successes, n, z=Z_95):
+    """Wilson score interval for a proportion; stays inside [0, 1] for small n and rates near 0 or 1"""
+    if n == 0:
+        return None
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return [max(0.0, centre - margin), min(1.0, centre + margin)]
+
+
+def histogram_median(bins, scored):
+    """
+    Median score from {bin: [count, score_sum, score_sq_sum]}. Interpolates
+    linearly inside the bin holding the middle row, unless every score in
+    that bin is the same (common for neutral 0.0 scores), which is then exact.
+    """
+    if scored == 0:
+        return None
+    middle = scored / 2
+    seen = 0
+    for bin_ in sorted(bins):
+        count, score_sum, score_sq_sum = bins[bin_]
+        if count and seen + count >= middle:
+            mean = score_sum / count
+            if score_sq_sum / count - mean * mean < 1e-9:
+                return mean
+            low = bin_ * 2 / SCORE_BINS - 1
+            return low + (middle - seen) / count * (2 / SCORE_BINS)
+        seen += count
+    return None
+
+
+class CohortAccumulator:
+    """Running totals for one group, or one time bucket of a group"""
+
+    __slots__ = ('count', 'urgent', 'scored', 'score_sum', 'score_sq_sum', 'bins')
+
+    def __init__(self):
+        self.count = self.urgent = self.scored = 0
+        self.score_sum = self.score_sq_sum = 0.0
+        self.bins = {}
+
+    def add(self, bin_, count, score_sum, score_sq_sum, urgent):
+        self.count += count
+        self.urgent += urgent
+        if bin_ == UNSCORED_BIN:
+            return
+        self.scored += count
+        self.score_sum += score_sum
+        self.score_sq_sum += score_sq_sum
+        entry = self.bins.get(bin_)
+        if entry is None:
+            self.bins[bin_] = [count, score_sum, score_sq_sum]
+        else:
+            entry[0] += count
+            entry[1] += score_sum
+            entry[2] += score_sq_sum
+
+    def merge(self, other):
+        self.count += other.count
+        self.urgent += other.urgent
+        self.scored += other.scored
+        self.score_sum += other.score_sum
+        self.score_sq_sum += other.score_sq_sum
+        for bin_, (count, score_sum, score_sq_sum) in other.bins.items():
+            entry = self.bins.setdefault(bin_, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += score_sum
+            entry[2] += score_sq_sum
+
+    def summary(self):
+        n = self.scored
+        mean = self.score_sum / n if n else None
+        stddev = mean_ci = None
+        if n > 1:
+            # Sample variance from the moments; clamp float error below zero
+            variance = max(0.0, (self.score_sq_sum - n * mean * mean) / (n - 1))
+            stddev = math.sqrt(variance)
+            margin = Z_95 * stddev / math.sqrt(n)
+            mean_ci = [max(-1.0, mean - margin), min(1.0, mean + margin)]
+        median = histogram_median(self.bins, n)
+        urgent_rate = self.urgent / self.count if self.count else None
+        return {
+            'count': self.count,
+            'mean_sentiment': rounded(mean),
+            'median_sentiment': rounded(median),
+            'stddev': rounded(stddev),
+            'mean_ci': rounded(mean_ci),
+            'urgent_count': self.urgent,
+            'urgent_rate': rounded(urgent_rate),
+            'urgent_rate_ci': rounded(wilson_interval(self.urgent, self.count))
+        }
+
+
+def rounded(value, digits=4):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [round(v, digits) for v in value]
+    return round(value, digits)
+
+
+def compare_cohorts(rows, bucket='all'):
+    """
+    Per-group summaries from (value, day, score_bin, count, score_sum,
+    score_sq_sum, urgent) rollup rows, where day is None when bucket is
+    'all'. Each summary carries a 'buckets' list unless bucket is 'all'.
+    """
+    buckets = {}
+    starts = {}
+    for value, day, bin_, count, score_sum, score_sq_sum, urgent in rows:
+        start = starts.get(day)
+        if start is None and day is not None:
+            start = starts[day] = bucket_start(day, bucket)
+        key = (value, start)
+        acc = buckets.get(key)
+        if acc is None:
+            acc = buckets[key] = CohortAccumulator()
+        acc.add(bin_, count, score_sum or 0.0, score_sq_sum or 0.0, urgent or 0)
+    if bucket == 'all':
+        groups = {value: acc for (value, _), acc in buckets.items()}
+    else:
+        groups = {}
+        for (value, _), acc in buckets.items():
+            groups.setdefault(value, CohortAccumulator()).merge(acc)
+
+    summaries = {}
+    for value, group in groups.items():
+        summary = group.summary()
+        summary['value'] = value or None
+        if bucket != 'all':
+            summary['buckets'] = []
+        summaries[value] = summary
+    if bucket != 'all':
+        for (value, start), acc in sorted(buckets.items(), key=lambda item: item[0][1]):
+            summary = acc.summary()
+            summary['start'] = date.fromordinal(start).isoformat()
+            summaries[value]['buckets'].append(summary)
+    return list(summaries.values())
+
+
+# Sort keys for compared groups; groups without a value for the key sort last
+SORT_KEYS = {
+    'count': 'count',
+    'mean': 'mean_sentiment',
+    'median': 'median_sentiment',
+    'urgent_rate': 'urgent_rate',
+    'urgent_count': 'urgent_count',
+    'value': 'value'
+}
+
+
+def sort_groups(groups, sort='count', descending=True):
+    key = SORT_KEYS[sort]
+    present = [g for g in groups if g[key] is not None]
+    missing = [g for g in groups if g[key] is None]
+    present.sort(key=lambda g: (g[key], g['value'] or ''), reverse=descending)
+    return present + missing
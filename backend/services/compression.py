@@ -0,0 +1,103 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class ResponseCompressor:
+    """
+    Compress large responses with brotli or gzip, negotiated from the
+    client's Accept-Encoding header
+    """
+
+    compressible_mimetypes = {
+        'application/json',
+        'text/plain',
+        'text/csv',
+        'text/html',
+    }
+
+    def __init__(self, app=None, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', self.min_size)
+        self.gzip_level = app.config.get('COMPRESSION_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get('COMPRESSION_BROTLI_QUALITY', self.brotli_quality)
+        app.after_request(self.compress_response)
+
+    def available_encodings(self):
+        """
+        Encodings we can produce, in order of preference
+        """
+        return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    def select_encoding(self, accept_encodings):
+        """
+        Pick the best encoding the client accepts, or None
+        """
+        best, best_quality = None, 0
+        for encoding in self.available_encodings():
+            quality = accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def compressible(self, response):
+        """
+        Whether response may be compressed: a complete response of a text
+        type that isn't encoded already
+        """
+        return not (response.status_code < 200
+                    or response.status_code in (204, 206, 304)
+                    or 'Content-Encoding' in response.headers
+                    or response.mimetype not in self.compressible_mimetypes)
+
+    def encode(self, data, accept_encodings):
+        """
+        (compressed data, encoding) for a client accepting accept_encodings,
+        or None when data should be sent as it is
+        """
+        if len(data) < self.min_size:
+            return None
+        encoding = self.select_encoding(accept_encodings)
+        if encoding is None:
+            return None
+        return self.compress(data, encoding), encoding
+
+    def set_encoded(self, response, data, encoding):
+        """
+        Give response its compressed body. A strong ETag becomes weak, since
+        it named the uncompressed bytes.
+        """
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+    def compress_response(self, response):
+        if response.direct_passthrough or not self.compressible(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoded = self.encode(response.get_data(), request.accept_encodings)
+        if encoded is None:
+            return response
+
+        self.set_encoded(response, *encoded)
+        return response
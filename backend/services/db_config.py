@@ -0,0 +1,61 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Pool sizing by database backend. SQLite connections are cheap file handles;
+# each PostgreSQL connection is a server process, so keep those few and recycle
+# them before server-side idle timeouts.
+POOL_PROFILES = {
+    'sqlite': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30},
+    'postgresql': {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30, 'pool_recycle': 1800,
+                   'pool_pre_ping': True},
+}
+
+
+def engine_options(url, pool_size=0, max_overflow=None, busy_timeout_ms=5000):
+    """
+    create_engine keyword arguments for a database URL: the pool profile of
+    its backend (pool_size / max_overflow override it when given) and, for
+    SQLite, the driver-level busy timeout
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}  # In-memory databases use a single shared connection
+    options = dict(POOL_PROFILES.get(backend, {}))
+    if pool_size:
+        options['pool_size'] = pool_size
+    if max_overflow is not None:
+        options['max_overflow'] = max_overflow
+    if backend == 'sqlite':
+        options['connect_args'] = {'timeout': busy_timeout_ms / 1000}
+    return options
+
+
+def sqlite_pragmas(journal_mode='WAL', synchronous='NORMAL', busy_timeout_ms=5000, cache_size_kb=65536,
+                   mmap_size_mb=256):
+    """
+    (name, value) PRAGMAs for every SQLite connection. WAL lets readers run
+    alongside the single writer, and synchronous=NORMAL only syncs at
+    checkpoints, so a power loss can drop the last commits but never
+    corrupts the database.
+    """
+    return [
+        ('journal_mode', journal_mode),
+        ('synchronous', synchronous),
+        ('busy_timeout', int(busy_timeout_ms)),
+        ('cache_size', -int(cache_size_kb)),  # negative means KiB rather than pages
+        ('mmap_size', int(mmap_size_mb) * 1024 * 1024),
+    ]
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Apply pragmas to each new connection of engine (a no-op for other databases)"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
@@ -0,0 +1,82 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+
+class DuplicateDetector:
+    """
+    MinHash signatures over character shingles, split into LSH bands.
+
+    Two texts whose Jaccard similarity is above roughly
+    (1 / bands) ** (1 / rows_per_band) very likely share at least one band
+    bucket, so candidates are found with an index lookup on the bucket keys
+    instead of comparing against every stored feedback.
+    """
+
+    mersenne_prime = (1 << 31) - 1
+
+    def __init__(self, num_perm=64, bands=16, shingle_size=5, threshold=0.8, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        # Fixed seed: signatures are stored, so the hash family must never change
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, self.mersenne_prime, size=num_perm).astype(np.uint64)
+        self.b = generator.randint(0, self.mersenne_prime, size=num_perm).astype(np.uint64)
+
+    def _shingles(self, text):
+        normalized = ' '.join(re.findall(r'\w+', (text or '').lower()))
+        if len(normalized) <= self.shingle_size:
+            return {normalized}
+        return {normalized[i:i + self.shingle_size] for i in range(len(normalized) - self.shingle_size + 1)}
+
+    def signature(self, text):
+        """
+        MinHash signature (uint32 array of length num_perm)
+        """
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) & self.mersenne_prime
+                              for shingle in self._shingles(text)), dtype=np.uint64)
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % self.mersenne_prime
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature):
+        """
+        One signed 64-bit bucket key per band
+        """
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            digest = hashlib.blake2b(bytes([band]) + chunk.tobytes(), digest_size=8).digest()
+            keys.append(int.from_bytes(digest, 'big', signed=True))
+        return keys
+
+    def similarity(self, signature, other):
+        """
+        Estimated Jaccard similarity of two signatures
+        """
+        return float(np.mean(signature == other))
+
+    def pack(self, signature):
+        return signature.astype('<u4').tobytes()
+
+    def unpack(self, data):
+        return np.frombuffer(data, dtype='<u4')
+
+    def best_match(self, signature, candidates):
+        """
+        (candidate, similarity) of the most similar (candidate, signature)
+        pair at or above the threshold, or (None, 0.0)
+        """
+        best, best_similarity = None, 0.0
+        for candidate, other in candidates:
+            similarity = self.similarity(signature, other)
+            if similarity >= self.threshold and similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        return best, best_similarity
@@ -0,0 +1,136 @@
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from services.nlp_engine import NLPEngine
+from services.sentiment_analyzer import SentimentAnalyzer
+from services.suggestion_generator import SuggestionGenerator
+from services.alert_system import AlertSystem
+from services.text_classifier import HashedTfidfClassifier
+
+
+class FeedbackAnalyzer:
+    """
+    Runs the full analysis pipeline (category, sentiment, suggestions,
+    urgency) for feedback text, one text at a time or in batches
+    """
+
+    def __init__(self, nlp_engine, sentiment_analyzer, suggestion_generator, alert_system, rules_file=None,
+                 model_file=None):
+        self.nlp_engine = nlp_engine
+        self.sentiment_analyzer = sentiment_analyzer
+        self.suggestion_generator = suggestion_generator
+        self.alert_system = alert_system
+        self.rules_file = rules_file
+        self.model_file = model_file
+        self.version = self._fingerprint()
+
+    @classmethod
+    def create(cls, rules_file=None, model_file=None, sentiment_mode='full', sentiment_auto_margin=0.05):
+        classifier = None
+        if model_file:
+            try:
+                classifier = HashedTfidfClassifier.load(model_file)
+            except Exception as e:
+                print(f"Warning: Could not load categorizer model, using keyword categorization: {e}")
+                model_file = None
+        return cls(NLPEngine(classifier=classifier), SentimentAnalyzer(sentiment_mode, sentiment_auto_margin),
+                   SuggestionGenerator(rules_file=rules_file), AlertSystem(), rules_file=rules_file,
+                   model_file=model_file)
+
+    def _fingerprint(self):
+        """
+        Short hash of everything that decides analysis results. Rows stamped
+        with an older version are stale and picked up by re-analysis.
+        """
+        config = {
+            'categories': self.nlp_engine.category_keywords,
+            'category_model': self.nlp_engine.classifier.version if self.nlp_engine.classifier is not None else None,
+            'sentiment': self.sentiment_analyzer.settings(),
+            'suggestions': self.suggestion_generator.category_suggestions,
+            'rules': [self.suggestion_generator.rule_engine.issues, self.suggestion_generator.rule_engine.rules],
+            'urgent': [self.alert_system.urgent_keywords, self.alert_system.severity_patterns]
+        }
+        encoded = json.dumps(config, sort_keys=True, default=sorted).encode('utf-8')
+        return hashlib.sha1(encoded).hexdigest()[:12]
+
+    def analyze(self, feedback_text, category=None):
+        """
+        Analyze one feedback text. Each step falls back to a neutral result
+        on error so a single failure never loses the submission. A category
+        computed in advance (see analyze_batch) skips categorization.
+        """
+        try:
+            if category is None:
+                category = self.nlp_engine.categorize_feedback(feedback_text)
+        except Exception as e:
+            print(f"Error in NLP categorization: {e}")
+            category = 'general'
+
+        try:
+            sentiment_result = self.sentiment_analyzer.analyze(feedback_text)
+            sentiment = sentiment_result['sentiment']
+            sentiment_score = sentiment_result['score']
+        except Exception as e:
+            print(f"Error in sentiment analysis: {e}")
+            sentiment = 'neutral'
+            sentiment_score = 0.0
+
+        try:
+            suggestions = self.suggestion_generator.generate_suggestion_list(feedback_text, category, sentiment)
+        except Exception as e:
+            print(f"Error in suggestion generation: {e}")
+            suggestions = []
+
+        try:
+            is_urgent = self.alert_system.check_urgent(feedback_text)
+        except Exception as e:
+            print(f"Error in alert system: {e}")
+            is_urgent = False
+
+        return {
+            'category': category,
+            'sentiment': sentiment,
+            'sentiment_score': sentiment_score,
+            'suggestions': suggestions,
+            'is_urgent': is_urgent
+        }
+
+    def create_pool(self, workers):
+        """
+        Process pool whose workers each hold their own analyzer
+        """
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(self.rules_file, self.model_file, self.sentiment_analyzer.mode,
+                                             self.sentiment_analyzer.auto_margin))
+
+    def analyze_batch(self, texts, pool=None, chunksize=32):
+        """
+        Analyze many texts, in parallel when a pool from create_pool is given.
+        With a category model the whole batch is categorized in one pass first.
+        """
+        categories = [None] * len(texts)
+        if self.nlp_engine.classifier is not None:
+            try:
+                categories = self.nlp_engine.categorize_batch(texts)
+            except Exception as e:
+                print(f"Error in NLP categorization: {e}")
+        if pool is None or len(texts) <= chunksize:
+            return [self.analyze(text, category) for text, category in zip(texts, categories)]
+        return list(pool.map(_analyze_in_worker, texts, categories, chunksize=chunksize))
+
+
+_worker_analyzer = None
+
+
+def _init_worker(rules_file, model_file, sentiment_mode, sentiment_auto_margin):
+    global _worker_analyzer
+    _worker_analyzer = FeedbackAnalyzer.create(rules_file, model_file, sentiment_mode, sentiment_auto_margin)
+
+
+def _analyze_in_worker(feedback_text, category=None):
+    return _worker_analyzer.analyze(feedback_text, category)
+
+
+def _analyze_batch_in_worker(texts):
+    return _worker_analyzer.analyze_batch(texts)
@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class QueueFull(Exception):
+    """The write queue holds its maximum number of pending items"""
+
+
+class GroupCommitQueue:
+    """
+    Write-behind queue that stores items from many request threads in shared
+    transactions. A writer thread takes the first queued item plus whatever
+    else arrives within max_wait seconds, up to max_batch items, and passes
+    them to commit_batch, which stores them in one transaction and returns
+    one result per item.
+
+    submit returns a Future that resolves only after commit_batch returns, so
+    an acknowledged item is durable. A caller that stops waiting cancels the
+    future; the item is then dropped unless the writer has already taken it.
+    A failed batch is retried in halves, so
+    an item that can't be stored fails on its own rather than taking the
+    rest of the batch with it; commit_batch must leave the items of a batch
+    it raises on as it found them. Once a half of more than one item fails
+    throughout, the fault is taken to be the database's and the rest of the
+    batch gets the exception without further attempts. A writer thread that
+    has died is replaced by the next submit.
+    """
+
+    def __init__(self, commit_batch, max_batch=100, max_wait=0.01, max_pending=1000):
+        self.commit_batch = commit_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        """Future for item's commit_batch result; raises QueueFull when the queue is at capacity"""
+        self._ensure_started()
+        future = Future()
+        try:
+            self.queue.put_nowait((item, future))
+        except queue.Full:
+            raise QueueFull(f"{self.queue.maxsize} writes already pending")
+        return future
+
+    def _ensure_started(self):
+        # Started on first use, so the thread runs in the process serving requests (after a gunicorn fork)
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Items whose requests gave up waiting are dropped; the rest can no longer be cancelled
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._commit(batch)
+            except BaseException as e:
+                # Whatever escapes commit_batch must not leave requests waiting on the batch
+                print(f"Group commit writer error: {e!r}")
+                error = e if isinstance(e, Exception) else RuntimeError(f"Group commit writer error: {e!r}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _commit(self, batch):
+        """Commit (item, future) pairs, splitting the batch on failure; True if any item was stored"""
+        try:
+            results = self.commit_batch([item for item, _ in batch])
+        except Exception as e:
+            print(f"Group commit of {len(batch)} items failed: {e}")
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return False
+            middle = len(batch) // 2
+            stored = self._commit(batch[:middle])
+            if not stored and middle > 1:
+                for _, future in batch[middle:]:
+                    future.set_exception(e)
+                return False
+            return self._commit(batch[middle:]) or stored
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        return True
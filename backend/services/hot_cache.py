@@ -0,0 +1,267 @@
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Sentiment scores are stored by the analyzer rounded to this many places, so
+# float32 storage is lossless once rounded back
+SCORE_DECIMALS = 3
+
+EPOCH = datetime(1970, 1, 1)
+MICROS_PER_DAY = 86_400_000_000
+
+# Low-cardinality string columns, stored as int32 codes (0 is None)
+INTERNED_COLUMNS = ('student_id', 'class_name', 'course_id', 'instructor_id', 'feedback_type', 'category',
+                    'sentiment', 'suggestion_ids')
+
+# Free text, kept as Python strings
+TEXT_COLUMNS = ('feedback_text', 'suggestions_text')
+
+# Feedback attributes the cache holds, in the order rows are passed to load/add
+COLUMNS = ('id', 'timestamp', 'sentiment_score', 'is_urgent', 'duplicate_of') + INTERNED_COLUMNS + TEXT_COLUMNS
+
+# A cached feedback row, with the same attribute names as the Feedback model
+CachedFeedback = namedtuple('CachedFeedback', COLUMNS)
+
+# Rows with the fields analytics_summary reads from feedback_rollup
+RollupRow = namedtuple('RollupRow', 'original category sentiment day count score_sum score_count urgent')
+
+
+def to_micros(timestamp):
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros):
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+class Interner:
+    """Two-way map between strings and dense int32 codes; code 0 stands for None"""
+
+    def __init__(self):
+        self.values = [None]
+        self.codes = {None: 0}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        """Code of an already seen value, or -1 (matches nothing)"""
+        return self.codes.get(value, -1)
+
+
+class HotFeedbackCache:
+    """
+    The newest `capacity` feedback rows, stored column-wise in a ring of
+    numpy arrays: int64 ids and microsecond timestamps, float32 scores,
+    bit-packed urgent flags, int32 codes for repeated strings and Python
+    strings only for free text. Filters and aggregates run as vectorized
+    operations over the ring; only the rows returned become Python objects.
+
+    The caller keeps it in step with the database (see sync_hot_cache in
+    app.py): load replaces the contents, add appends rows not held yet,
+    evicting the oldest. horizon is the newest timestamp of any row not
+    held, so queries know exactly when the cache can't answer them.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            capacity = self.capacity
+            self.size = 0
+            self.head = 0  # next slot to write
+            self.ids = np.zeros(capacity, dtype=np.int64)
+            self.timestamps = np.zeros(capacity, dtype=np.int64)
+            self.scores = np.full(capacity, np.nan, dtype=np.float32)
+            self.urgent_bits = np.zeros((capacity + 7) // 8, dtype=np.uint8)
+            self.duplicate_of = np.zeros(capacity, dtype=np.int64)  # 0 for originals
+            self.interners = {column: Interner() for column in INTERNED_COLUMNS}
+            self.codes = {column: np.zeros(capacity, dtype=np.int32) for column in INTERNED_COLUMNS}
+            self.texts = {column: np.empty(capacity, dtype=object) for column in TEXT_COLUMNS}
+            self.horizon = None  # µs; None while every feedback row is held
+
+    @property
+    def complete(self):
+        return self.horizon is None
+
+    def load(self, rows, newest_left_out=None):
+        """
+        Replace the contents with rows (sequences in COLUMNS order, oldest
+        first); newest_left_out is the newest timestamp of the feedback rows
+        not loaded, None if there are none
+        """
+        with self.lock:
+            self.clear()
+            if newest_left_out is not None:
+                self.horizon = to_micros(newest_left_out)
+            self._append(rows)
+
+    def add(self, rows):
+        """
+        Append rows not held yet (sequences in COLUMNS order, oldest
+        first). Once the ring is full, rows older than every held id are
+        left out rather than evicting newer ones.
+        """
+        with self.lock:
+            if self.size and rows:
+                held = self.ids[:self.size]
+                ids = np.array([row[0] for row in rows], dtype=np.int64)
+                keep = ~np.isin(ids, held)
+                if self.size == self.capacity:
+                    keep &= ids > held.min()
+                rows = [row for row, kept in zip(rows, keep.tolist()) if kept]
+            self._append(rows)
+
+    def _append(self, rows):
+        if not rows:
+            return
+        if len(rows) > self.capacity:
+            self._leave_out(max(to_micros(row[1]) for row in rows[:-self.capacity]))
+            rows = rows[-self.capacity:]
+        n = len(rows)
+        slots = (self.head + np.arange(n)) % self.capacity
+        evicted = max(0, self.size + n - self.capacity)
+        if evicted:
+            self._leave_out(int(self.timestamps[slots[n - evicted:]].max()))
+        self.size = min(self.capacity, self.size + n)
+        self.head = (self.head + n) % self.capacity
+
+        columns = list(zip(*rows))
+        self.ids[slots] = np.array(columns[0], dtype=np.int64)
+        self.timestamps[slots] = np.array(columns[1], dtype='datetime64[us]').astype(np.int64)
+        self.scores[slots] = np.array(columns[2], dtype=np.float64)  # None becomes NaN
+        urgent = self.urgent()
+        urgent[slots] = np.array(columns[3], dtype=bool)
+        self.urgent_bits = np.packbits(urgent, bitorder='little')
+        self.duplicate_of[slots] = np.array([value or 0 for value in columns[4]], dtype=np.int64)
+        for column, values in zip(INTERNED_COLUMNS, columns[5:]):
+            code = self.interners[column].code
+            self.codes[column][slots] = np.fromiter((code(value) for value in values), dtype=np.int32, count=n)
+        for column, values in zip(TEXT_COLUMNS, columns[5 + len(INTERNED_COLUMNS):]):
+            self.texts[column][slots] = values
+
+    def _leave_out(self, timestamp):
+        self.horizon = timestamp if self.horizon is None else max(self.horizon, timestamp)
+
+    def covers(self, since=None):
+        """True when every row at or after since (a datetime, None for all rows) is held"""
+        if self.horizon is None:
+            return True
+        return since is not None and to_micros(since) > self.horizon
+
+    def urgent(self):
+        return np.unpackbits(self.urgent_bits, count=self.capacity, bitorder='little').astype(bool)
+
+    def held_ids(self, low_id):
+        """Number of held rows with an id above low_id"""
+        with self.lock:
+            return int(np.count_nonzero(self.ids[:self.size] > low_id))
+
+    def oldest_id(self):
+        with self.lock:
+            return int(self.ids[:self.size].min()) if self.size else 0
+
+    def _slots(self, filters, since=None, before=None):
+        mask = np.zeros(self.capacity, dtype=bool)
+        mask[:self.size] = True
+        for column, value in filters.items():
+            mask &= self.codes[column] == self.interners[column].lookup(value)
+        if since is not None:
+            mask &= self.timestamps >= to_micros(since)
+        if before is not None:
+            timestamp, feedback_id = to_micros(before[0]), before[1]
+            mask &= (self.timestamps < timestamp) | ((self.timestamps == timestamp) & (self.ids < feedback_id))
+        return np.flatnonzero(mask)
+
+    def select(self, filters, since=None, limit=None, before=None):
+        """
+        CachedFeedback rows newest first whose interned columns equal
+        filters, whose timestamp is at or after since and which come after
+        the (timestamp, id) before cursor, or None when a row the cache
+        doesn't hold could be among them
+        """
+        with self.lock:
+            slots = self._slots(filters, since, before)
+            # Newest first, like ORDER BY timestamp DESC (ties by id)
+            order = np.lexsort((-self.ids[slots], -self.timestamps[slots]))
+            if limit is not None:
+                order = order[:limit]
+            picked = slots[order]
+            if not self.covers(since):
+                # A limited list still holds if its oldest row is newer than every row left out
+                if limit is None or len(picked) < limit or self.timestamps[picked[-1]] <= self.horizon:
+                    return None
+            urgent = self.urgent()[picked].tolist()
+            scores = self.scores[picked].astype(np.float64).round(SCORE_DECIMALS).tolist()
+            codes = [self.codes[column][picked].tolist() for column in INTERNED_COLUMNS]
+            values = [self.interners[column].values for column in INTERNED_COLUMNS]
+            rows = []
+            for i, slot in enumerate(picked.tolist()):
+                rows.append(CachedFeedback(
+                    int(self.ids[slot]),
+                    from_micros(self.timestamps[slot]),
+                    None if scores[i] != scores[i] else scores[i],  # NaN
+                    urgent[i],
+                    int(self.duplicate_of[slot]) or None,
+                    *(lookup[column_codes[i]] for lookup, column_codes in zip(values, codes)),
+                    *(self.texts[column][slot] for column in TEXT_COLUMNS)
+                ))
+            return rows
+
+    def rollup(self, filters, since=None):
+        """
+        RollupRow per (original, category, sentiment, day) of the rows
+        select would match, or None when the cache doesn't hold them all
+        """
+        with self.lock:
+            if not self.covers(since):
+                return None
+            slots = self._slots(filters, since)
+            if not len(slots):
+                return []
+            scores = self.scores[slots].astype(np.float64)
+            scored = ~np.isnan(scores)
+            # One int64 key per (day, category, sentiment, original), so grouping is a 1-d unique
+            categories = self.interners['category'].values
+            sentiments = self.interners['sentiment'].values
+            days = self.timestamps[slots] // MICROS_PER_DAY
+            first_day = int(days.min())
+            keys = (days - first_day) * len(categories) + self.codes['category'][slots]
+            keys = keys * len(sentiments) + self.codes['sentiment'][slots]
+            keys = keys * 2 + (self.duplicate_of[slots] == 0)
+            groups, inverse = np.unique(keys, return_inverse=True)
+            counts = np.bincount(inverse)
+            score_sums = np.bincount(inverse, weights=np.where(scored, scores.round(SCORE_DECIMALS), 0.0))
+            score_counts = np.bincount(inverse, weights=scored)
+            urgent = np.bincount(inverse, weights=self.urgent()[slots])
+
+            rows = []
+            for key, count, score_sum, score_count, urgent_count in zip(
+                    groups.tolist(), counts.tolist(), score_sums.tolist(), score_counts.tolist(), urgent.tolist()):
+                key, original = divmod(key, 2)
+                key, sentiment = divmod(key, len(sentiments))
+                day, category = divmod(key, len(categories))
+                rows.append(RollupRow(bool(original), categories[category], sentiments[sentiment],
+                                      (EPOCH + timedelta(days=first_day + day)).strftime('%Y-%m-%d'), count,
+                                      score_sum, int(score_count), int(urgent_count)))
+            return rows
+
+    def memory_bytes(self):
+        """Approximate bytes held: the arrays plus interned and free-text strings"""
+        with self.lock:
+            total = self.ids.nbytes + self.timestamps.nbytes + self.scores.nbytes + self.urgent_bits.nbytes
+            total += self.duplicate_of.nbytes + sum(codes.nbytes for codes in self.codes.values())
+            for interner in self.interners.values():
+                total += sum(len(value) + 49 for value in interner.values[1:])  # str header is 49 bytes
+            for texts in self.texts.values():
+                total += texts.nbytes + sum(len(text) + 49 for text in texts[:self.size] if text is not None)
+            return total
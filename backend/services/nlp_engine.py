@@ -2,7 +2,10 @@ import re
 from collections import Counter
 
 class NLPEngine:
-    def __init__(self):
+    def __init__(self, classifier=None):
+        # Optional HashedTfidfClassifier; keyword counting is used without one
+        self.classifier = classifier
+        
         # Define keywords for different categories
         self.category_keywords = {
             'teaching_style': [
@@ -34,6 +37,20 @@ class NLPEngine:
         # Initialize category scores
         for category in self.category_keywords:
             self.category_keywords[category] = [word.lower() for word in self.category_keywords[category]]
+        
+        # Words that never make a useful phrase on their own
+        self.stopwords = {
+            'the', 'and', 'for', 'are', 'was', 'were', 'but', 'not', 'you', 'your', 'our', 'his', 'her',
+            'its', "it's", 'this', 'that', 'these', 'those', 'with', 'from', 'have', 'has', 'had', 'they',
+            'them', 'their', 'there', 'then', 'than', 'what', 'which', 'who', 'when', 'where', 'why', 'how',
+            'all', 'any', 'can', 'could', 'would', 'should', 'will', 'just', 'very', 'too', 'also', 'more',
+            'most', 'much', 'many', 'some', 'such', 'only', 'own', 'same', 'other', 'into', 'about', 'over',
+            'again', 'once', 'here', 'both', 'each', 'few', 'nor', 'off', 'out', 'yet', 'did', 'does',
+            'doing', 'been', 'being', 'because', 'while', 'during', 'before', 'after', 'above', 'below',
+            'under', 'between', 'through', 'get', 'got', 'really', 'don', "don't", 'didn', "didn't", 'isn',
+            "isn't", "i'm", 'sir', 'mam', 'maam', 'please', 'thank', 'thanks', 'one', 'lot', 'well', 'even'
+        }
+        self.token_pattern = re.compile(r"[a-z][a-z']+")
     
     def categorize_feedback(self, feedback_text):
         """
@@ -42,6 +59,24 @@ class NLPEngine:
         if not feedback_text:
             return 'general'
         
+        if self.classifier is not None:
+            return self.classifier.predict([feedback_text])[0]
+        
+        return self.categorize_by_keywords(feedback_text)
+    
+    def categorize_batch(self, feedback_texts):
+        """
+        Categorize many texts; the model scores them all in one product
+        """
+        if self.classifier is None:
+            return [self.categorize_feedback(text) for text in feedback_texts]
+        categories = self.classifier.predict(feedback_texts)
+        return [category if text else 'general' for text, category in zip(feedback_texts, categories)]
+    
+    def categorize_by_keywords(self, feedback_text):
+        """
+        Category whose keywords occur most often in the text
+        """
         feedback_lower = feedback_text.lower()
         category_scores = {}
         
@@ -61,18 +96,36 @@ class NLPEngine:
     
     def extract_key_phrases(self, feedback_text):
         """
-        Extract key phrases from feedback
+        Extract key phrases from feedback: two-word phrases first, then single terms
         """
-        # Simple key phrase extraction using common patterns
-        sentences = re.split(r'[.!?]+', feedback_text)
-        key_phrases = []
+        terms = self.extract_terms(feedback_text)
+        phrases = [term for term in terms if ' ' in term] + [term for term in terms if ' ' not in term]
+        return phrases[:5]  # Return top 5 key phrases
+    
+    def extract_terms(self, feedback_text):
+        """
+        Distinct unigrams and bigrams (stopwords removed, bigrams only across
+        adjacent content words) in order of first appearance. Used for
+        corpus-level phrase trends, where each feedback counts a term once.
+        """
+        if not feedback_text:
+            return []
         
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if len(sentence) > 10:  # Filter out very short sentences
-                key_phrases.append(sentence)
+        terms = {}
+        previous = None
+        for sentence in re.split(r'[.!?;,:\n]+', feedback_text.lower()):
+            previous = None
+            for token in self.token_pattern.findall(sentence):
+                token = token.strip("'")
+                if len(token) < 3 or token in self.stopwords:
+                    previous = None
+                    continue
+                terms.setdefault(token, None)
+                if previous:
+                    terms.setdefault(f"{previous} {token}", None)
+                previous = token
         
-        return key_phrases[:5]  # Return top 5 key phrases
+        return [term[:100] for term in terms]
     
     def detect_topics(self, feedback_text):
         """
@@ -0,0 +1,451 @@
+import asyncio
+import contextvars
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from functools import lru_cache
+
+from sqlalchemy import event
+
+try:
+    from greenlet import getcurrent
+except ImportError:
+    getcurrent = None
+
+# SQLAlchemy's event dispatch, left out of the stacks queries are filed under
+EVENT_MODULES = (os.path.join('sqlalchemy', 'event', ''), os.path.join('sqlalchemy', 'engine', 'events.py'))
+_in_event_dispatch = {}  # id of a code object -> whether it belongs to EVENT_MODULES
+
+# Stacks hold ids of code objects, which hash far faster than the code
+# objects do; this keeps every code object seen alive so its id stays unique
+_codes = {}
+
+
+def code_stack(frame):
+    """Code object ids of frame and its callers, outermost first"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        key = id(code)
+        if key not in _codes:
+            _codes[key] = code
+        stack.append(key)
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def from_task(stack, task):
+    """stack from asyncio task's outermost coroutine on, without the event loop above it"""
+    code = getattr(task.get_coro(), 'cr_code', None)
+    try:
+        return stack[stack.index(id(code)):]
+    except ValueError:
+        return stack
+
+
+def task_stack(task, frame):
+    """
+    Stack of an asyncio task given its thread's current frame: that
+    thread's stack while the task runs, else the coroutines it is suspended
+    in with a '(waiting)' leaf
+    """
+    if asyncio.current_task(task.get_loop()) is task:
+        return from_task(code_stack(frame), task) if frame is not None else ()
+    stack = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        code = frame.f_code
+        if id(code) not in _codes:
+            _codes[id(code)] = code
+        stack.append(id(code))
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return tuple(stack) + ('(waiting)',) if stack else ()
+
+
+class RequestProfile:
+    """
+    Stack samples and SQL queries of one request.
+
+    Queries are timed exactly and each is filed under the stack that ran it;
+    the samples share out the rest of the request's time among Python
+    stacks. A stack is a tuple of code object ids (see code_stack), with a
+    str leaf for a query or a builtin function.
+    """
+
+    __slots__ = ('id', 'method', 'path', 'trigger', 'thread', 'task', 'sample_from', 'timestamp', 'started',
+                 'sampled_at', 'duration', 'status', 'samples', 'sample_count', 'sql_stacks', 'sql_running', 'queries',
+                 'sql_totals')
+
+    # Queries listed one by one in a profile; later ones are only aggregated
+    MAX_QUERIES = 2000
+
+    def __init__(self, profile_id, method, path, trigger, task=None):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.trigger = trigger  # 'requested' (header or query parameter) or 'slow'
+        self.thread = threading.get_ident()
+        self.task = task  # asyncio task of a request served on an event loop
+        self.sample_from = None  # perf_counter from which the sampler thread samples it, if it does
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.sampled_at = self.started
+        self.duration = None
+        self.status = None
+        self.samples = {}  # stack -> weight of the samples taken there outside queries
+        self.sample_count = 0
+        self.sql_stacks = {}  # stack + ('SQL: statement',) -> seconds
+        self.sql_running = None  # (statement, perf_counter at start, stack) while a query runs
+        self.queries = []  # (start ms, duration ms, statement)
+        self.sql_totals = {}  # statement -> [count, total ms, max ms]
+
+    def query_started(self, statement, stack, now):
+        self.sql_running = (statement, now, stack)
+
+    def query_finished(self, now):
+        statement, start, stack = self.sql_running
+        self.sql_running = None
+        # Samples are spaced in time outside queries
+        self.sampled_at += now - start
+        key = stack + (f"SQL: {statement}",)
+        self.sql_stacks[key] = self.sql_stacks.get(key, 0.0) + now - start
+        elapsed = (now - start) * 1000
+        if len(self.queries) < self.MAX_QUERIES:
+            self.queries.append(((start - self.started) * 1000, elapsed, statement))
+        totals = self.sql_totals.setdefault(statement, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += elapsed
+        if elapsed > totals[2]:
+            totals[2] = elapsed
+
+    def sample(self, stack, weight):
+        self.samples[stack] = self.samples.get(stack, 0) + weight
+        self.sample_count += 1
+
+    def sql_summary(self):
+        """Queries grouped by statement, most total time first"""
+        return [{'statement': statement, 'count': count, 'total_ms': round(total, 3), 'max_ms': round(longest, 3)}
+                for statement, (count, total, longest)
+                in sorted(self.sql_totals.items(), key=lambda item: item[1][1], reverse=True)]
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'trigger': self.trigger,
+            'timestamp': self.timestamp,
+            'status': self.status,
+            'duration_ms': round(self.duration * 1000, 3) if self.duration is not None else None,
+            'samples': self.sample_count,
+            'sql_queries': sum(count for count, _, _ in self.sql_totals.values()),
+            'sql_ms': round(sum(total for _, total, _ in self.sql_totals.values()), 3)
+        }
+
+    def stack_times(self):
+        """Seconds per stack: queries as timed, the rest of the request shared out by sample weight"""
+        times = Counter(self.sql_stacks)
+        sampled = sum(self.samples.values())
+        if sampled and self.duration is not None:
+            python_seconds = max(0.0, self.duration - sum(self.sql_stacks.values()))
+            for stack, weight in self.samples.items():
+                times[stack] += python_seconds * weight / sampled
+        return times
+
+    def to_dict(self, top=20):
+        """Summary, SQL timings and the top stacks by time"""
+        data = self.summary()
+        data['sql'] = self.sql_summary()
+        data['queries'] = [{'start_ms': round(start, 3), 'duration_ms': round(elapsed, 3), 'statement': statement}
+                           for start, elapsed, statement in self.queries]
+        data['top_stacks'] = [{'ms': round(seconds * 1000, 3), 'stack': [frame_name(f) for f in stack]}
+                              for stack, seconds in self.stack_times().most_common(top)]
+        return data
+
+    def collapsed(self):
+        """Collapsed stacks (flamegraph.pl, speedscope), root first, weighted in microseconds"""
+        lines = []
+        for stack, seconds in self.stack_times().items():
+            frames = ';'.join(frame_name(f).replace(';', ',') for f in stack)
+            lines.append(f"{frames} {max(1, round(seconds * 1e6))}")
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self):
+        """
+        speedscope file: the stacks in milliseconds, and the SQL queries as
+        an evented profile on the request's timeline
+        """
+        frames, index = [], {}
+
+        def frame_index(frame):
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append(frame_dict(frame))
+            return index[frame]
+
+        samples, weights = [], []
+        for stack, seconds in self.stack_times().items():
+            samples.append([frame_index(f) for f in stack])
+            weights.append(seconds * 1000)
+        duration = (self.duration or 0) * 1000
+        events = []
+        for start, elapsed, statement in self.queries:
+            frame = frame_index(f"SQL: {statement}")
+            events.append({'type': 'O', 'frame': frame, 'at': start})
+            events.append({'type': 'C', 'frame': frame, 'at': start + elapsed})
+        name = f"{self.method} {self.path} ({duration:.0f} ms)"
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'feedback-analyzer',
+            'activeProfileIndex': 0,
+            'shared': {'frames': frames},
+            'profiles': [
+                {'type': 'sampled', 'name': name, 'unit': 'milliseconds', 'startValue': 0,
+                 'endValue': sum(weights), 'samples': samples, 'weights': weights},
+                {'type': 'evented', 'name': f"SQL: {name}", 'unit': 'milliseconds', 'startValue': 0,
+                 'endValue': max(duration, events[-1]['at'] if events else 0), 'events': events}
+            ]
+        }
+
+
+_frame_names = {}
+
+
+def short_path(filename):
+    """filename relative to the sys.path entry it was imported from"""
+    best = ''
+    for entry in sys.path:
+        if entry and filename.startswith(entry) and len(entry) > len(best):
+            best = entry
+    return filename[len(best):].lstrip(os.sep) if best else filename
+
+
+def frame_dict(frame):
+    """speedscope frame of a stack entry"""
+    if isinstance(frame, str):
+        return {'name': frame}
+    code = _codes[frame]
+    return {'name': getattr(code, 'co_qualname', code.co_name), 'file': short_path(code.co_filename),
+            'line': code.co_firstlineno}
+
+
+def frame_name(frame):
+    """'function (file:line)' of a stack entry; a str leaf as it is"""
+    if isinstance(frame, str):
+        return frame
+    name = _frame_names.get(frame)
+    if name is None:
+        code = _codes[frame]
+        name = _frame_names[frame] = (f"{getattr(code, 'co_qualname', code.co_name)} "
+                                      f"({short_path(code.co_filename)}:{code.co_firstlineno})")
+    return name
+
+
+@lru_cache(maxsize=1024)
+def statement_key(statement, limit=300):
+    """A statement with whitespace collapsed, cut to limit characters"""
+    statement = re.sub(r'\s+', ' ', statement).strip()
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of requests, in one of two ways.
+
+    Requested profiles sample in the request's own thread: a sys.setprofile
+    hook, called on every function call and return, records the stack with
+    the time since the last record once `interval` seconds have passed.
+    This is accurate, but slows Python-heavy requests down two to three
+    times, so it is only for requests an admin asks to profile.
+
+    Every other request is watched for the slow log by one daemon thread
+    per process, which records the stack of each request that has run for
+    a tenth of slow_seconds every `interval` seconds after that; requests
+    that finish sooner are never sampled. That costs the request threads
+    nothing, but the sampler can only run while it holds the GIL, which it
+    mostly gets when the request thread releases it, so samples pile up in
+    code that releases the GIL (numpy, I/O) and miss code that holds it.
+
+    Requests served as asyncio tasks share their thread with the rest of
+    the event loop, so a hook there would profile every task: they are
+    sampled by the daemon thread instead, from the start when requested.
+    A sample is the loop thread's stack while the task runs, and the
+    coroutines it awaits in otherwise.
+
+    Either way queries are timed exactly through install_sql_timing and
+    samples inside a query are left out. Requested profiles are always
+    kept; slow ones only when they took at least slow_seconds. The last
+    log_size of each are kept in memory.
+    """
+
+    def __init__(self, interval=0.005, slow_seconds=2.0, log_size=50):
+        self.interval = interval
+        self.slow_seconds = slow_seconds
+        self.sample_after = slow_seconds / 10
+        self.active = {}  # profile id -> RequestProfile
+        self._current = contextvars.ContextVar('request_profile', default=None)
+        self.logs = {'requested': deque(maxlen=log_size), 'slow': deque(maxlen=log_size)}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def start(self, method, path, trigger, task=None):
+        """
+        Profile the calling context's request until stop(); task is the
+        request's asyncio task when it is served on an event loop
+        """
+        pid = os.getpid()
+        profile = RequestProfile(f"{pid}-{next(self._ids)}", method, path, trigger, task)
+        hooked = trigger == 'requested' and task is None
+        if not hooked:
+            profile.sample_from = profile.started + (self.sample_after if trigger == 'slow' else 0)
+        with self._lock:
+            self.active[profile.id] = profile
+            # Threads do not survive a fork, so each worker starts its own sampler
+            if not hooked and self._pid != pid:
+                self._pid = pid
+                threading.Thread(target=self._sample, name='request-profiler', daemon=True).start()
+        self._current.set(profile)
+        if hooked:
+            sys.setprofile(self._hook(profile))
+        elif not self._wake.is_set():
+            self._wake.set()
+        return profile
+
+    def stop(self, profile, status):
+        """Finish profile; True if it was kept in the log. Calling it again does nothing."""
+        with self._lock:
+            if self.active.pop(profile.id, None) is None:
+                return False
+        if self._current.get() is profile:
+            self._current.set(None)
+        if profile.sample_from is None:
+            sys.setprofile(None)
+        now = time.perf_counter()
+        profile.duration = now - profile.started
+        profile.status = status
+        if profile.sql_running is not None:
+            profile.query_finished(now)
+        if profile.trigger != 'requested' and profile.duration < self.slow_seconds:
+            return False
+        with self._lock:
+            self.logs[profile.trigger].append(profile)
+        return True
+
+    def get(self, profile_id):
+        with self._lock:
+            for log in self.logs.values():
+                for profile in log:
+                    if profile.id == profile_id:
+                        return profile
+        return None
+
+    def recent(self, trigger):
+        """Kept profiles of trigger, newest first"""
+        with self._lock:
+            return list(reversed(self.logs[trigger]))
+
+    def current(self):
+        """The calling context's profile, if its request is being profiled"""
+        return self._current.get()
+
+    def _hook(self, profile):
+        interval = self.interval
+        clock = time.perf_counter
+
+        def hook(frame, event, arg):
+            now = clock()
+            if now - profile.sampled_at < interval or profile.sql_running is not None:
+                return
+            # The time since the last record went to the caller before a
+            # call, and to the function itself before a return
+            if event == 'call':
+                stack = code_stack(frame.f_back)
+            elif event in ('c_return', 'c_exception'):
+                stack = code_stack(frame) + (f"{getattr(arg, '__qualname__', arg)} (built-in)",)
+            else:
+                stack = code_stack(frame)
+            profile.sample(stack, now - profile.sampled_at)
+            profile.sampled_at = now
+        return hook
+
+    def _sample(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                profiles = [profile for profile in self.active.values() if profile.sample_from is not None]
+                if not profiles:
+                    self._wake.clear()
+                    continue
+            now = time.perf_counter()
+            first = min(profile.sample_from for profile in profiles)
+            if first > now:
+                # Nothing has run long enough to be sampled yet
+                time.sleep(max(first - now, self.interval))
+                continue
+            frames = sys._current_frames()
+            for profile in profiles:
+                if profile.sample_from > now or profile.sql_running is not None:
+                    continue
+                frame = frames.get(profile.thread)
+                if profile.task is not None:
+                    stack = task_stack(profile.task, frame)
+                else:
+                    stack = code_stack(frame) if frame is not None else ()
+                if stack:
+                    profile.sample(stack, 1)
+            frames = frame = None
+            time.sleep(self.interval)
+
+
+def install_sql_timing(engine, profiler):
+    """Time engine's queries into the profile of the request running them, if any"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def query_started(conn, cursor, statement, parameters, context, executemany):
+        profile = profiler.current()
+        if profile is not None:
+            frame = sys._getframe(1)
+            while frame is not None:
+                dispatch = _in_event_dispatch.get(id(frame.f_code))
+                if dispatch is None:
+                    # Code objects here live as long as SQLAlchemy's modules, so their ids stay unique
+                    dispatch = _in_event_dispatch[id(frame.f_code)] = any(
+                        module in frame.f_code.co_filename for module in EVENT_MODULES)
+                if not dispatch:
+                    break
+                frame = frame.f_back
+            stack = code_stack(frame)
+            # The async engine runs queries in a greenlet; its parent holds the code that awaited them
+            parent = getcurrent().parent if getcurrent is not None else None
+            if parent is not None and parent.gr_frame is not None:
+                stack = code_stack(parent.gr_frame) + stack
+            if profile.task is not None:
+                if profile.thread == threading.get_ident():
+                    stack = from_task(stack, profile.task)
+                else:
+                    # From an executor thread, under the coroutines waiting for it
+                    stack = task_stack(profile.task, None)[:-1] + stack
+            profile.query_started(statement_key(statement), stack, time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def query_finished(conn, cursor, statement, parameters, context, executemany):
+        profile = profiler.current()
+        if profile is not None and profile.sql_running is not None:
+            profile.query_finished(time.perf_counter())
+
+    @event.listens_for(engine, 'handle_error')
+    def query_failed(exception_context):
+        profile = profiler.current()
+        if profile is not None and profile.sql_running is not None:
+            profile.query_finished(time.perf_counter())
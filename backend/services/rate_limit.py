@@ -0,0 +1,177 @@
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+
+# Token bucket refilled at per_minute tokens a minute, holding at most burst
+RateLimit = namedtuple('RateLimit', 'per_minute burst')
+
+
+def take_token(tokens, updated, now, limit):
+    """
+    One token bucket step: refill a bucket last left with tokens at time
+    updated, then take a token. Returns (tokens left, seconds until a token
+    is available), the wait being 0 when a token was taken.
+    """
+    tokens = min(limit.burst, tokens + (now - updated) * limit.per_minute / 60)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) * 60 / limit.per_minute
+
+
+def full_at(tokens, now, limit):
+    # When a bucket is full again, and so no different from a new one
+    return now + (limit.burst - tokens) * 60 / limit.per_minute
+
+
+class LocalRateLimiter:
+    """
+    Token buckets and outcome counts in this process's memory; with several
+    workers each one limits on its own, so a client can get up to workers
+    times the configured rate
+    """
+
+    name = 'local'
+
+    def __init__(self, max_buckets=100_000):
+        self.max_buckets = max_buckets
+        self.buckets = {}  # (limit_class, key) -> (tokens, updated, full_at)
+        self._counts = Counter()  # (limit_class, 'allowed' or 'throttled') -> requests
+        self._lock = threading.Lock()
+
+    def acquire(self, limit_class, key, limit, now=None):
+        """Take a token from key's bucket of limit_class; seconds to wait when there is none, else 0"""
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated, _ = self.buckets.get((limit_class, key), (limit.burst, now, now))
+            tokens, wait = take_token(tokens, updated, now, limit)
+            if not wait:
+                self.buckets[(limit_class, key)] = (tokens, now, full_at(tokens, now, limit))
+                if len(self.buckets) > self.max_buckets:
+                    self.buckets = {k: bucket for k, bucket in self.buckets.items() if bucket[2] > now}
+            self._counts[(limit_class, 'throttled' if wait else 'allowed')] += 1
+        return wait
+
+    def counts(self):
+        """{limit_class: {outcome: count}}"""
+        with self._lock:
+            counts = {}
+            for (limit_class, outcome), value in self._counts.items():
+                counts.setdefault(limit_class, {})[outcome] = value
+            return counts
+
+
+class SqliteRateLimiter:
+    """
+    Token buckets and outcome counts in a SQLite file, shared by every worker
+    process on the host. Each acquire is one short write transaction; the
+    file holds only limiter state, so it skips fsync.
+    """
+
+    name = 'sqlite'
+
+    SCHEMA = [
+        'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL,'
+        ' full_at REAL NOT NULL) WITHOUT ROWID',
+        'CREATE INDEX IF NOT EXISTS buckets_full_at ON buckets (full_at)',
+        'CREATE TABLE IF NOT EXISTS counts (limit_class TEXT, outcome TEXT, value INTEGER NOT NULL,'
+        ' PRIMARY KEY (limit_class, outcome)) WITHOUT ROWID',
+    ]
+    COUNT = ('INSERT INTO counts VALUES (?, ?, ?) '
+             'ON CONFLICT (limit_class, outcome) DO UPDATE SET value = value + excluded.value')
+
+    # Full buckets are deleted at most this often per worker
+    PRUNE_SECONDS = 60
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._pruned_at = 0.0
+        with self._connection() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connection(self):
+        # One connection per thread, in autocommit mode so transactions are explicit
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, limit_class, key, limit, now=None):
+        """Take a token from key's bucket of limit_class; seconds to wait when there is none, else 0"""
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            bucket = f"{limit_class}:{key}"
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (bucket,)).fetchone()
+            tokens, updated = row if row else (limit.burst, now)
+            tokens, wait = take_token(tokens, updated, now, limit)
+            if not wait:
+                conn.execute('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)',
+                             (bucket, tokens, now, full_at(tokens, now, limit)))
+            conn.execute(self.COUNT, (limit_class, 'throttled' if wait else 'allowed', 1))
+            if now - self._pruned_at > self.PRUNE_SECONDS:
+                self._pruned_at = now
+                conn.execute('DELETE FROM buckets WHERE full_at <= ?', (now,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def counts(self):
+        """{limit_class: {outcome: count}}, summed over every worker"""
+        counts = {}
+        for limit_class, outcome, value in self._connection().execute('SELECT * FROM counts'):
+            counts.setdefault(limit_class, {})[outcome] = value
+        return counts
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` holders at a time in this process. Callers wait up to
+    max_wait seconds for a slot, so short bursts queue briefly instead of
+    failing, while sustained overload is turned away quickly.
+    """
+
+    def __init__(self, limit, max_wait=2.0):
+        self.limit = limit
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.peak = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """True once a slot is held; False if none freed up within timeout seconds (max_wait by default)"""
+        timeout = self.max_wait if timeout is None else timeout
+        if not (self._slots.acquire(timeout=timeout) if timeout > 0 else self._slots.acquire(blocking=False)):
+            return False
+        with self._lock:
+            self.admitted += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        return True
+
+    def reject(self):
+        """Count a request turned away for want of a slot"""
+        with self._lock:
+            self.rejected += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {'max_concurrent': self.limit, 'in_flight': self.in_flight, 'peak': self.peak,
+                    'admitted': self.admitted, 'rejected': self.rejected}
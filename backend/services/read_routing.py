@@ -0,0 +1,36 @@
+import time
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+
+# Flask session key holding the time of the user's last successful write
+LAST_WRITE_KEY = 'last_write_at'
+
+
+class ReadRoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that runs queries on the read engine chosen for
+    the current request with use_read_engine. Flushes, and requests that
+    did not choose one, use the usual bind.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            engine = g.get('read_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_read_engine(engine):
+    """Send this request's session queries to engine"""
+    g.read_engine = engine
+
+
+def record_write(user_session):
+    user_session[LAST_WRITE_KEY] = time.time()
+
+
+def wrote_recently(user_session, seconds):
+    """True while a replica may not have the user's last write yet"""
+    return time.time() - user_session.get(LAST_WRITE_KEY, 0) < seconds
@@ -0,0 +1,126 @@
+import json
+import re
+
+
+class SuggestionRuleEngine:
+    """
+    Contextual suggestion rules compiled into a single phrase table.
+
+    Each rule fires when one of its patterns, or a pattern of one of its
+    issues, occurs in the text, and the category/sentiment conditions (if
+    any) hold. All patterns are compiled into one regex, so matching is a
+    single scan of the text.
+    """
+
+    token_pattern = re.compile(r"[a-z0-9']+")
+    word_chars = "a-z0-9'"
+
+    def __init__(self, config):
+        self.issues = {name: list(patterns) for name, patterns in config.get('issues', {}).items()}
+        self.rules = []
+        for order, rule in enumerate(config.get('rules', [])):
+            if not rule.get('suggestion'):
+                raise ValueError(f"Suggestion rule {rule.get('id', order)} has no suggestion")
+            unknown = set(rule.get('issues', [])) - set(self.issues)
+            if unknown:
+                raise ValueError(f"Suggestion rule {rule.get('id', order)} uses unknown issues: {sorted(unknown)}")
+            self.rules.append({
+                'id': rule.get('id', str(order)),
+                'patterns': list(rule.get('patterns', [])),
+                'issues': list(rule.get('issues', [])),
+                'categories': set(rule.get('categories', [])),
+                'sentiments': set(rule.get('sentiments', [])),
+                'suggestion': rule['suggestion'],
+                'priority': rule.get('priority', 0),
+                'order': order
+            })
+        self._compile()
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _compile(self):
+        """
+        Build phrase (token tuple) -> (issue names, rule indexes)
+        """
+        self.phrases = {}
+        issue_rules = {}
+        for index, rule in enumerate(self.rules):
+            for issue in rule['issues']:
+                issue_rules.setdefault(issue, set()).add(index)
+
+        def entry(pattern):
+            key = tuple(self.tokenize(pattern))
+            if not key:
+                raise ValueError(f"Empty suggestion rule pattern: {pattern!r}")
+            return self.phrases.setdefault(key, (set(), set()))
+
+        for issue, patterns in self.issues.items():
+            for pattern in patterns:
+                issues, rules = entry(pattern)
+                issues.add(issue)
+                rules.update(issue_rules.get(issue, ()))
+
+        for index, rule in enumerate(self.rules):
+            for pattern in rule['patterns']:
+                entry(pattern)[1].add(index)
+
+        # The regex reports the longest phrase at each position, so a phrase
+        # also carries the hits of every shorter phrase inside it
+        # ("lack of support" implies "lack of")
+        for key, (issues, rules) in self.phrases.items():
+            for length in range(1, len(key)):
+                for start in range(len(key) - length + 1):
+                    inner = self.phrases.get(key[start:start + length])
+                    if inner:
+                        issues.update(inner[0])
+                        rules.update(inner[1])
+
+        separator = f"[^{self.word_chars}]+"
+        alternatives = sorted(self.phrases, key=len, reverse=True)
+        self.matcher = re.compile(
+            f"(?<![{self.word_chars}])(?:"
+            + "|".join(separator.join(re.escape(token) for token in key) for key in alternatives)
+            + f")(?![{self.word_chars}])"
+        ) if alternatives else None
+
+    def tokenize(self, text):
+        return self.token_pattern.findall(text.lower())
+
+    def match(self, text):
+        """
+        Single scan of the text; returns (issues, candidate rule indexes)
+        """
+        issues, candidates = set(), set()
+        if self.matcher is None:
+            return issues, candidates
+        seen = set()
+        for found in self.matcher.findall(text.lower()):
+            if found in seen:
+                continue
+            seen.add(found)
+            hit = self.phrases[tuple(self.tokenize(found))]
+            issues.update(hit[0])
+            candidates.update(hit[1])
+        return issues, candidates
+
+    def evaluate(self, text, category, sentiment):
+        """
+        Issues found in text and the fired rules, highest priority first
+        """
+        issues, candidates = self.match(text)
+        fired = []
+        for index in candidates:
+            rule = self.rules[index]
+            if rule['categories'] and category not in rule['categories']:
+                continue
+            if rule['sentiments'] and sentiment not in rule['sentiments']:
+                continue
+            fired.append(rule)
+        fired.sort(key=lambda rule: (-rule['priority'], rule['order']))
+        return sorted(issues), fired
+
+    def suggestions(self):
+        return [rule['suggestion'] for rule in self.rules]
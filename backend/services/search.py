@@ -0,0 +1,164 @@
+import html
+import re
+
+# feedback columns indexed as tokens in feedback_fts.scope (with their token
+# prefix), so role scoping and filters are applied inside the full-text index
+SCOPE_COLUMNS = {'instructor_id': 'i', 'course_id': 'c', 'class_name': 'n', 'feedback_type': 't'}
+
+
+def scope_sql(row):
+    """SQL for the scope tokens of row (a table name or new/old in a trigger), matching scope_token()"""
+    return " || ' ' || ".join(f"'{prefix}' || lower(hex(coalesce({row}.{column}, ''))) || 'x'"
+                              for column, prefix in SCOPE_COLUMNS.items())
+
+
+def scope_token(column, value):
+    """
+    The feedback_fts.scope token for column = value: a prefix, the value's
+    UTF-8 bytes in hex, and an 'x' that no porter stemmer rule ends in
+    """
+    return f"{SCOPE_COLUMNS[column]}{(value or '').encode().hex()}x"
+
+
+# External-content FTS5 index over feedback.feedback_text and the scope
+# tokens, read through a view and kept in sync by triggers
+SEARCH_INDEX_DDL = [
+    f"""CREATE VIEW IF NOT EXISTS feedback_fts_content AS
+        SELECT id, feedback_text, {scope_sql('feedback')} AS scope FROM feedback""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS feedback_fts USING fts5(
+        feedback_text, scope, content='feedback_fts_content', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS feedback_fts_ai AFTER INSERT ON feedback BEGIN
+        INSERT INTO feedback_fts(rowid, feedback_text, scope) VALUES (new.id, new.feedback_text, {scope_sql('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS feedback_fts_ad AFTER DELETE ON feedback BEGIN
+        INSERT INTO feedback_fts(feedback_fts, rowid, feedback_text, scope)
+        VALUES ('delete', old.id, old.feedback_text, {scope_sql('old')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS feedback_fts_au
+        AFTER UPDATE OF feedback_text, {', '.join(SCOPE_COLUMNS)} ON feedback BEGIN
+        INSERT INTO feedback_fts(feedback_fts, rowid, feedback_text, scope)
+        VALUES ('delete', old.id, old.feedback_text, {scope_sql('old')});
+        INSERT INTO feedback_fts(rowid, feedback_text, scope) VALUES (new.id, new.feedback_text, {scope_sql('new')});
+    END""",
+]
+
+# Index of older versions, without the scope column: dropped and rebuilt
+DROP_SEARCH_INDEX = [
+    "DROP TRIGGER IF EXISTS feedback_fts_ai",
+    "DROP TRIGGER IF EXISTS feedback_fts_ad",
+    "DROP TRIGGER IF EXISTS feedback_fts_au",
+    "DROP TABLE IF EXISTS feedback_fts",
+]
+
+REBUILD_SEARCH_INDEX = "INSERT INTO feedback_fts(feedback_fts) VALUES ('rebuild')"
+
+# make_snippet() wraps matches in these control characters; highlight() turns
+# them into <mark> tags after HTML-escaping the feedback text
+MARK_START, MARK_END = '\x02', '\x03'
+
+_query_term = re.compile(r'"([^"]*)"|(\S+)')
+_word = re.compile(r'\w+', re.UNICODE)
+_phrase = re.compile(r'"([^"]+)"(\*?)')
+# Rough stand-in for the porter stemmer, so "grading" also marks "graded"
+_suffix = re.compile(r'(ing|ed|es|s|ly)$')
+
+
+def build_match_query(text):
+    """
+    Turn user input into a safe FTS5 MATCH expression.
+    "quoted text" is a phrase, a trailing * is a prefix search, OR between
+    terms is kept, and everything else is ANDed. FTS5 operators and column
+    filters in the input are treated as plain words.
+    """
+    parts = []
+    for phrase, term in _query_term.findall(text or ''):
+        if phrase:
+            words = _word.findall(phrase)
+            if words:
+                parts.append('"' + ' '.join(words) + '"')
+            continue
+        if term == 'OR':
+            if parts and parts[-1] != 'OR':
+                parts.append('OR')
+            continue
+        prefix = term.endswith('*')
+        for word in _word.findall(term):
+            parts.append(f'"{word}"')
+        if prefix and parts and parts[-1] != 'OR':
+            parts[-1] += '*'
+    while parts and parts[-1] == 'OR':
+        parts.pop()
+    if parts and parts[0] == 'OR':
+        parts.pop(0)
+    return ' '.join(parts)
+
+
+def scoped_match(match, filters):
+    """
+    A build_match_query() expression limited to feedback_text, ANDed with
+    the scope tokens of filters ({column: value} over SCOPE_COLUMNS)
+    """
+    terms = [f"feedback_text : ({match})"]
+    terms += [f'scope : "{scope_token(column, value)}"' for column, value in filters.items()]
+    return ' AND '.join(terms)
+
+
+def make_snippet(text, match, max_words=16):
+    """
+    Window of text around the first hit of a build_match_query() expression,
+    with every hit inside it wrapped in MARK_START/MARK_END. Done in Python for
+    the returned page only, which is much cheaper than FTS5 snippet() on
+    broad or prefix queries.
+    """
+    if not text:
+        return text
+    patterns = []
+    for phrase, prefix in _phrase.findall(match or ''):
+        words = phrase.split()
+        if prefix or len(words) == 1:
+            words[-1] = _suffix.sub('', words[-1]) if len(words[-1]) > 4 else words[-1]
+            words[-1] = re.escape(words[-1]) + r'\w*'
+            patterns.append(r'\W+'.join([re.escape(w) for w in words[:-1]] + [words[-1]]))
+        else:
+            patterns.append(r'\W+'.join(re.escape(w) for w in words))
+    if not patterns:
+        return text[:200]
+    matcher = re.compile(r'\b(?:' + '|'.join(patterns) + r')', re.IGNORECASE)
+
+    words = list(re.finditer(r'\S+', text))
+    first = matcher.search(text)
+    if first is None or len(words) <= max_words:
+        start, end = 0, min(len(words), max_words)
+    else:
+        position = next(i for i, word in enumerate(words) if word.end() > first.start())
+        start = max(0, min(position - max_words // 4, len(words) - max_words))
+        end = start + max_words
+    if not words:
+        return ''
+    window = text[words[start].start():words[end - 1].end()]
+    marked = matcher.sub(lambda m: MARK_START + m.group(0) + MARK_END, window)
+    return ('…' if start > 0 else '') + marked + ('…' if end < len(words) else '')
+
+
+def highlight(snippet):
+    """
+    HTML-escape a snippet and mark the matched terms
+    """
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def encode_cursor(score, feedback_id):
+    return f"{score!r}:{feedback_id}" if score is not None else str(feedback_id)
+
+
+def decode_cursor(cursor):
+    """
+    (score, id) for rank-ordered cursors, (None, id) for recency cursors
+    """
+    if not cursor:
+        return None, None
+    score, _, feedback_id = cursor.rpartition(':')
+    return (float(score) if score else None), int(feedback_id)
@@ -2,14 +2,34 @@ from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import re
 
+from services.sentiment_lexicon import MergedSentimentLexicon
+
 class SentimentAnalyzer:
-    def __init__(self):
+    def __init__(self, mode='full', auto_margin=0.05):
+        # Weights for combining the two scores, and label thresholds
+        self.vader_weight = 0.6
+        self.textblob_weight = 0.4
+        self.positive_threshold = 0.1
+        self.negative_threshold = -0.1
+        
+        # 'full' runs VADER and TextBlob, 'fast' scores with the merged lexicon
+        # only, 'auto' re-scores fast results within auto_margin of a threshold
+        self.mode = mode
+        self.auto_margin = auto_margin
+        
         try:
             self.vader_analyzer = SentimentIntensityAnalyzer()
         except Exception as e:
             print(f"Warning: Error initializing VADER analyzer: {e}")
             self.vader_analyzer = None
         
+        self.lexicon = None
+        if self.mode != 'full':
+            try:
+                self.lexicon = MergedSentimentLexicon.build(self.vader_analyzer)
+            except Exception as e:
+                print(f"Warning: Error building sentiment lexicon, using full analysis: {e}")
+        
     def analyze(self, text):
         """
         Analyze sentiment of text using both TextBlob and VADER
@@ -25,6 +45,15 @@ class SentimentAnalyzer:
         # Clean text
         cleaned_text = self._clean_text(text)
         
+        if self.lexicon is not None:
+            try:
+                vader_compound, textblob_polarity = self.lexicon.score(cleaned_text)
+                combined_score = (vader_compound * self.vader_weight) + (textblob_polarity * self.textblob_weight)
+                if self.mode == 'fast' or not self._is_borderline(combined_score):
+                    return self._result(combined_score, vader_compound, textblob_polarity, 'fast')
+            except Exception as e:
+                print(f"Error in lexicon sentiment analysis: {e}")
+        
         # VADER sentiment analysis (good for social media/text)
         try:
             if self.vader_analyzer:
@@ -45,12 +74,18 @@ class SentimentAnalyzer:
             textblob_polarity = 0.0
         
         # Combine scores (weighted average)
-        combined_score = (vader_compound * 0.6) + (textblob_polarity * 0.4)
-        
+        combined_score = (vader_compound * self.vader_weight) + (textblob_polarity * self.textblob_weight)
+        return self._result(combined_score, vader_compound, textblob_polarity, 'full')
+    
+    def _is_borderline(self, score):
+        return (abs(score - self.positive_threshold) < self.auto_margin or
+                abs(score - self.negative_threshold) < self.auto_margin)
+    
+    def _result(self, combined_score, vader_compound, textblob_polarity, mode):
         # Determine sentiment label
-        if combined_score >= 0.1:
+        if combined_score >= self.positive_threshold:
             sentiment = 'positive'
-        elif combined_score <= -0.1:
+        elif combined_score <= self.negative_threshold:
             sentiment = 'negative'
         else:
             sentiment = 'neutral'
@@ -63,7 +98,21 @@ class SentimentAnalyzer:
             'score': round(combined_score, 3),
             'confidence': round(confidence, 3),
             'vader_score': round(vader_compound, 3),
-            'textblob_score': round(textblob_polarity, 3)
+            'textblob_score': round(textblob_polarity, 3),
+            'mode': mode
+        }
+    
+    def settings(self):
+        """
+        Parameters that affect results, used for the analyzer version stamp
+        """
+        return {
+            'vader_weight': self.vader_weight,
+            'textblob_weight': self.textblob_weight,
+            'positive_threshold': self.positive_threshold,
+            'negative_threshold': self.negative_threshold,
+            'mode': self.mode if self.lexicon is not None else 'full',
+            'auto_margin': self.auto_margin if self.mode == 'auto' else None
         }
     
     def _clean_text(self, text):
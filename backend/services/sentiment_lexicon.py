@@ -0,0 +1,148 @@
+import math
+import re
+
+from vaderSentiment import vaderSentiment
+
+
+class MergedSentimentLexicon:
+    """
+    VADER valences and TextBlob (pattern) polarities merged into one token
+    table, so both scores come out of a single tokenization pass.
+
+    The scoring follows the rules of both libraries that matter for feedback
+    text: VADER boosters (including "kind of"), negation within three words,
+    "but" weighting and exclamation emphasis; pattern's modifiers ("very
+    good"), negations ("not good") and "!" boosts, averaged over the assessed
+    words. Case emphasis, idioms and emoticons are not modelled.
+    """
+
+    token_pattern = re.compile(r"\w+|[.,!?]")
+    punctuation = frozenset('.,!?')
+
+    def __init__(self, vader_lexicon, pattern_lexicon):
+        vader_negations = set(vaderSentiment.NEGATE)
+        pattern_negations = set(pattern_lexicon.negations)
+        words = set(vader_lexicon) | set(pattern_lexicon) | set(vaderSentiment.BOOSTER_DICT) | vader_negations | pattern_negations
+
+        self.entries = {}
+        for word in words:
+            scores = pattern_lexicon.get(word, {})
+            polarity, _, intensity = scores.get(None, (0.0, 0.0, 1.0))
+            self.entries[word] = (
+                vader_lexicon.get(word, 0.0),
+                vaderSentiment.BOOSTER_DICT.get(word, 0.0),
+                word in vader_negations,
+                polarity,
+                intensity or 1.0,
+                None in scores,
+                any(pos in scores for pos in pattern_lexicon.modifiers),
+                word in pattern_negations
+            )
+        self.in_vader = set(vader_lexicon)
+        # "kind of", "sort of", ...: VADER adds these to a word up to three words on
+        self.phrase_boosters = {phrase: value for phrase, value in vaderSentiment.BOOSTER_DICT.items() if ' ' in phrase}
+
+    @classmethod
+    def build(cls, vader_analyzer):
+        from textblob.en import sentiment as pattern_lexicon
+        pattern_lexicon.load()
+        return cls(vader_analyzer.lexicon, pattern_lexicon)
+
+    def score(self, text):
+        """
+        (VADER compound, TextBlob polarity) estimates for cleaned text
+        """
+        tokens = self.token_pattern.findall(text.lower())
+        entries = self.entries
+        in_vader = self.in_vader
+
+        # VADER state: valence per word, split at the first "but" afterwards
+        words, valences = [], []
+        # pattern state: assessments are [polarity, intensity, negated]
+        assessments = []
+        modifier = None
+        negation = None
+
+        for token in tokens:
+            entry = entries.get(token)
+
+            if token not in self.punctuation:
+                index = len(words)
+                words.append(token)
+                valence = entry[0] if entry is not None and not entry[1] else 0.0
+                if valence:
+                    if (index > 0 and words[index - 1] == 'no') or (index > 1 and words[index - 2] == 'no'):
+                        valence *= -0.74
+                        if words[index - 1] == 'no':
+                            valences[index - 1] = 0.0  # "no" only negates a following sentiment word
+                    for distance, decay in ((1, 1.0), (2, 0.95), (3, 0.9)):
+                        if index < distance:
+                            break
+                        previous = words[index - distance]
+                        if previous in in_vader:
+                            continue
+                        previous_entry = entries.get(previous)
+                        if previous_entry is None:
+                            continue
+                        if previous_entry[1]:
+                            boost = previous_entry[1] * decay
+                            valence += boost if valence > 0 else -boost
+                        if previous_entry[2]:
+                            valence *= -0.74
+                    if index > 2 and words[index - 3] not in in_vader:
+                        for phrase in (' '.join(words[index - 3:index]), ' '.join(words[index - 3:index - 1]),
+                                       ' '.join(words[index - 2:index])):
+                            valence += self.phrase_boosters.get(phrase, 0.0)
+                    if index > 0 and words[index - 1] == 'least' and 'least' not in in_vader:
+                        if index < 2 or words[index - 2] not in ('at', 'very'):
+                            valence *= -0.74
+                elif token == 'of' and index > 0 and words[index - 1] == 'kind':
+                    valences[index - 1] = 0.0
+                valences.append(valence)
+
+            # pattern assessments
+            if entry is not None and entry[5]:
+                polarity, intensity = entry[3], entry[4]
+                if modifier is None:
+                    assessments.append([polarity, intensity, False])
+                else:
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], 1.0))
+                    last[1] = intensity
+                if negation is not None:
+                    assessments[-1][1] = 1.0 / assessments[-1][1]
+                    assessments[-1][2] = True
+                modifier = token if entry[6] else None
+                negation = token if entry[7] else None
+            else:
+                if entry is not None and entry[7]:
+                    negation = token
+                elif negation and len(token) > 1:
+                    negation = None
+                if negation is not None and modifier is not None and modifier.endswith('ly'):
+                    assessments[-1][2] = True
+                    negation = None
+                elif modifier and len(token) > 2:
+                    modifier = None
+                if token == '!' and assessments:
+                    assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, 1.0))
+
+        if 'but' in words:
+            split = words.index('but')
+            total = 0.5 * sum(valences[:split]) + 1.5 * sum(valences[split + 1:])
+        else:
+            total = sum(valences)
+        if total:
+            exclamations = min(text.count('!'), 4) * 0.292
+            questions = text.count('?')
+            emphasis = exclamations + ((0.96 if questions > 3 else questions * 0.18) if questions > 1 else 0.0)
+            total += emphasis if total > 0 else -emphasis
+            compound = max(-1.0, min(total / math.sqrt(total * total + 15), 1.0))
+        else:
+            compound = 0.0
+
+        if assessments:
+            polarity = sum(-0.5 * p if negated else p for p, _, negated in assessments) / len(assessments)
+        else:
+            polarity = 0.0
+        return compound, polarity
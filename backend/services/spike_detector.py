@@ -0,0 +1,142 @@
+import math
+import threading
+
+
+class Ewma:
+    """Exponentially weighted mean and variance of a series (West's incremental form)"""
+
+    __slots__ = ('alpha', 'mean', 'variance', 'samples')
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.variance = 0.0
+        self.samples = 0
+
+    def update(self, value):
+        if self.samples == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.variance = (1 - self.alpha) * (self.variance + diff * increment)
+        self.samples += 1
+
+    def z_score(self, value, floor):
+        """Deviations of value from the mean, with the deviation floored so flat baselines do not alert on noise"""
+        return (value - self.mean) / max(math.sqrt(self.variance), floor)
+
+
+class ScopeWindow:
+    """Open window counts and the baselines of closed windows for one course or class"""
+
+    __slots__ = ('start', 'count', 'score_sum', 'scored', 'alerted', 'volume', 'sentiment')
+
+    def __init__(self, start, alpha):
+        self.start = start
+        self.count = 0
+        self.score_sum = 0.0
+        self.scored = 0
+        self.alerted = set()
+        self.volume = Ewma(alpha)
+        self.sentiment = Ewma(alpha)
+
+
+class SpikeDetector:
+    """
+    Flags courses or classes whose feedback in the current window deviates
+    from their own history: volume more than z_threshold deviations above
+    its EWMA baseline, or mean sentiment that many below.
+
+    Time is cut into window_seconds windows per scope. Each submission only
+    updates its scope's open window and is checked against the baselines,
+    which absorb a window when it closes, so an update is O(1) and nothing
+    is rescanned. A scope needs warmup_windows closed windows before it can
+    alert, sentiment needs min_count scored rows in the window, and each
+    scope alerts at most once per metric and window.
+    """
+
+    # Baselines stop changing measurably after this many empty windows in a row
+    MAX_CATCH_UP_WINDOWS = 200
+
+    def __init__(self, window_seconds=3600, z_threshold=3.0, alpha=0.1, min_count=5, warmup_windows=6,
+                 volume_floor=1.0, sentiment_floor=0.05):
+        self.window_seconds = window_seconds
+        self.z_threshold = z_threshold
+        self.alpha = alpha
+        self.min_count = min_count
+        self.warmup_windows = warmup_windows
+        self.volume_floor = volume_floor
+        self.sentiment_floor = sentiment_floor
+        self.scopes = {}
+        self._lock = threading.Lock()
+
+    def add(self, scopes, score, timestamp):
+        """
+        Count one submission (timestamp in epoch seconds) in each scope.
+        Returns the spike alerts it triggers as dicts.
+        """
+        alerts = []
+        with self._lock:
+            for key in scopes:
+                window = self._window(key, timestamp)
+                window.count += 1
+                if score is not None:
+                    window.score_sum += score
+                    window.scored += 1
+                alerts.extend(self._check(key, window))
+        return alerts
+
+    def _window(self, key, timestamp):
+        start = timestamp - timestamp % self.window_seconds
+        window = self.scopes.get(key)
+        if window is None:
+            window = self.scopes[key] = ScopeWindow(start, self.alpha)
+        elif start > window.start:
+            self._close(window, start)
+        return window
+
+    def _close(self, window, start):
+        # Fold the finished window into the baselines, then any empty windows since
+        window.volume.update(window.count)
+        if window.scored:
+            window.sentiment.update(window.score_sum / window.scored)
+        empty = int((start - window.start) // self.window_seconds) - 1
+        for _ in range(min(empty, self.MAX_CATCH_UP_WINDOWS)):
+            window.volume.update(0)
+        window.start = start
+        window.count = 0
+        window.score_sum = 0.0
+        window.scored = 0
+        window.alerted = set()
+
+    def _check(self, key, window):
+        if window.volume.samples < self.warmup_windows:
+            return []
+        alerts = []
+        z = window.volume.z_score(window.count, self.volume_floor)
+        if z >= self.z_threshold and 'volume' not in window.alerted:
+            window.alerted.add('volume')
+            alerts.append(self._alert(key, window, 'volume', window.count, window.volume.mean, z))
+        if window.scored >= self.min_count and window.sentiment.samples >= self.warmup_windows:
+            mean = window.score_sum / window.scored
+            z = window.sentiment.z_score(mean, self.sentiment_floor)
+            if z <= -self.z_threshold and 'sentiment' not in window.alerted:
+                window.alerted.add('sentiment')
+                alerts.append(self._alert(key, window, 'sentiment', mean, window.sentiment.mean, z))
+        return alerts
+
+    def _alert(self, key, window, metric, observed, baseline, z):
+        scope, _, value = key.partition(':')
+        return {
+            'scope': scope,
+            'scope_value': value,
+            'metric': metric,
+            'window_start': window.start,
+            'window_seconds': self.window_seconds,
+            'observed': round(observed, 4),
+            'baseline': round(baseline, 4),
+            'z_score': round(z, 2),
+            'feedback_count': window.count
+        }
@@ -0,0 +1,340 @@
+import base64
+import glob
+import hashlib
+import json
+import math
+import os
+import socket
+import threading
+import time
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning) of a stream of numbers: at most about
+    compression centroids, finest at the tails, so extreme quantiles stay
+    accurate. Digests built in different processes merge into one.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # [mean, weight], sorted by mean
+        self.buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, weight=1):
+        self.buffer.append([value, weight])
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other):
+        self.buffer.extend([mean, weight] for mean, weight in other.centroids + other.buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _scale(self, q):
+        # k1 scale function: centroid size shrinks towards q = 0 and q = 1
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self):
+        if not self.buffer:
+            return
+        points = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total = self.count
+        merged = [list(points[0])]
+        before = 0  # weight of the centroids before the current one
+        k_left = self._scale(0)
+        for mean, weight in points[1:]:
+            current = merged[-1]
+            if self._scale((before + current[1] + weight) / total) - k_left <= 1:
+                current[1] += weight
+                current[0] += (mean - current[0]) * weight / current[1]
+            else:
+                before += current[1]
+                k_left = self._scale(before / total)
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q):
+        """Estimated q-quantile (0 <= q <= 1), interpolating between centroid centres"""
+        self._compress()
+        if not self.centroids:
+            return None
+        target = q * self.count
+        previous_mean, previous_position = self.min, 0.0
+        cumulative = 0.0
+        for mean, weight in self.centroids:
+            centre = cumulative + weight / 2
+            if target <= centre:
+                if centre == previous_position:
+                    return mean
+                return previous_mean + (mean - previous_mean) * (target - previous_position) / (centre - previous_position)
+            previous_mean, previous_position = mean, centre
+            cumulative += weight
+        if self.count == previous_position:
+            return self.max
+        return previous_mean + (self.max - previous_mean) * (target - previous_position) / (self.count - previous_position)
+
+    def to_dict(self):
+        self._compress()
+        return {'compression': self.compression, 'centroids': self.centroids, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data['compression'])
+        digest.centroids = [list(c) for c in data['centroids']]
+        digest.count = sum(weight for _, weight in digest.centroids)
+        if digest.centroids:
+            digest.min, digest.max = data['min'], data['max']
+        return digest
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch with 2**precision one-byte registers; the
+    standard error is about 1.04 / sqrt(2**precision) (2.3% at 11)
+    """
+
+    def __init__(self, precision=11):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._estimate = 0
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._estimate = None
+
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        self._estimate = None
+
+    def count(self):
+        if self._estimate is None:
+            m = len(self.registers)
+            alpha = 0.7213 / (1 + 1.079 / m)
+            estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+            zeros = self.registers.count(0)
+            if estimate <= 2.5 * m and zeros:
+                estimate = m * math.log(m / zeros)  # Linear counting is better for small sets
+            self._estimate = round(estimate)
+        return self._estimate
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': base64.b64encode(bytes(self.registers)).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['precision'])
+        sketch.registers = bytearray(base64.b64decode(data['registers']))
+        sketch._estimate = None
+        return sketch
+
+
+class ScopeStats:
+    """Sentiment score digest and distinct student sketch for one scope"""
+
+    def __init__(self, compression=100, precision=11):
+        self.scores = TDigest(compression)
+        self.students = HyperLogLog(precision)
+        self.count = 0
+
+    def add(self, score, student_id):
+        self.count += 1
+        if score is not None:
+            self.scores.add(score)
+        if student_id:
+            self.students.add(student_id)
+
+    def merge(self, other):
+        self.count += other.count
+        self.scores.merge(other.scores)
+        self.students.merge(other.students)
+
+    def to_dict(self):
+        return {'count': self.count, 'scores': self.scores.to_dict(), 'students': self.students.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data['count']
+        stats.scores = TDigest.from_dict(data['scores'])
+        stats.students = HyperLogLog.from_dict(data['students'])
+        return stats
+
+
+def scope_keys(course_id=None, class_name=None, instructor_id=None):
+    """Scopes a feedback row is counted in: 'all' plus its course, class and instructor"""
+    keys = ['all']
+    for kind, value in (('course', course_id), ('class', class_name), ('instructor', instructor_id)):
+        if value:
+            keys.append(f"{kind}:{value}")
+    return keys
+
+
+class StreamingStats:
+    """
+    Live per-scope sentiment percentiles and distinct student counts,
+    updated as feedback is stored.
+
+    Each process keeps sketches of the rows it ingested and, every
+    snapshot_seconds, writes them to its own file in directory and reloads
+    the other files there, so every worker reports the merged view (other
+    workers' rows appear within one snapshot interval). Files of earlier
+    processes stay in the merge, so restarts lose at most one interval.
+    """
+
+    def __init__(self, directory, snapshot_seconds=30, compression=100, precision=11,
+                 quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        self.directory = directory
+        self.snapshot_seconds = snapshot_seconds
+        self.compression = compression
+        self.precision = precision
+        self.quantiles = quantiles
+        self.scopes = {}
+        self.peers = {}
+        self.version = 0  # bumped on every change to scopes or peers, invalidates summaries
+        self.updated_at = None
+        self._summaries = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._path = None
+
+    def add(self, scopes, score, student_id):
+        self._ensure_started()
+        with self._lock:
+            for key in scopes:
+                stats = self.scopes.get(key)
+                if stats is None:
+                    stats = self.scopes[key] = ScopeStats(self.compression, self.precision)
+                stats.add(score, student_id)
+            self.version += 1
+            self.updated_at = time.time()
+
+    def summary(self, scope):
+        """Count, distinct students and score percentiles of scope, or None if it has no rows yet"""
+        self._ensure_started()
+        with self._lock:
+            cached = self._summaries.get(scope)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            version = self.version
+            own, peer = self.scopes.get(scope), self.peers.get(scope)
+            if own is None and peer is None:
+                return None
+            merged = ScopeStats(self.compression, self.precision)
+            for stats in (own, peer):
+                if stats is not None:
+                    merged.merge(stats)
+            result = {
+                'scope': scope,
+                'count': merged.count,
+                'distinct_students': merged.students.count(),
+                'min': merged.scores.min if merged.scores.count else None,
+                'max': merged.scores.max if merged.scores.count else None,
+                'percentiles': {f"p{round(q * 100):g}": round(merged.scores.quantile(q), 4)
+                                for q in self.quantiles if merged.scores.count}
+            }
+            self._summaries[scope] = (version, result)
+            return result
+
+    def scope_names(self):
+        with self._lock:
+            return sorted(set(self.scopes) | set(self.peers))
+
+    def _ensure_started(self):
+        # Started on first use, so each gunicorn worker snapshots under its own pid
+        if self._thread is None and self.snapshot_seconds > 0:
+            with self._lock:
+                if self._thread is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._path = os.path.join(self.directory, f"{socket.gethostname()}-{os.getpid()}.json")
+                    self._adopt_own_snapshot()
+                    self._load_peers()
+                    self._thread = threading.Thread(target=self._run, name='stream-stats', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        saved_version = None
+        while True:
+            time.sleep(self.snapshot_seconds)
+            try:
+                with self._lock:
+                    version = self.version
+                    data = None if version == saved_version else {
+                        'saved_at': time.time(),
+                        'scopes': {key: stats.to_dict() for key, stats in self.scopes.items()}
+                    }
+                if data is not None:
+                    self._write(data, self._path)
+                    saved_version = version
+                with self._lock:
+                    self._load_peers()
+            except Exception as e:
+                print(f"Streaming stats snapshot failed: {e}")
+
+    def _write(self, data, path):
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+
+    def _adopt_own_snapshot(self):
+        # A file under this pid was left by an earlier process; keep its rows (called with the lock held)
+        try:
+            with open(self._path) as f:
+                scopes = json.load(f)['scopes']
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Skipping streaming stats snapshot {self._path}: {e}")
+            return
+        for key, data in scopes.items():
+            stats = ScopeStats.from_dict(data)
+            if key in self.scopes:
+                self.scopes[key].merge(stats)
+            else:
+                self.scopes[key] = stats
+
+    def _load_peers(self):
+        # Called with the lock held
+        peers = {}
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            if path == self._path:
+                continue
+            try:
+                with open(path) as f:
+                    scopes = json.load(f)['scopes']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Skipping streaming stats snapshot {path}: {e}")
+                continue
+            for key, data in scopes.items():
+                stats = ScopeStats.from_dict(data)
+                if key in peers:
+                    peers[key].merge(stats)
+                else:
+                    peers[key] = stats
+        self.peers = peers
+        self.version += 1
+
+    def save(self):
+        """Write this process's snapshot now (e.g. at shutdown)"""
+        if self._path is not None:
+            self.save_as(self._path)
+
+    def save_as(self, path):
+        with self._lock:
+            data = {'saved_at': time.time(), 'scopes': {key: stats.to_dict() for key, stats in self.scopes.items()}}
+        self._write(data, path)
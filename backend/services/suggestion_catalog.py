@@ -0,0 +1,54 @@
+import threading
+
+
+class SuggestionCatalog:
+    """
+    In-process cache of the suggestion catalog (text <-> stable id).
+    Feedback rows store suggestion ids packed as a comma-separated string,
+    e.g. "3,7,12", and are expanded back to text when serialized.
+    """
+
+    separator = ','
+
+    def __init__(self):
+        self.ids = {}
+        self.texts = {}
+        self.lock = threading.Lock()
+
+    def load(self, rows):
+        """
+        Add (id, text) pairs read from the catalog table
+        """
+        with self.lock:
+            for suggestion_id, text in rows:
+                self.ids[text] = suggestion_id
+                self.texts[suggestion_id] = text
+
+    def missing(self, texts):
+        """
+        Texts that have no id in the cache yet
+        """
+        return [text for text in texts if text not in self.ids]
+
+    def pack(self, texts):
+        """
+        Pack texts into an id string; every text must already be cached
+        """
+        return self.separator.join(str(self.ids[text]) for text in texts)
+
+    def unpack(self, packed):
+        if not packed:
+            return []
+        return [int(suggestion_id) for suggestion_id in packed.split(self.separator)]
+
+    def unknown_ids(self, packed):
+        return [suggestion_id for suggestion_id in self.unpack(packed) if suggestion_id not in self.texts]
+
+    def expand(self, packed):
+        """
+        Suggestion texts for a packed id string
+        """
+        return [self.texts[suggestion_id] for suggestion_id in self.unpack(packed) if suggestion_id in self.texts]
+
+    def to_dict(self):
+        return {str(suggestion_id): text for suggestion_id, text in sorted(self.texts.items())}
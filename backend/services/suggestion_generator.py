@@ -1,8 +1,15 @@
-import re
+import os
 from collections import Counter
 
+from services.rule_engine import SuggestionRuleEngine
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'suggestion_rules.json')
+
 class SuggestionGenerator:
-    def __init__(self):
+    # Category templates rank below any contextual rule that fires
+    template_priority = 50
+    
+    def __init__(self, rules_file=None):
         self.category_suggestions = {
             'teaching_style': {
                 'positive': [
@@ -99,6 +106,12 @@ class SuggestionGenerator:
             }
         }
         
+        # Contextual rules and issue patterns, compiled once
+        self.rule_engine = SuggestionRuleEngine.from_file(rules_file or DEFAULT_RULES_FILE)
+        
+        # Stored strings that carry no actual suggestion
+        self.placeholder_prefixes = ('No specific suggestions', 'No suggestions available')
+        
         self.urgent_keywords = [
             'harassment', 'discrimination', 'safety', 'emergency', 'urgent',
             'abuse', 'threat', 'danger', 'unsafe', 'violence', 'bullying'
@@ -111,96 +124,111 @@ class SuggestionGenerator:
         if not feedback_text:
             return "No specific suggestions available"
         
-        # Get base suggestions for category and sentiment
-        base_suggestions = self.category_suggestions.get(category, self.category_suggestions['general'])
-        sentiment_suggestions = base_suggestions.get(sentiment, base_suggestions.get('neutral', []))
-        
-        # Extract specific issues from feedback
-        specific_issues = self._extract_issues(feedback_text)
-        
-        # Generate contextual suggestions
-        contextual_suggestions = []
-        
-        # Check for specific patterns
-        feedback_lower = feedback_text.lower()
-        
-        if 'slow' in feedback_lower or 'fast' in feedback_lower:
-            if category == 'teaching_style':
-                contextual_suggestions.append("Adjust lecture pace based on student feedback")
-        
-        if 'difficult' in feedback_lower or 'hard' in feedback_lower:
-            contextual_suggestions.append("Consider providing additional resources or supplementary materials")
-        
-        if 'boring' in feedback_lower or 'monotonous' in feedback_lower:
-            contextual_suggestions.append("Incorporate interactive activities and engaging teaching methods")
-        
-        if 'unclear' in feedback_lower or 'confusing' in feedback_lower:
-            contextual_suggestions.append("Provide clearer explanations and use more examples")
-        
-        # Combine suggestions
-        all_suggestions = list(sentiment_suggestions) + contextual_suggestions
+        all_suggestions = self.generate_suggestion_list(feedback_text, category, sentiment)
         
         if not all_suggestions:
             return "No specific suggestions available at this time"
         
-        # Return top 3-5 suggestions
-        return "; ".join(all_suggestions[:5])
+        return "; ".join(all_suggestions)
     
-    def _extract_issues(self, text):
+    def generate_suggestion_list(self, feedback_text, category, sentiment, limit=5):
         """
-        Extract specific issues mentioned in feedback
+        Generate up to `limit` suggestion sentences as a list, highest priority first
         """
-        issues = []
-        text_lower = text.lower()
+        if not feedback_text:
+            return []
         
-        # Common issue patterns
-        issue_patterns = {
-            'pace': ['too fast', 'too slow', 'pace', 'speed'],
-            'clarity': ['unclear', 'confusing', 'not clear', 'difficult to understand'],
-            'engagement': ['boring', 'monotonous', 'not engaging', 'dry'],
-            'resources': ['lack of', 'need more', 'insufficient', 'missing'],
-            'support': ['not available', 'unresponsive', 'no help', 'lack of support']
-        }
+        # Contextual rules fired by words in the text or by the issues it mentions
+        _, fired_rules = self.rule_engine.evaluate(feedback_text, category, sentiment)
+        ranked = [(rule['priority'], rule['suggestion']) for rule in fired_rules]
         
-        for issue_type, patterns in issue_patterns.items():
-            if any(pattern in text_lower for pattern in patterns):
-                issues.append(issue_type)
+        # Base suggestions for category and sentiment
+        base_suggestions = self.category_suggestions.get(category, self.category_suggestions['general'])
+        sentiment_suggestions = base_suggestions.get(sentiment, base_suggestions.get('neutral', []))
+        ranked.extend((self.template_priority, suggestion) for suggestion in sentiment_suggestions)
         
-        return issues
+        # Stable sort keeps rule order, then template order, within a priority
+        ranked.sort(key=lambda item: -item[0])
+        return list(dict.fromkeys(suggestion for _, suggestion in ranked))[:limit]
+    
+    def all_suggestion_texts(self):
+        """
+        Every sentence the generator can produce, used to seed the suggestion catalog
+        """
+        texts = []
+        for sentiments in self.category_suggestions.values():
+            for suggestions in sentiments.values():
+                texts.extend(suggestions)
+        texts.extend(self.rule_engine.suggestions())
+        return list(dict.fromkeys(texts))
     
-    def generate_summary_suggestions(self, feedback_list):
+    def generate_summary_suggestions(self, feedback_list, top_n=None, per_group=5):
         """
-        Generate summary suggestions based on multiple feedback entries
+        Generate ranked, de-duplicated suggestions from multiple feedback entries.
+        Entries can be single feedback dicts or pre-aggregated group rows that
+        carry a 'count' and optional 'recent'/'previous' counts for the trend.
         """
         if not feedback_list:
             return []
         
-        # Aggregate categories and sentiments
-        category_sentiment_counts = {}
+        # Aggregate counts and suggestion frequencies per (category, sentiment)
+        groups = {}
         
         for feedback in feedback_list:
-            category = feedback.get('category', 'general')
-            sentiment = feedback.get('sentiment', 'neutral')
+            category = feedback.get('category') or 'general'
+            sentiment = feedback.get('sentiment') or 'neutral'
+            count = feedback.get('count', 1)
             
-            key = f"{category}_{sentiment}"
-            category_sentiment_counts[key] = category_sentiment_counts.get(key, 0) + 1
+            group = groups.setdefault((category, sentiment), {
+                'count': 0, 'recent': 0, 'previous': 0, 'suggestions': Counter()
+            })
+            group['count'] += count
+            group['recent'] += feedback.get('recent', 0) or 0
+            group['previous'] += feedback.get('previous', 0) or 0
+            
+            for suggestion in (feedback.get('suggestions') or '').split('; '):
+                suggestion = suggestion.strip()
+                if suggestion and not suggestion.startswith(self.placeholder_prefixes):
+                    group['suggestions'][suggestion] += count
         
         # Generate prioritized suggestions
         suggestions = []
-        sorted_categories = sorted(category_sentiment_counts.items(), key=lambda x: x[1], reverse=True)
-        
-        for (category_sentiment, count), _ in sorted_categories[:3]:
-            category, sentiment = category_sentiment.split('_')
-            base_suggestions = self.category_suggestions.get(category, self.category_suggestions['general'])
-            sentiment_suggestions = base_suggestions.get(sentiment, [])
+        sorted_groups = sorted(groups.items(), key=lambda item: (-item[1]['count'], item[0]))
+        
+        for (category, sentiment), group in sorted_groups:
+            frequencies = group['suggestions']
+            if not frequencies:
+                # Nothing stored on the rows, fall back to the templates
+                base_suggestions = self.category_suggestions.get(category, self.category_suggestions['general'])
+                for suggestion in base_suggestions.get(sentiment, []):
+                    frequencies[suggestion] = group['count']
             
-            if sentiment_suggestions:
+            if frequencies:
+                ranked = sorted(frequencies.items(), key=lambda item: (-item[1], item[0]))[:per_group]
                 suggestions.append({
                     'category': category,
                     'sentiment': sentiment,
-                    'count': count,
-                    'suggestions': sentiment_suggestions[:2]
+                    'count': group['count'],
+                    'trend': self._trend(group['recent'], group['previous']),
+                    'suggestions': [{'text': text, 'frequency': frequency} for text, frequency in ranked]
                 })
         
-        return suggestions
-
+        return suggestions[:top_n] if top_n else suggestions
+    
+    def _trend(self, recent, previous):
+        """
+        Describe how a group's volume moved between two equal windows
+        """
+        if recent > previous:
+            direction = 'rising'
+        elif recent < previous:
+            direction = 'falling'
+        else:
+            direction = 'stable'
+        
+        return {
+            'recent': recent,
+            'previous': previous,
+            'change_pct': round((recent - previous) * 100.0 / previous, 1) if previous else None,
+            'direction': direction
+        }
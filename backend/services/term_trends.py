@@ -0,0 +1,57 @@
+from collections import Counter
+from datetime import date
+
+# Pseudo-term counting feedbacks per (day, course), so windows can be
+# normalized by volume without touching the feedback table
+DOCUMENT_TERM = ''
+
+
+def day_number(timestamp):
+    """Compact integer day key (proleptic Gregorian ordinal)"""
+    return timestamp.date().toordinal()
+
+
+def day_date(number):
+    return date.fromordinal(number)
+
+
+def count_terms(feedbacks, extract_terms):
+    """
+    Counter of (day, course_id, term) -> number of feedbacks containing the
+    term. Each feedback also counts once under DOCUMENT_TERM.
+    """
+    counts = Counter()
+    for timestamp, course_id, text in feedbacks:
+        day = day_number(timestamp)
+        course_id = course_id or 'general'
+        counts[(day, course_id, DOCUMENT_TERM)] += 1
+        for term in extract_terms(text):
+            counts[(day, course_id, term)] += 1
+    return counts
+
+
+def score_trends(rows, recent_total, previous_total, min_count=3, limit=20):
+    """
+    Rising and falling phrases from (term, recent, previous) window counts.
+
+    A term's change is measured against what its previous count would be
+    at the recent window's volume, so a busier week does not make every
+    phrase look like it is rising.
+    """
+    scale = recent_total / previous_total if previous_total else 1.0
+    trends = []
+    for term, recent, previous in rows:
+        if term == DOCUMENT_TERM or max(recent, previous) < min_count:
+            continue
+        expected = previous * scale
+        trends.append({
+            'phrase': term,
+            'recent': recent,
+            'previous': previous,
+            'change': round(recent - expected, 2),
+            'change_pct': round((recent - expected) / expected * 100, 1) if expected else None
+        })
+
+    rising = sorted((t for t in trends if t['change'] > 0), key=lambda t: (-t['change'], t['phrase']))
+    falling = sorted((t for t in trends if t['change'] < 0), key=lambda t: (t['change'], t['phrase']))
+    return rising[:limit], falling[:limit]
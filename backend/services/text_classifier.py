@@ -0,0 +1,153 @@
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+
+class _ColumnCache(dict):
+    """
+    term -> hashed column; feedback vocabulary is small, so most terms are
+    hashed once per process
+    """
+
+    def __init__(self, n_features):
+        super().__init__()
+        self.n_features = n_features
+
+    def __missing__(self, term):
+        column = self[term] = zlib.crc32(term.encode('utf-8')) % self.n_features
+        return column
+
+
+class HashedTfidfClassifier:
+    """
+    Linear (softmax) classifier over hashed unigram/bigram TF-IDF features.
+
+    Features are hashed with crc32, so there is no vocabulary to store and
+    the same text maps to the same columns in every process. Batches are
+    scored as one sparse-times-dense product: each text is a row of
+    (column, weight) pairs, and the class scores are sums of weight rows.
+    """
+
+    token_pattern = re.compile(r"[a-z0-9']+")
+    _column_caches = {}
+    cache_size = 500_000
+
+    def __init__(self, classes, idf, weights, bias, n_features):
+        self.classes = list(classes)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.n_features = n_features
+        self.version = hashlib.sha1(self.weights.tobytes() + self.bias.tobytes()).hexdigest()[:12]
+
+    @classmethod
+    def _counts(cls, texts, n_features):
+        """
+        Raw unigram/bigram counts as CSR arrays (indptr, indices, counts),
+        counted for the whole batch with one np.unique over row-major keys
+        """
+        cache = cls._column_caches.setdefault(n_features, _ColumnCache(n_features))
+        if len(cache) > cls.cache_size:
+            cache.clear()
+        columns, lengths = [], []
+        for text in texts:
+            tokens = cls.token_pattern.findall((text or '').lower())
+            terms = tokens + [' '.join(pair) for pair in zip(tokens, tokens[1:])]
+            columns.extend(map(cache.__getitem__, terms))
+            lengths.append(len(terms))
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        keys, counts = np.unique(rows * n_features + np.asarray(columns, dtype=np.int64), return_counts=True)
+        rows, indices = np.divmod(keys, n_features)
+        indptr = np.searchsorted(rows, np.arange(len(texts) + 1))
+        return indptr, indices, counts.astype(np.float32)
+
+    @staticmethod
+    def _tfidf(indptr, indices, counts, idf):
+        """
+        Sublinear tf times idf, each row L2-normalized
+        """
+        data = (1.0 + np.log(counts)) * idf[indices]
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(indptr) - 1))
+        norms[norms == 0] = 1.0
+        return rows, (data / norms[rows]).astype(np.float32)
+
+    def transform(self, texts):
+        """
+        TF-IDF rows of texts as (row of each entry, column, value) arrays
+        """
+        indptr, indices, counts = self._counts(texts, self.n_features)
+        rows, data = self._tfidf(indptr, indices, counts, self.idf)
+        return rows, indices, data
+
+    def decision_function(self, texts):
+        """
+        Class scores, shape (len(texts), len(classes))
+        """
+        rows, indices, data = self.transform(texts)
+        contributions = self.weights[indices] * data[:, None]
+        scores = np.empty((len(texts), len(self.classes)), dtype=np.float32)
+        for column in range(len(self.classes)):
+            scores[:, column] = np.bincount(rows, weights=contributions[:, column], minlength=len(texts))
+        return scores + self.bias
+
+    def predict(self, texts):
+        if not texts:
+            return []
+        return [self.classes[i] for i in self.decision_function(texts).argmax(axis=1)]
+
+    @classmethod
+    def train(cls, texts, labels, n_features=1 << 16, epochs=200, learning_rate=5.0, l2=1e-4):
+        """
+        Fit by full-batch gradient descent on the softmax cross-entropy
+        """
+        classes = sorted(set(labels))
+        label_index = np.asarray([classes.index(label) for label in labels])
+        targets = np.eye(len(classes), dtype=np.float32)[label_index]
+
+        indptr, indices, counts = cls._counts(texts, n_features)
+        document_frequency = np.bincount(indices, minlength=n_features)
+        idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        rows, data = cls._tfidf(indptr, indices, counts, idf)
+
+        weights = np.zeros((n_features, len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+        for _ in range(epochs):
+            contributions = weights[indices] * data[:, None]
+            scores = np.stack([np.bincount(rows, weights=contributions[:, c], minlength=len(texts))
+                               for c in range(len(classes))], axis=1) + bias
+            scores -= scores.max(axis=1, keepdims=True)
+            probabilities = np.exp(scores)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            error = (probabilities - targets) / len(texts)
+
+            gradient = np.stack([np.bincount(indices, weights=data * error[rows, c], minlength=n_features)
+                                 for c in range(len(classes))], axis=1)
+            weights -= learning_rate * (gradient + l2 * weights).astype(np.float32)
+            bias -= learning_rate * error.sum(axis=0).astype(np.float32)
+
+        return cls(classes, idf, weights, bias, n_features)
+
+    def save(self, path):
+        """
+        Store only the feature rows that carry weight, so the artifact stays
+        proportional to the training vocabulary rather than n_features
+        """
+        used = np.flatnonzero(np.abs(self.weights).max(axis=1) > 1e-6)
+        np.savez_compressed(path, classes=np.asarray(self.classes), n_features=self.n_features, used=used,
+                            weights=self.weights[used], idf=self.idf[used], unseen_idf=self.idf.max(),
+                            bias=self.bias)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as artifact:
+            n_features = int(artifact['n_features'])
+            used = artifact['used']
+            weights = np.zeros((n_features, len(artifact['classes'])), dtype=np.float32)
+            weights[used] = artifact['weights']
+            # Columns absent from training all share the highest idf
+            idf = np.full(n_features, artifact['unseen_idf'], dtype=np.float32)
+            idf[used] = artifact['idf']
+            return cls([str(c) for c in artifact['classes']], idf, weights, artifact['bias'], n_features)
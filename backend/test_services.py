@@ -0,0 +1,236 @@
+"""
+Unit tests for the rate limiter, group commit queue, search query building,
+archive files and idempotency keys
+
+Run with: python -m pytest test_services.py
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import CancelledError, Future
+from datetime import datetime
+
+import pytest
+
+# app reads its configuration on import
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['STREAM_STATS_DIR'] = ''
+os.environ['RATE_LIMIT_BACKEND'] = ''
+
+from services.archive import ArchivedFeedback, ARCHIVE_COLUMNS, read_archive, write_archive
+from services.group_commit import GroupCommitQueue
+from services.rate_limit import RateLimit, take_token
+from services.search import SEARCH_INDEX_DDL, build_match_query, scope_token, scoped_match
+
+
+# take_token
+
+def test_take_token_from_full_bucket():
+    tokens, wait = take_token(5, 0, 0, RateLimit(per_minute=60, burst=5))
+    assert (tokens, wait) == (4, 0)
+
+
+def test_take_token_waits_for_refill():
+    tokens, wait = take_token(0.25, 100, 100, RateLimit(per_minute=60, burst=5))
+    assert tokens == 0.25
+    assert wait == pytest.approx(0.75)
+
+
+def test_take_token_refills_up_to_burst():
+    limit = RateLimit(per_minute=60, burst=5)
+    assert take_token(0, 0, 2, limit) == (1, 0)
+    assert take_token(0, 0, 3600, limit) == (4, 0)
+
+
+# GroupCommitQueue
+
+def storing(failing=()):
+    """commit_batch that fails a batch holding any of failing, recording the batches it was given"""
+    batches = []
+
+    def commit_batch(items):
+        batches.append(list(items))
+        if any(item in failing for item in items):
+            raise ValueError('cannot store')
+        return [item * 10 for item in items]
+    return commit_batch, batches
+
+
+def queue_all(commit_queue, items):
+    """Futures of items queued before the writer starts, so it takes them as one batch"""
+    futures = [Future() for _ in items]
+    for item, future in zip(items, futures):
+        commit_queue.queue.put_nowait((item, future))
+    return futures
+
+
+def test_group_commit_stores_a_batch():
+    commit_batch, batches = storing()
+    commit_queue = GroupCommitQueue(commit_batch)
+    futures = queue_all(commit_queue, [1, 2, 3])
+    commit_queue._ensure_started()
+    assert [future.result(timeout=5) for future in futures] == [10, 20, 30]
+    assert batches == [[1, 2, 3]]
+
+
+def test_group_commit_fails_only_the_bad_item():
+    commit_batch, batches = storing(failing={3})
+    commit_queue = GroupCommitQueue(commit_batch)
+    futures = queue_all(commit_queue, [1, 2, 3, 4])
+    commit_queue._ensure_started()
+    assert [future.result(timeout=5) for future in futures[:2]] == [10, 20]
+    with pytest.raises(ValueError):
+        futures[2].result(timeout=5)
+    assert futures[3].result(timeout=5) == 40
+
+
+def test_group_commit_gives_up_when_every_half_fails():
+    commit_batch, batches = storing(failing={1, 2, 3, 4})
+    commit_queue = GroupCommitQueue(commit_batch)
+    futures = queue_all(commit_queue, [1, 2, 3, 4])
+    commit_queue._ensure_started()
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+    # The whole batch, one half and its halves; the second half is not retried
+    assert batches == [[1, 2, 3, 4], [1, 2], [1], [2]]
+
+
+def test_group_commit_drops_cancelled_items():
+    commit_batch, batches = storing()
+    commit_queue = GroupCommitQueue(commit_batch)
+    futures = queue_all(commit_queue, [1, 2])
+    assert futures[0].cancel()
+    commit_queue._ensure_started()
+    assert futures[1].result(timeout=5) == 20
+    with pytest.raises(CancelledError):
+        futures[0].result()
+    assert batches == [[2]]
+
+
+def test_group_commit_fails_waiters_and_restarts_after_writer_error():
+    def commit_batch(items):
+        if items == ['exit']:
+            raise SystemExit('writer stopped')
+        return items
+    commit_queue = GroupCommitQueue(commit_batch, max_wait=0)
+    with pytest.raises(RuntimeError):
+        commit_queue.submit('exit').result(timeout=5)
+    assert commit_queue.submit('ok').result(timeout=5) == 'ok'
+
+    # A writer thread that has died is replaced
+    commit_queue._thread = threading.Thread(target=lambda: None)
+    commit_queue._thread.start()
+    commit_queue._thread.join()
+    assert commit_queue.submit('again').result(timeout=5) == 'again'
+    assert commit_queue._thread.is_alive()
+
+
+# build_match_query and scoped_match
+
+@pytest.mark.parametrize('text, expected', [
+    ('lab wifi', '"lab" "wifi"'),
+    ('"lab wifi" grad*', '"lab wifi" "grad"*'),
+    ('slow OR OR fast', '"slow" OR "fast"'),
+    ('course_id:x NOT NEAR(a b)', '"course_id" "x" "NOT" "NEAR" "a" "b"'),
+    ('OR', ''),
+    ('***', ''),
+])
+def test_build_match_query(text, expected):
+    assert build_match_query(text) == expected
+
+
+@pytest.fixture
+def search_index():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""CREATE TABLE feedback (
+        id INTEGER PRIMARY KEY, instructor_id VARCHAR(100), course_id VARCHAR(100), class_name VARCHAR(100),
+        feedback_type VARCHAR(50), feedback_text TEXT NOT NULL)""")
+    for statement in SEARCH_INDEX_DDL:
+        conn.execute(statement)
+    conn.executemany("INSERT INTO feedback VALUES (?, ?, ?, ?, ?, ?)", [
+        (1, '7', 'CS1', 'Sec A', 'faculty', 'The lab wifi is slow'),
+        (2, '7', 'CS1', 'Sec B', 'faculty', 'Wifi in the library drops'),
+        (3, '8', 'CS2', 'Sec A', 'campus', 'Lab wifi works fine'),
+        (4, None, None, None, 'campus', 'Nothing about the network'),
+    ])
+    yield conn
+    conn.close()
+
+
+def search(conn, match):
+    return sorted(row for row, in conn.execute("SELECT rowid FROM feedback_fts WHERE feedback_fts MATCH ?", (match,)))
+
+
+def test_scoped_match_limits_to_filters(search_index):
+    match = build_match_query('wifi')
+    assert search(search_index, scoped_match(match, {})) == [1, 2, 3]
+    assert search(search_index, scoped_match(match, {'instructor_id': '7'})) == [1, 2]
+    assert search(search_index, scoped_match(match, {'instructor_id': '7', 'class_name': 'Sec A'})) == [1]
+    assert search(search_index, scoped_match(match, {'feedback_type': 'campus'})) == [3]
+
+
+def test_scope_tokens_are_not_searchable_as_text(search_index):
+    match = build_match_query(scope_token('instructor_id', '7'))
+    assert search(search_index, scoped_match(match, {})) == []
+
+
+# write_archive and read_archive
+
+def test_archive_round_trip(tmp_path):
+    rows = [
+        ArchivedFeedback(**dict(dict.fromkeys(ARCHIVE_COLUMNS), id=1, feedback_text='Très bien 👍', category='general',
+                                sentiment='positive', sentiment_score=0.75, is_urgent=False,
+                                timestamp=datetime(2025, 3, 1, 9, 30, 0, 123456), suggestion_ids='1,2')),
+        ArchivedFeedback(**dict(dict.fromkeys(ARCHIVE_COLUMNS), id=2, feedback_text='', course_id='CS1',
+                                sentiment_score=None, is_urgent=True, timestamp=datetime(2025, 3, 2), duplicate_of=1)),
+    ]
+    path = str(tmp_path / 'archive.npz')
+    write_archive(path, rows)
+    assert read_archive(path) == rows
+
+
+def test_archive_of_no_rows(tmp_path):
+    path = str(tmp_path / 'empty.npz')
+    write_archive(path, [])
+    assert read_archive(path) == []
+
+
+# claim_idempotency_key
+
+@pytest.fixture(scope='module')
+def flask_app():
+    import app as flask_module
+    with flask_module.app.app_context():
+        flask_module.db.create_all()
+        yield flask_module
+
+
+def test_claim_idempotency_key(flask_app):
+    claim, finish = flask_app.claim_idempotency_key, flask_app.finish_idempotency_key
+    assert claim(1, 'key-1', 'submit', 'a') is None
+
+    # Still running
+    status, _, headers = claim(1, 'key-1', 'submit', 'a')
+    assert status == 409 and headers == {'Retry-After': '1'}
+
+    # Finished: replayed, but not for a different request
+    finish(1, 'key-1', 201, b'{"success": true}')
+    assert claim(1, 'key-1', 'submit', 'a') == (201, b'{"success": true}', {'Idempotent-Replayed': 'true'})
+    assert claim(1, 'key-1', 'submit', 'b')[0] == 422
+
+    # Keys belong to one user
+    assert claim(2, 'key-1', 'submit', 'a') is None
+
+
+def test_idempotency_key_released_after_server_error(flask_app):
+    claim, finish = flask_app.claim_idempotency_key, flask_app.finish_idempotency_key
+    assert claim(1, 'key-2', 'submit', 'a') is None
+    finish(1, 'key-2', 500, b'{"error": "failed"}')
+    assert claim(1, 'key-2', 'submit', 'a') is None
+
+
+def test_idempotency_key_length(flask_app):
+    assert flask_app.claim_idempotency_key(1, '', 'submit', 'a')[0] == 400
+    assert flask_app.claim_idempotency_key(1, 'k' * 256, 'submit', 'a')[0] == 400
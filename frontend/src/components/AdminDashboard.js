@@ -11,6 +11,7 @@ import './AdminDashboard.css';
 
 const AdminDashboard = () => {
   const [user, setUser] = useState(null);
+  const [overview, setOverview] = useState(null);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState('dashboard');
   const [isMenuOpen, setIsMenuOpen] = useState(false);
@@ -30,9 +31,11 @@ const AdminDashboard = () => {
         return;
       }
       try {
-        const response = await api.get('/api/auth/me');
+        // The overview's analytics come back with the user, in one request
+        const response = await api.get('/api/dashboard', { params: { per_page: 1 } });
         if (response.data.success) {
           setUser(response.data.user);
+          setOverview(response.data.analytics);
           setLoading(false);
         } else {
           navigate('/admin/login');
@@ -56,6 +59,8 @@ const AdminDashboard = () => {
   };
 
   const handleTabClick = (tab) => {
+    // The overview re-fetches when shown again, so it reflects uploads and changes since
+    if (tab !== 'dashboard') setOverview(null);
     setActiveTab(tab);
     setIsMenuOpen(false); // Auto-close menu on selection
   };
@@ -105,7 +110,7 @@ const AdminDashboard = () => {
 
         <main className="admin-main">
           <div className="admin-content">
-            {activeTab === 'dashboard' && <Dashboard onViewAlerts={() => setActiveTab('alerts')} />}
+            {activeTab === 'dashboard' && <Dashboard initialAnalytics={overview} onViewAlerts={() => handleTabClick('alerts')} />}
             {activeTab === 'feedbacks' && <FeedbackList />}
             {activeTab === 'analytics' && <Analytics />}
             {activeTab === 'alerts' && <UrgentAlerts />}
@@ -2,13 +2,16 @@ import React, { useState, useEffect } from 'react';
 import api from '../utils/api';
 import './Dashboard.css';
 
-const Dashboard = ({ onViewAlerts }) => {
-  const [analytics, setAnalytics] = useState(null);
-  const [loading, setLoading] = useState(true);
+const Dashboard = ({ initialAnalytics, onViewAlerts }) => {
+  const [analytics, setAnalytics] = useState(initialAnalytics || null);
+  const [loading, setLoading] = useState(!initialAnalytics);
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    fetchAnalytics();
+    // Already loaded with the admin dashboard on first render
+    if (!initialAnalytics) {
+      fetchAnalytics();
+    }
   }, []);
 
   const fetchAnalytics = async () => {
@@ -18,11 +18,15 @@ import './FacultyDashboard.css';
 
 const COLORS = ['#28a745', '#ffc107', '#dc3545', '#17a2b8', '#6f42c1'];
 const SENTIMENT_COLORS = { positive: '#28a745', neutral: '#ffc107', negative: '#dc3545' };
+const PAGE_SIZE = 100;
 
 const FacultyDashboard = () => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
   const [feedbacks, setFeedbacks] = useState([]);
+  const [feedbackCount, setFeedbackCount] = useState(0);
+  const [nextBefore, setNextBefore] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [analytics, setAnalytics] = useState(null);
   const [classFilter, setClassFilter] = useState('');
   const [allClasses, setAllClasses] = useState([]);
@@ -30,63 +34,62 @@ const FacultyDashboard = () => {
   const navigate = useNavigate();
 
   useEffect(() => {
-    const checkAuth = async () => {
-      const storedUser = localStorage.getItem('user');
-      const isAuthenticated = localStorage.getItem('isAuthenticated');
-      if (!isAuthenticated || !storedUser) {
-        navigate('/faculty/login');
-        return;
-      }
-      const userData = JSON.parse(storedUser);
-      if (userData.role !== 'faculty') {
-        navigate('/faculty/login');
-        return;
-      }
+    const storedUser = localStorage.getItem('user');
+    const isAuthenticated = localStorage.getItem('isAuthenticated');
+    if (!isAuthenticated || !storedUser || JSON.parse(storedUser).role !== 'faculty') {
+      navigate('/faculty/login');
+      return;
+    }
+
+    // User, feedback and analytics come back from one request
+    const loadDashboard = async () => {
       try {
-        const response = await api.get('/api/auth/me');
-        if (response.data.success) {
-          setUser(response.data.user);
-          setLoading(false);
-        } else {
+        const params = { per_page: PAGE_SIZE, ...(classFilter ? { class_name: classFilter } : {}) };
+        const response = await api.get('/api/dashboard', { params });
+        if (!response.data.success) {
           navigate('/faculty/login');
+          return;
         }
+        const list = response.data.feedbacks || [];
+        setUser(response.data.user);
+        setFeedbacks(list);
+        setFeedbackCount(response.data.count || 0);
+        setNextBefore(response.data.next_before || null);
+        setAnalytics(response.data.analytics || {});
+        const classes = [...new Set(list.map(f => f.class_name).filter(Boolean))];
+        setAllClasses(prev => [...new Set([...prev, ...classes])].sort());
+        setLoading(false);
       } catch (err) {
-        localStorage.removeItem('user');
-        localStorage.removeItem('isAuthenticated');
-        navigate('/faculty/login');
+        if (err.response?.status === 401 || err.response?.status === 404) {
+          localStorage.removeItem('user');
+          localStorage.removeItem('isAuthenticated');
+          navigate('/faculty/login');
+          return;
+        }
+        console.error('Error loading dashboard:', err);
+        setFeedbacks([]);
+        setLoading(false);
       }
     };
-    checkAuth();
-  }, [navigate]);
-
-  useEffect(() => {
-    if (user) {
-      fetchFeedbacks();
-      fetchAnalytics();
-    }
-  }, [user, classFilter]);
+    loadDashboard();
+  }, [navigate, classFilter]);
 
-  const fetchFeedbacks = async () => {
+  // Older pages continue from the last row shown
+  const loadMore = async () => {
+    if (!nextBefore || loadingMore) return;
+    setLoadingMore(true);
     try {
-      const params = classFilter ? { class_name: classFilter } : {};
+      const params = { limit: PAGE_SIZE, before: nextBefore, ...(classFilter ? { class_name: classFilter } : {}) };
       const response = await api.get('/api/feedback', { params });
       const list = response.data.feedbacks || [];
-      setFeedbacks(list);
+      setFeedbacks(prev => [...prev, ...list]);
+      setNextBefore(response.data.next_before || null);
       const classes = [...new Set(list.map(f => f.class_name).filter(Boolean))];
       setAllClasses(prev => [...new Set([...prev, ...classes])].sort());
     } catch (err) {
-      console.error('Error fetching feedbacks:', err);
-      setFeedbacks([]);
-    }
-  };
-
-  const fetchAnalytics = async () => {
-    try {
-      const params = classFilter ? { class_name: classFilter } : {};
-      const response = await api.get('/api/feedback/analytics', { params });
-      setAnalytics(response.data.analytics || {});
-    } catch (err) {
-      console.error('Error fetching analytics:', err);
+      console.error('Error loading more feedback:', err);
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -180,6 +183,9 @@ const FacultyDashboard = () => {
 
         {activeTab === 'feedback' && (
           <div className="faculty-feedback-list">
+            {feedbackCount > feedbacks.length && (
+              <p className="list-note">Showing the newest {feedbacks.length} of {feedbackCount} feedback entries.</p>
+            )}
             {feedbacks.length === 0 ? (
               <div className="empty-state">
                 <p>No feedback found for this selection.</p>
@@ -209,6 +215,11 @@ const FacultyDashboard = () => {
                 </div>
               ))
             )}
+            {nextBefore && (
+              <button className="load-more-btn" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
           </div>
         )}
 
@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import api from '../utils/api';
+import React, { useRef, useState } from 'react';
+import api, { newIdempotencyKey } from '../utils/api';
 import './FeedbackForm.css';
 
 const FeedbackForm = () => {
@@ -15,8 +15,12 @@ const FeedbackForm = () => {
   const [uploadMode, setUploadMode] = useState(false);
   const [selectedFile, setSelectedFile] = useState(null);
   const [uploadLoading, setUploadLoading] = useState(false);
+  // Kept across retries of the same submission, cleared once it succeeds or changes
+  const submitKey = useRef(null);
+  const uploadKey = useRef(null);
 
   const handleChange = (e) => {
+    submitKey.current = null;
     setFormData({ ...formData, [e.target.name]: e.target.value });
   };
 
@@ -26,8 +30,13 @@ const FeedbackForm = () => {
     setError(null);
     setResult(null);
 
+    submitKey.current = submitKey.current || newIdempotencyKey();
+
     try {
-      const response = await api.post('/api/feedback', formData);
+      const response = await api.post('/api/feedback', formData, {
+        headers: { 'Idempotency-Key': submitKey.current },
+      });
+      submitKey.current = null;
       setResult(response.data); // Triggers success popup
       setFormData({
         student_id: '',
@@ -47,6 +56,7 @@ const FeedbackForm = () => {
     if (file) {
       const ext = file.name.split('.').pop().toLowerCase();
       if (['csv', 'xlsx', 'xls'].includes(ext)) {
+        uploadKey.current = null;
         setSelectedFile(file);
         setError(null);
       } else {
@@ -61,9 +71,13 @@ const FeedbackForm = () => {
     setError(null);
     const uploadData = new FormData();
     uploadData.append('file', selectedFile);
+    uploadKey.current = uploadKey.current || newIdempotencyKey();
 
     try {
-      const response = await api.post('/api/feedback/upload', uploadData);
+      const response = await api.post('/api/feedback/upload', uploadData, {
+        headers: { 'Idempotency-Key': uploadKey.current },
+      });
+      uploadKey.current = null;
       setResult({ isUpload: true, ...response.data }); // Triggers success popup
       setSelectedFile(null);
     } catch (err) {
@@ -1,6 +1,6 @@
 /* riteshpatil9162/feedback_analyzer_running/frontend/src/components/StudentFeedbackForm.js */
-import React, { useState, useEffect } from 'react';
-import api from '../utils/api';
+import React, { useState, useEffect, useRef } from 'react';
+import api, { newIdempotencyKey } from '../utils/api';
 import './FeedbackForm.css';
 
 const StudentFeedbackForm = ({ user }) => {
@@ -15,6 +15,8 @@ const StudentFeedbackForm = ({ user }) => {
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState(null); // Triggers success popup
   const [error, setError] = useState(null);
+  // Kept across retries of the same submission, cleared once it succeeds or changes
+  const submitKey = useRef(null);
 
   useEffect(() => {
     const fetchFaculty = async () => {
@@ -30,6 +32,7 @@ const StudentFeedbackForm = ({ user }) => {
 
   const handleChange = (e) => {
     const { name, value } = e.target;
+    submitKey.current = null;
     setFormData({ ...formData, [name]: value });
   };
 
@@ -46,9 +49,14 @@ const StudentFeedbackForm = ({ user }) => {
       instructor_id: formData.feedback_type === 'faculty' ? formData.instructor_id : ''
     };
 
+    submitKey.current = submitKey.current || newIdempotencyKey();
+
     try {
-      const response = await api.post('/api/feedback', payload);
+      const response = await api.post('/api/feedback', payload, {
+        headers: { 'Idempotency-Key': submitKey.current },
+      });
       if (response.data.success) {
+        submitKey.current = null;
         setResult(response.data); // Triggers success popup
         setFormData({
           class_name: '',
@@ -4,6 +4,7 @@ import './UrgentAlerts.css';
 
 const UrgentAlerts = () => {
   const [feedbacks, setFeedbacks] = useState([]);
+  const [spikeAlerts, setSpikeAlerts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -15,6 +16,7 @@ const UrgentAlerts = () => {
     try {
       const response = await api.get('/api/feedback/urgent');
       setFeedbacks(response.data.feedbacks);
+      setSpikeAlerts(response.data.spike_alerts || []);
       setLoading(false);
     } catch (err) {
       setError('Failed to load urgent alerts');
@@ -28,6 +30,13 @@ const UrgentAlerts = () => {
     return date.toLocaleString();
   };
 
+  const describeSpike = (spike) => {
+    if (spike.metric === 'volume') {
+      return `${spike.observed} feedbacks in ${spike.window_minutes} minutes, usually ${spike.baseline.toFixed(1)}`;
+    }
+    return `Mean sentiment ${spike.observed.toFixed(2)} across ${spike.feedback_count} feedbacks, usually ${spike.baseline.toFixed(2)}`;
+  };
+
   if (loading) {
     return <div className="loading">Loading urgent alerts...</div>;
   }
@@ -49,6 +58,26 @@ const UrgentAlerts = () => {
         </p>
       </div>
 
+      {spikeAlerts.length > 0 && (
+        <div className="spike-alerts-list">
+          <h2>📈 Unusual Activity</h2>
+          {spikeAlerts.map((spike) => (
+            <div key={spike.id} className="spike-alert-item">
+              <div className="spike-header">
+                <strong>
+                  {spike.scope === 'course' ? 'Course' : 'Class'} {spike.scope_value}:{' '}
+                  {spike.metric === 'volume' ? 'feedback volume spike' : 'sentiment drop'}
+                </strong>
+                <span className="urgent-date">{formatDate(spike.window_start)}</span>
+              </div>
+              <p>
+                {describeSpike(spike)} (z = {spike.z_score})
+              </p>
+            </div>
+          ))}
+        </div>
+      )}
+
       {feedbacks.length === 0 ? (
         <div className="card">
           <div className="no-alerts">
@@ -50,5 +50,12 @@ api.interceptors.response.use(
   }
 );
 
+// Key for the Idempotency-Key header: reuse it when retrying the same submission
+// so the backend stores it once, and make a new one for the next submission
+export const newIdempotencyKey = () =>
+  window.crypto?.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
 export default api;
 